@@ -1,17 +1,31 @@
 """
 File Whisper Library - file extraction processing library
+
+提取器类按需导入（PEP 562），导入本包不会加载 easyocr、cv2、fitz 等重量级依赖。
 """
+import importlib
 
 from .extractor import Extractor
-from .extractors.url_extractor import URLExtractor
-from .extractors.qrcode_extractor import QRCodeExtractor
-from .extractors.ocr_extractor import OCRExtractor
-from .extractors.html_extractor import HTMLExtractor
-from .extractors.archive_extractor import ArchiveExtractor
-from .extractors.word_extractor import WordExtractor
-from .extractors.pdf_extractor import PDFExtractor
 from .extractors.utils import encode_binary, decode_binary
 
+_LAZY_EXPORTS = {
+    'URLExtractor': '.extractors.url_extractor',
+    'QRCodeExtractor': '.extractors.qrcode_extractor',
+    'OCRExtractor': '.extractors.ocr_extractor',
+    'HTMLExtractor': '.extractors.html_extractor',
+    'ArchiveExtractor': '.extractors.archive_extractor',
+    'WordExtractor': '.extractors.word_extractor',
+    'PDFExtractor': '.extractors.pdf_extractor',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
+
+
 __all__ = [
     'Extractor',
     'URLExtractor',
@@ -23,4 +37,4 @@ __all__ = [
     'PDFExtractor',
     'encode_binary',
     'decode_binary'
-]
\ No newline at end of file
+]
@@ -1,8 +1,9 @@
 import pybit7z
 import logging
-import tempfile
 from typing import List, Dict
 from .dt import Node, File, Data
+from .tracing import span
+from .extractors import archive_session
 
 class Analyzer:
     @staticmethod
@@ -38,28 +39,25 @@ class Analyzer:
                 logging.error("Empty content")
                 return
             node.meta.map_bool["is_encrypted"] = True
-                
+
+            # 与 ArchiveExtractor 共用同一个会话，归档只落盘、打开一次
+            session = archive_session.session_for(node)
             try:
-                with tempfile.NamedTemporaryFile(delete=True) as temp_file:
-                    temp_file.write(node.content.content)
-                    temp_file.flush()
-                    
-                    with pybit7z.lib7zip_context() as lib:
-                        print(temp_file.name)
-                        arc = pybit7z.BitArchiveReader(lib, temp_file.name, pybit7z.FormatAuto)
-                        node.meta.map_number["items_count"] = arc.items_count()
-                        node.meta.map_number["folders_count"] = arc.folders_count()
-                        node.meta.map_number["files_count"] = arc.files_count() 
-                        node.meta.map_number["size"] = arc.size()
-                        node.meta.map_number["pack_size"] = arc.pack_size()
-                        node.meta.map_bool["is_encrypted"] = arc.is_encrypted()
-                        node.meta.map_number["volumes_count"] = arc.volumes_count()
-                        node.meta.map_bool["is_multi_volume"] = arc.is_multi_volume()
-                        
+                with span("archive_open"):
+                    arc = session.open()
+                node.meta.map_number["items_count"] = arc.items_count()
+                node.meta.map_number["folders_count"] = arc.folders_count()
+                node.meta.map_number["files_count"] = arc.files_count()
+                node.meta.map_number["size"] = arc.size()
+                node.meta.map_number["pack_size"] = arc.pack_size()
+                node.meta.map_bool["is_encrypted"] = arc.is_encrypted()
+                node.meta.map_number["volumes_count"] = arc.volumes_count()
+                node.meta.map_bool["is_multi_volume"] = arc.is_multi_volume()
+
             except pybit7z.BitException as e:
                 logging.error(f"Failed to analyze compressed file: {str(e)}")
                 return
-                
+
         elif isinstance(node.content, Data):
             logging.debug("analyze_compressed_file enter Data type")
             return
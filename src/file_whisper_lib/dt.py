@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 # import mimetypes
 from .types import Types, Types__1, Extension_Types
 
@@ -44,6 +44,12 @@ class Node:
         self.passwords: List[str] = []
         self.pdf_max_pages: int = 10  # 控制PDF文档解析的最大页数，默认为10
         self.word_max_pages: int = 10  # 控制Word文档解析的最大页数，默认为10
+        self.pdf_parallelism: int = 0  # PDF页面并行处理的进程数，0表示使用服务端默认值，1表示串行
+        self.pdf_text_per_page: Optional[bool] = None  # PDF每页输出一个TEXT节点，None表示使用服务端默认值
+        self.pdf_metadata_only: bool = False  # PDF只记录文档信息，不提取文本和图片
+        self.sheet_max_rows: int = 1000  # 控制电子表格（XLSX/ODS）读取的最大行数，所有工作表合计
+        self.presentation_max_slides: int = 50  # 控制演示文稿（PPTX/ODP）读取的最大幻灯片数
+        self.source_path: Optional[str] = None  # file_path 请求中根文件在磁盘上的路径，分卷压缩包从这里读取其余分卷，不继承
         self.type: Types = Types.OTHER
         self.meta: Meta = Meta()
 
@@ -55,6 +61,11 @@ class Node:
         if parent:
             self.pdf_max_pages = parent.pdf_max_pages
             self.word_max_pages = parent.word_max_pages
+            self.pdf_parallelism = parent.pdf_parallelism
+            self.pdf_text_per_page = parent.pdf_text_per_page
+            self.pdf_metadata_only = parent.pdf_metadata_only
+            self.sheet_max_rows = parent.sheet_max_rows
+            self.presentation_max_slides = parent.presentation_max_slides
             self.passwords = parent.passwords
         return self
 
@@ -0,0 +1,202 @@
+"""
+编码探测模块
+
+提取器输出的数据基本都经过 encode_binary 编码为 UTF-8，因此先做 ASCII/UTF-8
+快速校验，只有校验失败时才调用统计型探测器，且大数据只采样若干窗口进行探测。
+
+resolve_encoding 为解码文本选择编码：BOM、合法的 UTF-8、声明的字符集（HTML meta、
+MIME 头），最后才是对采样窗口的探测。
+"""
+import os
+import re
+import codecs
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from loguru import logger
+
+# 每个采样窗口的大小（字节），大于 3 个窗口的数据只探测头、中、尾三段
+DEFAULT_SAMPLE_SIZE = 64 * 1024
+# UTF-8 校验的分块大小，避免为大数据一次性生成完整的 str
+_UTF8_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class EncodingResult:
+    encoding: Optional[str] = None
+    confidence: float = 0.0
+    method: str = ""
+
+
+def _detect_with_chardet(data: bytes) -> Tuple[Optional[str], float]:
+    import chardet
+    results = chardet.detect(data)
+    if not results:
+        return None, 0.0
+    return results.get('encoding'), results.get('confidence') or 0.0
+
+
+def _detect_with_cchardet(data: bytes) -> Tuple[Optional[str], float]:
+    import cchardet
+    results = cchardet.detect(data)
+    if not results:
+        return None, 0.0
+    return results.get('encoding'), results.get('confidence') or 0.0
+
+
+def _detect_with_charset_normalizer(data: bytes) -> Tuple[Optional[str], float]:
+    import charset_normalizer
+    best = charset_normalizer.from_bytes(data).best()
+    if best is None:
+        return None, 0.0
+    # charset_normalizer 给出的是混乱度（越小越好），换算为置信度
+    return best.encoding, max(0.0, 1.0 - best.chaos)
+
+
+DETECTORS: Dict[str, Callable[[bytes], Tuple[Optional[str], float]]] = {
+    'chardet': _detect_with_chardet,
+    'cchardet': _detect_with_cchardet,
+    'charset_normalizer': _detect_with_charset_normalizer,
+}
+
+_detector_cache: Dict[str, Tuple[str, Callable[[bytes], Tuple[Optional[str], float]]]] = {}
+
+
+def get_detector() -> Tuple[str, Callable[[bytes], Tuple[Optional[str], float]]]:
+    """根据环境变量 ENCODING_DETECTOR 选择探测器，依赖缺失时回退到 chardet"""
+    requested = os.environ.get('ENCODING_DETECTOR', 'chardet').strip().lower()
+    cached = _detector_cache.get(requested)
+    if cached is not None:
+        return cached
+
+    name = requested
+    detector = DETECTORS.get(name)
+    if detector is None:
+        logger.warning(f"Unknown encoding detector '{name}', falling back to chardet")
+        name, detector = 'chardet', _detect_with_chardet
+    else:
+        try:
+            detector(b'probe')
+        except ImportError:
+            logger.warning(f"Encoding detector '{name}' not available, falling back to chardet")
+            name, detector = 'chardet', _detect_with_chardet
+
+    _detector_cache[requested] = (name, detector)
+    return name, detector
+
+
+def is_valid_utf8(data: bytes) -> bool:
+    """分块校验数据是否为合法的 UTF-8"""
+    return is_valid_encoding(data, 'utf-8')
+
+
+def is_valid_encoding(data: bytes, encoding: str) -> bool:
+    """分块校验数据能否按 encoding 严格解码，不生成完整的 str"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+    view = memoryview(data)
+    try:
+        for offset in range(0, len(view), _UTF8_CHUNK_SIZE):
+            decoder.decode(view[offset:offset + _UTF8_CHUNK_SIZE], final=False)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def sample_windows(data: bytes, sample_size: int = None) -> bytes:
+    """大数据只取头、中、尾三个窗口拼接后用于探测"""
+    if sample_size is None:
+        sample_size = int(os.environ.get('ENCODING_SAMPLE_SIZE', DEFAULT_SAMPLE_SIZE))
+    if sample_size <= 0 or len(data) <= sample_size * 3:
+        return data
+
+    middle = (len(data) - sample_size) // 2
+    return b"\n".join([
+        data[:sample_size],
+        data[middle:middle + sample_size],
+        data[-sample_size:],
+    ])
+
+
+def detect_encoding(data: bytes) -> EncodingResult:
+    """
+    探测字节数据的编码，confidence 取值 0~1，与 chardet 的语义一致
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return EncodingResult('UTF-8-SIG', 1.0, 'bom')
+
+    if data.isascii():
+        return EncodingResult('ascii', 1.0, 'ascii')
+
+    if is_valid_utf8(data):
+        return EncodingResult('utf-8', 0.99, 'utf8')
+
+    name, detector = get_detector()
+    sample = sample_windows(data)
+    encoding, confidence = detector(sample)
+    method = name if len(sample) == len(data) else f"{name}:sampled"
+    return EncodingResult(encoding, confidence, method)
+
+
+# 声明的字符集 -> 实际使用的超集编码（与浏览器的处理一致）
+_ENCODING_SUPERSETS = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'big5': 'big5hkscs',
+    'ascii': 'utf-8',
+    'iso8859-1': 'cp1252',
+}
+
+# HTML 只在开头查找字符集声明：<meta charset="..."> 或 <meta http-equiv content="...; charset=...">
+_HTML_PRESCAN_SIZE = 4096
+_HTML_META = re.compile(rb'<meta\s[^>]*>', re.IGNORECASE)
+_HTML_ATTR = re.compile(rb'([a-z_:-]+)\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\'>]+)', re.IGNORECASE)
+_CONTENT_CHARSET = re.compile(rb'charset\s*=\s*["\']?\s*([a-z0-9_.:-]+)', re.IGNORECASE)
+
+
+def normalize_encoding(name: Optional[str]) -> Optional[str]:
+    """规范化编码名称并替换为超集编码，未知编码返回 None"""
+    if not name:
+        return None
+    try:
+        codec = codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+    return _ENCODING_SUPERSETS.get(codec, codec)
+
+
+def html_declared_charset(data: bytes) -> Optional[str]:
+    """
+    只认 charset 属性和 http-equiv="content-type" 的 content，
+    其他 meta（如 description）内容中出现的 charset= 不算声明
+    """
+    for tag in _HTML_META.finditer(data, 0, _HTML_PRESCAN_SIZE):
+        attrs = {name.lower(): value.strip(b'"\'').strip()
+                 for name, value in _HTML_ATTR.findall(tag.group(0))}
+        charset = attrs.get(b'charset')
+        if charset is None and attrs.get(b'http-equiv', b'').lower() == b'content-type':
+            m = _CONTENT_CHARSET.search(attrs.get(b'content', b''))
+            charset = m.group(1) if m else None
+        if charset:
+            return charset.decode('ascii', errors='replace')
+    return None
+
+
+def resolve_encoding(data: bytes, declared: Optional[str] = None) -> str:
+    """
+    为解码文本选择编码，依次为 BOM、合法的 UTF-8、能严格解码的声明字符集、采样探测结果，
+    都不可用时使用声明字符集或 UTF-8（调用方以 errors='replace' 解码）
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    if is_valid_utf8(data):
+        return 'utf-8'
+
+    declared = normalize_encoding(declared)
+    if declared is not None and is_valid_encoding(data, declared):
+        return declared
+
+    _, detector = get_detector()
+    detected, _ = detector(sample_windows(data))
+    return normalize_encoding(detected) or declared or 'utf-8'
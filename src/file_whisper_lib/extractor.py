@@ -1,16 +1,12 @@
 """
 文件提取器主模块 - 统一入口点
+
+各提取器模块在第一次使用时才导入，避免 easyocr/torch、cv2、fitz 等重量级依赖
+拖慢只处理文本/HTML 的部署的启动。
 """
+import threading
 from typing import List
 
-from .extractors.url_extractor import URLExtractor
-from .extractors.qrcode_extractor import QRCodeExtractor
-from .extractors.ocr_extractor import OCRExtractor
-from .extractors.html_extractor import HTMLExtractor
-from .extractors.archive_extractor import ArchiveExtractor
-from .extractors.word_extractor import WordExtractor
-from .extractors.pdf_extractor import PDFExtractor
-from .extractors.email_extractor import EmailExtractor
 from .dt import Node
 
 
@@ -18,53 +14,88 @@ class Extractor:
     """
     主提取器类，提供统一的接口访问所有提取功能
     """
-    
+
     def __init__(self):
-        self.ocr_extractor = OCRExtractor()
-    
+        # 有状态提取器（如 OCR 模型）按类缓存，每个 Tree 各持有一份
+        self._instances = {}
+        self._instances_lock = threading.Lock()
+
+    def instance(self, cls):
+        """获取有状态提取器类在当前 Extractor 中的实例，首次使用时创建"""
+        obj = self._instances.get(cls)
+        if obj is None:
+            with self._instances_lock:
+                obj = self._instances.get(cls)
+                if obj is None:
+                    obj = cls()
+                    self._instances[cls] = obj
+        return obj
+
+    @property
+    def ocr_extractor(self):
+        from .extractors.ocr_extractor import OCRExtractor
+        return self.instance(OCRExtractor)
+
     # URL提取
     def extract_urls(self, node: Node) -> List[Node]:
+        from .extractors.url_extractor import URLExtractor
         return URLExtractor.extract_urls(node)
-    
+
     def extract_urls_from_text(self, text: str) -> List[str]:
+        from .extractors.url_extractor import URLExtractor
         return URLExtractor.extract_urls_from_text(text)
-    
+
     # 二维码提取
     def extract_qrcode(self, node: Node) -> List[Node]:
+        from .extractors.qrcode_extractor import QRCodeExtractor
         return QRCodeExtractor.extract_qrcode(node)
-    
+
     # OCR提取
     def extract_ocr(self, node: Node) -> List[Node]:
         return self.ocr_extractor.extract_ocr(node)
-    
+
     # HTML处理
     def extract_html(self, node: Node) -> List[Node]:
-        return HTMLExtractor.extract_html(node)
-    
+        from .extractors.html_extractor import HTMLExtractor
+        return list(HTMLExtractor.extract_html(node))
+
     def extract_text_from_html(self, html: str) -> str:
+        from .extractors.html_extractor import HTMLExtractor
         return HTMLExtractor.extract_text_from_html(html)
-    
+
     def extract_urls_from_html(self, html: str) -> list:
+        from .extractors.html_extractor import HTMLExtractor
         return HTMLExtractor.extract_urls_from_html(html)
-    
+
     def extract_img_from_html(self, html: str) -> list:
+        from .extractors.html_extractor import HTMLExtractor
         return HTMLExtractor.extract_img_from_html(html)
-    
+
     # 压缩文件处理
     def extract_compressed_file(self, node: Node) -> List[Node]:
-        return ArchiveExtractor.extract_compressed_file(node)
-    
+        from .extractors.archive_extractor import ArchiveExtractor
+        return list(ArchiveExtractor.extract_compressed_file(node))
+
     def extract_files_from_data(self, data: bytes, password: str = ""):
+        from .extractors.archive_extractor import ArchiveExtractor
         return ArchiveExtractor.extract_files_from_data(data, password)
-    
+
     # Word文档处理
     def extract_word_file(self, node: Node) -> List[Node]:
+        from .extractors.word_extractor import WordExtractor
         return WordExtractor.extract_word_file(node)
-    
+
+    # 电子表格、演示文稿处理（XLSX、PPTX、ODT、ODS、ODP）
+    def extract_office_file(self, node: Node) -> List[Node]:
+        from .extractors.office_extractor import OfficeExtractor
+        return OfficeExtractor.extract_office_file(node)
+
     # PDF文档处理
     def extract_pdf_file(self, node: Node) -> List[Node]:
+        from .extractors.pdf_extractor import PDFExtractor
         return PDFExtractor.extract_pdf_file(node)
-    
+
     # 邮件处理
     def extract_email_file(self, node: Node) -> List[Node]:
-        return EmailExtractor.extract_email_file(node)
\ No newline at end of file
+        from .extractors.email_extractor import EmailExtractor
+        return EmailExtractor.extract_email_file(node)
@@ -1,16 +1,31 @@
 """
 Extractors package - contains all file extraction implementations
+
+各提取器模块按需导入（PEP 562），只有真正用到时才加载其依赖。
 """
+import importlib
 
-from .url_extractor import URLExtractor
-from .qrcode_extractor import QRCodeExtractor
-from .ocr_extractor import OCRExtractor
-from .html_extractor import HTMLExtractor
-from .archive_extractor import ArchiveExtractor
-from .word_extractor import WordExtractor
-from .pdf_extractor import PDFExtractor
 from .utils import encode_binary, decode_binary
 
+_LAZY_EXPORTS = {
+    'URLExtractor': '.url_extractor',
+    'QRCodeExtractor': '.qrcode_extractor',
+    'OCRExtractor': '.ocr_extractor',
+    'HTMLExtractor': '.html_extractor',
+    'ArchiveExtractor': '.archive_extractor',
+    'WordExtractor': '.word_extractor',
+    'OfficeExtractor': '.office_extractor',
+    'PDFExtractor': '.pdf_extractor',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
+
+
 __all__ = [
     'URLExtractor',
     'QRCodeExtractor', 
@@ -18,7 +33,8 @@ __all__ = [
     'HTMLExtractor',
     'ArchiveExtractor',
     'WordExtractor',
+    'OfficeExtractor',
     'PDFExtractor',
     'encode_binary',
     'decode_binary'
-]
\ No newline at end of file
+]
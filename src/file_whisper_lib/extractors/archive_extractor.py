@@ -1,36 +1,202 @@
 """
 压缩文件处理模块
+
+按条目列表逐个解压：先根据归档中记录的大小和压缩率跳过可疑条目、按名称过滤，再逐个解压并
+立即产出子节点，由 Tree 在解压下一个条目之前处理，不会把整个归档一次性解压到内存。
+固实（solid）归档逐个解压需要反复从头解压数据块，改为把选中的条目一次解压到临时目录后逐个读取。
+
+相关环境变量:
+- ARCHIVE_MAX_ENTRY_SIZE: 单个条目解压后的大小上限（字节），默认 268435456（256 MiB）
+- ARCHIVE_MAX_TOTAL_SIZE: 每个归档解压总大小上限（字节），默认 1073741824（1 GiB）
+- ARCHIVE_MAX_ENTRIES: 每个归档最多解压的条目数，默认 10000
+- ARCHIVE_MAX_RATIO: 单个条目的解压大小/压缩大小上限，默认 200
+- ARCHIVE_EXCLUDE: 逗号分隔的 glob 模式，匹配路径或文件名的条目不解压，如 "__MACOSX/*,*.iso"
+- ARCHIVE_PASSWORD_WORKERS: 并行校验候选密码的线程数，默认 4
+- ARCHIVE_PASSWORD_CACHE_SIZE: 按归档 sha256 缓存正确密码的条数，默认 1024，0 表示不缓存
+- ARCHIVE_ENTRY_CACHE_BYTES: 按 (CRC32, 大小) 缓存条目内容的总字节数，默认 0（关闭）
 """
-from typing import List, Dict
+import os
+import zlib
+import fnmatch
+import posixpath
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
 from loguru import logger
 import pybit7z
 
 from ..dt import Node, File, Data
+from ..metrics import record_cache
+from ..tracing import span
+from . import archive_session
+
+# 小于该大小的条目不检查压缩率（小文本文件的压缩率本来就很高）
+RATIO_MIN_SIZE = 1024 * 1024
+
+
+@dataclass
+class ArchiveLimits:
+    max_entry_size: int = 256 * 1024 * 1024
+    max_total_size: int = 1024 * 1024 * 1024
+    max_entries: int = 10000
+    max_ratio: int = 200
+    exclude: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_environment(cls) -> 'ArchiveLimits':
+        exclude = os.environ.get('ARCHIVE_EXCLUDE', '')
+        return cls(
+            max_entry_size=int(os.environ.get('ARCHIVE_MAX_ENTRY_SIZE', str(256 * 1024 * 1024))),
+            max_total_size=int(os.environ.get('ARCHIVE_MAX_TOTAL_SIZE', str(1024 * 1024 * 1024))),
+            max_entries=int(os.environ.get('ARCHIVE_MAX_ENTRIES', '10000')),
+            max_ratio=int(os.environ.get('ARCHIVE_MAX_RATIO', '200')),
+            exclude=[p.strip().lower() for p in exclude.split(',') if p.strip()],
+        )
+
+    def skip_reason(self, path: str, size: int, pack_size: int) -> Optional[str]:
+        """根据归档中记录的信息判断条目是否跳过，返回原因"""
+        name = path.replace('\\', '/').lower()
+        for pattern in self.exclude:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(posixpath.basename(name), pattern):
+                return "excluded"
+        if size > self.max_entry_size:
+            return "too_large"
+        # 固实归档中除第一个条目外 pack_size 为 0，无法计算压缩率
+        if pack_size > 0 and size >= RATIO_MIN_SIZE and size / pack_size > self.max_ratio:
+            return "ratio"
+        return None
+
+
+class _PasswordCache:
+    """归档 sha256 -> 正确密码，LRU"""
+
+    def __init__(self):
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            password = self._items.get(key)
+            if password is not None:
+                self._items.move_to_end(key)
+            return password
+
+    def put(self, key: str, password: str):
+        capacity = int(os.environ.get('ARCHIVE_PASSWORD_CACHE_SIZE', '1024'))
+        if capacity <= 0 or not key:
+            return
+        with self._lock:
+            self._items[key] = password
+            self._items.move_to_end(key)
+            while len(self._items) > capacity:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_password_cache = _PasswordCache()
+
+
+class _EntryCache:
+    """
+    (CRC32, 解压大小) -> 条目内容，按总字节数 LRU 淘汰。命中的条目不再解压。
+    CRC32 可以被刻意构造碰撞，默认关闭，只在可信的输入上开启。
+    """
+
+    def __init__(self):
+        self._items: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def capacity() -> int:
+        return int(os.environ.get('ARCHIVE_ENTRY_CACHE_BYTES', '0'))
+
+    def get(self, key: Tuple[int, int]) -> Optional[bytes]:
+        with self._lock:
+            content = self._items.get(key)
+            if content is not None:
+                self._items.move_to_end(key)
+            return content
+
+    def put(self, key: Tuple[int, int], content: bytes):
+        capacity = self.capacity()
+        # 单个条目最多占用 1/8 的容量，避免一个大文件清空缓存
+        if len(content) > capacity // 8:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = content
+            self._bytes += len(content)
+            while self._bytes > capacity:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+_entry_cache = _EntryCache()
+
+
+def _entry_crc(item) -> Optional[int]:
+    """条目的 CRC32，格式不记录 CRC（如 tar）时返回 None"""
+    value = item.item_property(pybit7z.BitProperty.CRC)
+    return value.get_uint64() if value.is_uint32() else None
+
+
+def _entry_time(item, prop) -> Optional[int]:
+    """条目时间戳（Unix 秒），归档中没有记录时返回 None"""
+    value = item.item_property(prop)
+    if not value.is_file_time():
+        return None
+    return int(value.get_file_time().timestamp())
+
+
+def _check_password(path: str, password: str, index: Optional[int], archive_format=pybit7z.FormatAuto) -> bool:
+    """
+    用独立的 reader 校验一个密码（reader 不能跨线程共用）：头部加密的归档打开时即校验密码，
+    否则只测试最小的加密条目，不做完整解压
+    """
+    try:
+        reader = pybit7z.BitArchiveReader(archive_session.get_library(), path, archive_format, password)
+        if index is not None:
+            reader.test_item(index)
+        return True
+    except Exception as e:
+        logger.debug(f"Password check failed: {str(e)}")
+        return False
 
 
 class ArchiveExtractor:
-    
+
     @staticmethod
-    def extract_compressed_file(node: Node) -> List[Node]:
-        """主要的压缩文件解压入口函数"""
+    def extract_compressed_file(node: Node) -> Iterator[Node]:
+        """主要的压缩文件解压入口函数，逐个产出子节点"""
+        # 从Node中提取数据
+        data = ArchiveExtractor._extract_data_from_node(node)
+        if data is None:
+            return
+
+        # 与 Analyzer 共用同一个已打开的归档
+        session = archive_session.session_for(node)
         try:
-            # 从Node中提取数据
-            data = ArchiveExtractor._extract_data_from_node(node)
-            if data is None:
-                return []
-            
-            # 尝试解压缩文件
-            files = ArchiveExtractor._try_extract_with_passwords(data, node)
-            
-            # 根据解压结果创建Node对象
-            nodes = ArchiveExtractor._create_nodes_from_files(files, node)
-            
-            return nodes
-            
+            ArchiveExtractor._unlock(session, node)
+            yield from ArchiveExtractor._iter_entries(session, node, ArchiveLimits.from_environment())
         except Exception as e:
             logger.error(f"Error extracting compressed file: {str(e)}")
             raise e
-    
+        finally:
+            archive_session.release(node)
+
     @staticmethod
     def _extract_data_from_node(node: Node) -> bytes:
         """从Node中提取二进制数据"""
@@ -41,81 +207,259 @@ class ArchiveExtractor:
             return None
         else:
             raise ValueError("Unsupported node content type")
-    
+
     @staticmethod
-    def _try_extract_with_passwords(data: bytes, node: Node) -> Dict[str, bytes]:
-        """尝试使用密码解压缩文件"""
-        extracted = False
-        files = {}
-        last_error = None
-        
-        # 首先尝试无密码解压
-        if not node.passwords:
-            try:
-                files = ArchiveExtractor.extract_files_from_data(data)
-                extracted = True
-            except Exception as e:
-                last_error = e
-                logger.debug(f"Failed to extract without password: {str(e)}")
-        
-        # 如果无密码解压失败或存在密码列表，尝试使用密码
-        if not extracted and node.passwords:
-            for password in node.passwords:
-                try:
-                    files = ArchiveExtractor.extract_files_from_data(data, password)
-                    extracted = True
-                    node.meta.map_string["correct_password"] = password
-                    logger.info(f"Successfully extracted with password: {password}")
-                    break
-                except Exception as e:
-                    last_error = e
-                    logger.debug(f"Failed to extract with password '{password}': {str(e)}")
-                    # 继续尝试下一个密码，不要重新抛出异常
-                    continue
-        
-        if not extracted:
-            error_msg = f"Failed to extract compressed file. Last error: {str(last_error) if last_error else 'Unknown error'}"
+    def _wrap_error(e: Exception) -> RuntimeError:
+        """将 C++ 异常包装成 Python 异常，以便上层代码可以正确处理"""
+        error_msg = str(e)
+        logger.debug(f"Extraction failed: {error_msg}")
+        if "Wrong password" in error_msg or "password" in error_msg.lower():
+            return RuntimeError(f"Password error: {error_msg}")
+        return RuntimeError(f"Extraction error: {error_msg}")
+
+    @staticmethod
+    def _smallest_encrypted_item(reader) -> Optional[int]:
+        items = [item for item in reader.items() if item.is_encrypted() and not item.is_dir()]
+        if not items:
+            return None
+        return min(items, key=lambda item: item.size()).index()
+
+    @staticmethod
+    def _find_password(path: str, candidates: List[str], index: Optional[int],
+                       archive_format=pybit7z.FormatAuto) -> Optional[str]:
+        """并行校验候选密码，返回第一个通过校验的密码"""
+        workers = min(len(candidates), max(1, int(os.environ.get('ARCHIVE_PASSWORD_WORKERS', '4'))))
+        if workers == 1:
+            for password in candidates:
+                if _check_password(path, password, index, archive_format):
+                    return password
+            return None
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive_password")
+        try:
+            futures = {executor.submit(_check_password, path, password, index, archive_format): password for password in candidates}
+            for future in as_completed(futures):
+                if future.result():
+                    return futures[future]
+            return None
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _unlock(session: archive_session.ArchiveSession, node: Node):
+        """
+        打开归档并确定解压密码，没有可用密码时抛出 RuntimeError。
+        候选密码只针对归档头或最小的加密条目并行校验，确定后只做一次完整解压；
+        同一归档（sha256）上次成功的密码在候选列表中时优先单独校验。
+        """
+        index = None
+        try:
+            reader = session.open()
+            # 不含加密条目的归档直接解压
+            if not reader.has_encrypted_items():
+                return
+            index = ArchiveExtractor._smallest_encrypted_item(reader)
+        except Exception as e:
+            # 头部加密的归档不提供密码无法打开，打开即校验密码
+            logger.debug(f"Failed to open archive without password: {str(e)}")
+
+        candidates = list(dict.fromkeys(node.passwords))
+        if not candidates:
+            error_msg = "Failed to extract compressed file. Last error: A password is required but none was provided"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        path = session.ensure_file()
+        archive_hash = node.content.sha256 if isinstance(node.content, File) else ""
+        password = None
+        cached = _password_cache.get(archive_hash) if archive_hash else None
+        record_cache("archive_password", cached is not None and cached in candidates)
+        if cached is not None and cached in candidates:
+            with span("archive_password_check", candidates=1, cached=True):
+                if _check_password(path, cached, index, session.format):
+                    password = cached
+                else:
+                    candidates.remove(cached)
+        if password is None and candidates:
+            with span("archive_password_check", candidates=len(candidates)):
+                password = ArchiveExtractor._find_password(path, candidates, index, session.format)
+
+        if password is None:
+            error_msg = f"Failed to extract compressed file. Last error: Wrong password ({len(node.passwords)} candidates)"
             logger.error(error_msg)
             raise RuntimeError(error_msg)
-        
-        return files
-    
+
+        try:
+            session.use_password(password)
+        except Exception as e:
+            raise ArchiveExtractor._wrap_error(e)
+        _password_cache.put(archive_hash, password)
+        node.meta.map_string["correct_password"] = password
+        logger.info(f"Successfully extracted with password: {password}")
+
     @staticmethod
-    def _create_nodes_from_files(files: Dict[str, bytes], parent_node: Node) -> List[Node]:
-        """根据解压后的文件创建Node对象列表"""
-        nodes = []
-        
-        for filename, content in files.items():
-            t_node = Node()
-            t_node.content = File(
-                path=filename,
-                name=filename,
-                content=content
-            )
-            t_node.prev = parent_node
-            t_node.inherit_limits(parent_node)
-            nodes.append(t_node)
-        
-        return nodes
+    def _select_entries(reader, node: Node, limits: ArchiveLimits) -> list:
+        """按归档中记录的大小选出要解压的条目，不解压任何数据"""
+        selected = []
+        skipped = 0
+        total = 0
+        truncated = False
+        for item in reader.items():
+            if item.is_dir():
+                continue
+            path = item.path()
+            reason = limits.skip_reason(path, item.size(), item.pack_size())
+            if reason is not None:
+                skipped += 1
+                logger.info(f"Skipping archive entry {path} ({reason}, size={item.size()}, packed={item.pack_size()})")
+                continue
+            if len(selected) >= limits.max_entries or total + item.size() > limits.max_total_size:
+                truncated = True
+                break
+            total += item.size()
+            selected.append(item)
+
+        node.meta.map_number["archive_entries_skipped"] = skipped
+        node.meta.map_bool["archive_truncated"] = truncated
+        return selected
+
+    @staticmethod
+    def _iter_entries(session: archive_session.ArchiveSession, node: Node, limits: ArchiveLimits) -> Iterator[Node]:
+        reader = session.reader
+        selected = ArchiveExtractor._select_entries(reader, node, limits)
+
+        extracted = 0
+        extracted_bytes = 0
+        cached_count = 0
+        contents = ArchiveExtractor._iter_contents(reader, selected)
+        try:
+            for item, content, cached in contents:
+                if content is None:
+                    continue
+                # 归档中记录的大小可能是伪造的，按实际大小再检查一次
+                if len(content) > limits.max_entry_size or extracted_bytes + len(content) > limits.max_total_size:
+                    logger.warning(f"Archive entry {item.path()} exceeds size limits after extraction, stopping")
+                    node.meta.map_bool["archive_truncated"] = True
+                    break
+                extracted += 1
+                extracted_bytes += len(content)
+                cached_count += cached
+                yield ArchiveExtractor._create_node(item, content, cached, node)
+        finally:
+            contents.close()
+            node.meta.map_number["archive_entries_extracted"] = extracted
+            node.meta.map_number["archive_bytes_extracted"] = extracted_bytes
+            if cached_count:
+                node.meta.map_number["archive_entries_cached"] = cached_count
+
+    @staticmethod
+    def _iter_contents(reader, selected: list):
+        """按条目顺序产出 (条目, 内容, 是否来自缓存)；缓存命中的条目不解压"""
+        cache_enabled = _EntryCache.capacity() > 0
+        keys = {}
+        hits = {}
+        if cache_enabled:
+            for item in selected:
+                crc = _entry_crc(item)
+                if crc is None:
+                    continue
+                keys[item.index()] = (crc, item.size())
+                content = _entry_cache.get(keys[item.index()])
+                record_cache("archive_entry", content is not None)
+                if content is not None:
+                    hits[item.index()] = content
+
+        pending = [item for item in selected if item.index() not in hits]
+        if reader.is_solid() and len(pending) > 1:
+            source = ArchiveExtractor._iter_solid(reader, pending)
+        else:
+            source = ((item, ArchiveExtractor._extract_item(reader, item)) for item in pending)
+
+        try:
+            for item in selected:
+                if item.index() in hits:
+                    yield item, hits[item.index()], True
+                    continue
+                _, content = next(source)
+                key = keys.get(item.index())
+                # 只缓存 CRC 与内容一致的条目
+                if key is not None and content is not None and zlib.crc32(content) == key[0]:
+                    _entry_cache.put(key, content)
+                yield item, content, False
+        finally:
+            source.close()
+
+    @staticmethod
+    def _extract_item(reader, item) -> Optional[bytes]:
+        try:
+            with span("archive_extract_entry", index=item.index()):
+                return reader.extract_to(item.index())
+        except Exception as e:
+            logger.warning(f"Failed to extract archive entry {item.path()}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _iter_solid(reader, selected: list):
+        """固实归档：选中的条目一次解压到临时目录，再逐个读取并删除；未解压出的条目内容为 None"""
+        with tempfile.TemporaryDirectory(prefix="file_whisper_solid_") as out_dir:
+            with span("archive_extract", entries=len(selected), solid=True):
+                reader.extract_to(out_dir, [item.index() for item in selected])
+            root = os.path.realpath(out_dir)
+            for item in selected:
+                path = os.path.realpath(os.path.join(out_dir, item.path()))
+                if not path.startswith(root + os.sep) or not os.path.isfile(path):
+                    logger.warning(f"Archive entry {item.path()} was not extracted")
+                    yield item, None
+                    continue
+                with open(path, 'rb') as f:
+                    content = f.read()
+                os.remove(path)
+                yield item, content
+
+    @staticmethod
+    def _create_node(item, content: bytes, cached: bool, parent_node: Node) -> Node:
+        """子节点带上归档中记录的条目信息"""
+        filename = item.path()
+        t_node = Node()
+        t_node.content = File(
+            path=filename,
+            name=filename,
+            content=content
+        )
+        meta = t_node.meta
+        meta.map_string["archive_path"] = filename
+        meta.map_number["archive_index"] = item.index()
+        meta.map_number["archive_size"] = item.size()
+        meta.map_number["archive_pack_size"] = item.pack_size()
+        meta.map_bool["archive_encrypted"] = item.is_encrypted()
+        meta.map_bool["archive_cached"] = cached
+        crc = _entry_crc(item)
+        if crc is not None:
+            meta.map_number["archive_crc"] = crc
+        for key, prop in (("archive_mtime", pybit7z.BitProperty.MTime),
+                          ("archive_ctime", pybit7z.BitProperty.CTime),
+                          ("archive_atime", pybit7z.BitProperty.ATime)):
+            timestamp = _entry_time(item, prop)
+            if timestamp is not None:
+                meta.map_number[key] = timestamp
+        method = item.item_property(pybit7z.BitProperty.Method)
+        if method.is_string():
+            meta.map_string["archive_method"] = method.get_string()
+        t_node.prev = parent_node
+        t_node.inherit_limits(parent_node)
+        return t_node
 
     @staticmethod
     def extract_files_from_data(data: bytes, password: str = "") -> Dict[str, bytes]:
         files_map = {}
-        
+
         try:
-            with pybit7z.lib7zip_context() as lib:
-                extractor = pybit7z.BitMemExtractor(lib, pybit7z.FormatAuto)
-                if password:
-                    extractor.set_password(password)
-                files_map = extractor.extract(data)
-                                
+            extractor = pybit7z.BitMemExtractor(archive_session.get_library(), pybit7z.FormatAuto)
+            if password:
+                extractor.set_password(password)
+            files_map = extractor.extract(data)
+
         except Exception as e:
-            error_msg = str(e)
-            logger.debug(f"Extraction failed: {error_msg}")
-            # 将 C++ 异常包装成 Python 异常，以便上层代码可以正确处理
-            if "Wrong password" in error_msg or "password" in error_msg.lower():
-                raise RuntimeError(f"Password error: {error_msg}")
-            else:
-                raise RuntimeError(f"Extraction error: {error_msg}")
-            
-        return files_map
\ No newline at end of file
+            raise ArchiveExtractor._wrap_error(e)
+
+        return files_map
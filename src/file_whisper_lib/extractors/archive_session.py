@@ -0,0 +1,148 @@
+"""
+压缩文件会话
+
+7z 动态库每个进程只加载一次。每个压缩文件节点对应一个 ArchiveSession：归档内容只落盘一次
+（BitArchiveReader 只能从文件路径打开），只打开一次，Analyzer 读取统计信息、ArchiveExtractor
+列出条目和解压都使用同一个 reader。会话按节点保存在弱引用表中，提取器处理完后调用 release()
+关闭；节点被回收时临时文件也会随之删除。
+
+file_path 请求的根节点带有磁盘路径（Node.source_path），会话直接打开该文件而不再落盘，
+分卷压缩包（.part1.rar、.7z.001 等）的其余分卷由 7z 从同一目录按需读取，不会载入内存。
+"""
+import os
+import re
+import tempfile
+import threading
+import weakref
+from typing import Dict, Optional
+from loguru import logger
+import pybit7z
+
+from ..dt import Node, File
+
+_library: Optional[pybit7z.Bit7zLibrary] = None
+_library_lock = threading.Lock()
+
+
+def get_library() -> pybit7z.Bit7zLibrary:
+    """进程内共享的 7z 库；设置了 LIB_PATH_7Z 且文件存在时使用它，否则使用 pybit7z 自带的库"""
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                path = os.environ.get('LIB_PATH_7Z', '')
+                if not path or not os.path.exists(path):
+                    path = pybit7z.default_lib7zip()
+                library = pybit7z.Bit7zLibrary(path)
+                library.set_large_page_mode()
+                logger.debug(f"Loaded 7z library from {path}")
+                _library = library
+    return _library
+
+
+# .001 分卷按文件头识别归档格式并直接以该格式打开才能逐条目读取，
+# 否则 7z 以 Split 格式打开，把所有分卷拼接成一个文件作为唯一条目
+_SPLIT_NAME = re.compile(r"\.\d{3}$")
+_SPLIT_SIGNATURES = (
+    (b"7z\xbc\xaf\x27\x1c", pybit7z.FormatSevenZip),
+    (b"Rar!\x1a\x07\x01\x00", pybit7z.FormatRar5),
+    (b"Rar!\x1a\x07\x00", pybit7z.FormatRar),
+    (b"PK\x03\x04", pybit7z.FormatZip),
+)
+
+
+def _split_inner_format(data: bytes):
+    for signature, archive_format in _SPLIT_SIGNATURES:
+        if data.startswith(signature):
+            return archive_format
+    return None
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to remove temp file {path}: {e}")
+
+
+class ArchiveSession:
+    """一个压缩文件的打开状态"""
+
+    def __init__(self, data: bytes, source_path: Optional[str] = None):
+        self.data = data
+        self.source_path = source_path
+        self.path: Optional[str] = None
+        self.format = pybit7z.FormatAuto
+        self.reader: Optional[pybit7z.BitArchiveReader] = None
+        self.password = ""
+        self._finalizer = None
+
+    def _use_source(self) -> bool:
+        """磁盘上的文件仍与请求读到的内容一致（大小相同）时直接使用"""
+        try:
+            return bool(self.source_path) and os.path.getsize(self.source_path) == len(self.data)
+        except OSError:
+            return False
+
+    def ensure_file(self) -> str:
+        """返回归档的文件路径：优先使用磁盘上的原文件，否则落盘到临时文件（只写一次）"""
+        if self.path is None:
+            if self._use_source():
+                self.path = self.source_path
+                if _SPLIT_NAME.search(self.path):
+                    self.format = _split_inner_format(self.data) or pybit7z.FormatAuto
+                return self.path
+            fd, path = tempfile.mkstemp(prefix="file_whisper_archive_")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.data)
+            self.path = path
+            self._finalizer = weakref.finalize(self, _remove_file, path)
+        return self.path
+
+    def open(self, password: str = "") -> pybit7z.BitArchiveReader:
+        """打开归档；头部加密的归档（如 7z -mhe）需要在打开时提供密码"""
+        if self.reader is None:
+            self.reader = pybit7z.BitArchiveReader(get_library(), self.ensure_file(), self.format, password)
+            self.password = password
+        return self.reader
+
+    def use_password(self, password: str):
+        """切换解压使用的密码，尚未打开时用该密码打开"""
+        if self.reader is None:
+            self.open(password)
+        elif password != self.password:
+            self.reader.set_password(password)
+            self.password = password
+
+    def extract_all(self) -> Dict[str, bytes]:
+        return self.open(self.password).extract_to()
+
+    def close(self):
+        self.reader = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+_sessions: "weakref.WeakKeyDictionary[Node, ArchiveSession]" = weakref.WeakKeyDictionary()
+_sessions_lock = threading.Lock()
+
+
+def session_for(node: Node) -> Optional[ArchiveSession]:
+    """节点对应的会话，没有时创建（尚未打开）；节点内容不是文件时返回 None"""
+    if not isinstance(node.content, File):
+        return None
+    with _sessions_lock:
+        session = _sessions.get(node)
+        if session is None:
+            session = ArchiveSession(node.content.content, node.source_path)
+            _sessions[node] = session
+    return session
+
+
+def release(node: Node):
+    with _sessions_lock:
+        session = _sessions.pop(node, None)
+    if session is not None:
+        session.close()
@@ -0,0 +1,214 @@
+"""
+DOCX 流式文本读取
+
+用 iterparse 逐个元素读取主文档（通常是 word/document.xml），段落处理完立即释放，
+达到页数上限后停止读取，不像 python-docx 那样把整个 XML 建成对象树。
+
+页数按文档中的分页标记计算：显式分页符 <w:br w:type="page"/>、段前分页、分节符，
+以及 Word 保存时写入的 <w:lastRenderedPageBreak/>；两个分页标记之间每 PARAGRAPHS_PER_PAGE
+个段落（表格每行算一个段落）估算为一页，没有任何分页标记的文档也能截断。
+表格按行输出，单元格之间用制表符分隔；页眉页脚单独读取。
+"""
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import IO, List, Optional
+from zipfile import ZipFile
+
+from . import ooxml
+from .ooxml import attr, local_name
+
+# 与 DOC 路径一致
+PARAGRAPHS_PER_PAGE = 20
+
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+_REL_HEADER = "/header"
+_REL_FOOTER = "/footer"
+
+
+@dataclass
+class DocxText:
+    text: str
+    # 实际读取的页数（按分页标记和段落估算）
+    pages_read: int = 1
+    # 是否因为页数上限提前停止
+    truncated: bool = False
+    # 页眉页脚文本，已去重
+    headers_footers: List[str] = field(default_factory=list)
+    # docProps/app.xml 中 Word 保存时记录的页数，没有时为 0
+    page_count: int = 0
+
+
+class _StopReading(Exception):
+    pass
+
+
+class _PartReader:
+    """读取一个 WordprocessingML 部件（主文档、页眉、页脚）"""
+
+    def __init__(self, max_pages: Optional[int] = None):
+        self.budget = max_pages * PARAGRAPHS_PER_PAGE if max_pages else None
+        self.used = 0
+        self.pages = 1
+        self.truncated = False
+        self.lines: List[str] = []
+        self._paragraphs: List[List[str]] = []
+        self._cells: List[List[str]] = []
+        self._tables: List[List[List[str]]] = []
+        # 显式分页后 Word 通常紧跟一个 lastRenderedPageBreak，两者是同一次分页
+        self._break_pending = False
+        self._section_type: Optional[str] = None
+        self._break_after_paragraph = False
+        self._skip_depth = 0
+
+    def _consume(self, units: int = 1):
+        self.used += units
+        if self.budget is not None and self.used >= self.budget:
+            self.truncated = True
+            raise _StopReading()
+
+    def _page_break(self):
+        self._break_pending = True
+        self.pages += 1
+        # 当前页剩余的段落额度作废
+        self.used = (self.used // PARAGRAPHS_PER_PAGE + 1) * PARAGRAPHS_PER_PAGE
+        if self.budget is not None and self.used >= self.budget:
+            self.pages -= 1
+            self.truncated = True
+            raise _StopReading()
+
+    def _emit(self, text: str):
+        if self._cells:
+            self._cells[-1].append(text)
+        else:
+            self.lines.append(text)
+            self._consume()
+
+    def _flush_partial(self):
+        """提前停止时保留已读取的半个段落"""
+        while self._paragraphs:
+            text = "".join(self._paragraphs.pop())
+            if text and not self._cells:
+                self.lines.append(text)
+
+    def read(self, stream: IO[bytes]) -> List[str]:
+        try:
+            for event, elem in ET.iterparse(stream, events=("start", "end")):
+                self._handle(event, elem)
+        except _StopReading:
+            self._flush_partial()
+        return self.lines
+
+    def _handle(self, event: str, elem):
+        tag = local_name(elem.tag)
+
+        # mc:AlternateContent 的 Fallback 是 Choice 的旧格式副本（如 VML 文本框），跳过避免文本重复
+        if tag == "Fallback":
+            self._skip_depth += 1 if event == "start" else -1
+            return
+        if self._skip_depth:
+            return
+
+        if event == "start":
+            if tag == "p":
+                self._paragraphs.append([])
+            elif tag == "tbl":
+                self._tables.append([])
+            elif tag == "tr" and self._tables:
+                self._tables[-1].append([])
+            elif tag == "tc":
+                self._cells.append([])
+            return
+
+        if tag == "t":
+            if elem.text and self._paragraphs:
+                self._paragraphs[-1].append(elem.text)
+                self._break_pending = False
+        elif tag == "tab" and self._paragraphs and attr(elem, "val") is None:
+            # 带 val 属性的是段落属性中的制表位定义，不是文本中的制表符
+            self._paragraphs[-1].append("\t")
+        elif tag == "noBreakHyphen" and self._paragraphs:
+            self._paragraphs[-1].append("-")
+        elif tag in ("br", "cr"):
+            if tag == "br" and attr(elem, "type") == "page":
+                self._page_break()
+            elif self._paragraphs:
+                self._paragraphs[-1].append("\n")
+        elif tag == "lastRenderedPageBreak":
+            if self._break_pending:
+                self._break_pending = False
+            else:
+                self._page_break()
+        elif tag == "pageBreakBefore":
+            if attr(elem, "val") not in ("0", "false", "off"):
+                self._page_break()
+        elif tag == "type":
+            self._section_type = attr(elem, "val")
+        elif tag == "sectPr":
+            # 段落属性中的分节符，除连续分节外下一段从新页开始
+            if self._paragraphs and self._section_type != "continuous":
+                self._break_after_paragraph = True
+            self._section_type = None
+        elif tag == "p":
+            text = "".join(self._paragraphs.pop()) if self._paragraphs else ""
+            elem.clear()
+            if self._paragraphs:
+                # 文本框等嵌在段落中的段落，并入外层段落
+                self._paragraphs[-1].append(text)
+            else:
+                self._emit(text)
+                if self._break_after_paragraph:
+                    self._break_after_paragraph = False
+                    self._page_break()
+        elif tag == "tc":
+            paragraphs = self._cells.pop()
+            if self._tables and self._tables[-1]:
+                self._tables[-1][-1].append(" ".join(p.strip() for p in paragraphs if p.strip()))
+        elif tag == "tr":
+            if self._tables and self._tables[-1]:
+                self._emit("\t".join(self._tables[-1][-1]))
+        elif tag == "tbl":
+            if self._tables:
+                self._tables.pop()
+            elem.clear()
+
+
+def main_document_part(zf: ZipFile) -> str:
+    return ooxml.main_part(zf, DEFAULT_DOCUMENT_PART)
+
+
+def _saved_page_count(zf: ZipFile) -> int:
+    try:
+        with zf.open("docProps/app.xml") as f:
+            for _, elem in ET.iterparse(f):
+                if local_name(elem.tag) == "Pages" and elem.text and elem.text.strip().isdigit():
+                    return int(elem.text.strip())
+    except (KeyError, ET.ParseError):
+        pass
+    return 0
+
+
+def read_docx(zf: ZipFile, max_pages: int = 10) -> DocxText:
+    """从已打开的 DOCX ZipFile 中读取正文（最多 max_pages 页）和页眉页脚"""
+    part = main_document_part(zf)
+    reader = _PartReader(max_pages)
+    with zf.open(part) as f:
+        lines = reader.read(f)
+
+    headers_footers = []
+    for suffix in (_REL_HEADER, _REL_FOOTER):
+        for target in ooxml.targets_of_type(zf, part, suffix):
+            try:
+                with zf.open(target) as f:
+                    text = "\n".join(line for line in _PartReader().read(f) if line.strip())
+            except (KeyError, ET.ParseError):
+                continue
+            if text and text not in headers_footers:
+                headers_footers.append(text)
+
+    return DocxText(
+        text="\n".join(lines),
+        pages_read=reader.pages,
+        truncated=reader.truncated,
+        headers_footers=headers_footers,
+        page_count=_saved_page_count(zf),
+    )
@@ -6,7 +6,7 @@ from typing import List
 from loguru import logger
 
 from ..dt import Node, File, Data
-from .utils import encode_binary
+from .utils import encode_binary, decode_binary
 
 
 class EmailExtractor:
@@ -72,8 +72,8 @@ class EmailExtractor:
                     payload = part.get_payload(decode=True)
                     if payload:
                         try:
-                            charset = part.get_content_charset() or 'utf-8'
-                            text_content = payload.decode(charset, errors='ignore')
+                            # 按 MIME 头声明的字符集解码，声明缺失或有误时自动探测
+                            text_content = decode_binary(payload, part.get_content_charset())
                             body_parts.append({
                                 'type': content_type,
                                 'content': text_content
@@ -85,8 +85,7 @@ class EmailExtractor:
             payload = msg.get_payload(decode=True)
             if payload:
                 try:
-                    charset = msg.get_content_charset() or 'utf-8'
-                    text_content = payload.decode(charset, errors='ignore')
+                    text_content = decode_binary(payload, msg.get_content_charset())
                     content_type = msg.get_content_type()
                     body_parts.append({
                         'type': content_type,
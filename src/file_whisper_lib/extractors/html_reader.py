@@ -0,0 +1,328 @@
+"""
+HTML 单次解析
+
+文档只解析一次，并在一次遍历中同时收集正文和 URL；
+解析器由环境变量 HTML_PARSER 选择，默认 lxml（比 html.parser 快数倍），未安装时回退到 html.parser。
+
+超大文档（HTML_STREAM_THRESHOLD）改用 stream_html：分块解码、增量分词，边解析边产出正文和 URL，
+不构建 DOM，额外内存与文档大小无关。
+
+内嵌的 data URI 图片由 scan_data_uris 直接在原始字节上匹配，不依赖标签（img、source、
+SVG image、CSS url() 都能找到），按需解码。
+"""
+import os
+import re
+import base64
+import binascii
+import codecs
+import hashlib
+from collections import Counter
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+from bs4 import BeautifulSoup, FeatureNotFound, NavigableString, Tag
+
+DEFAULT_PARSER = 'lxml'
+FALLBACK_PARSER = 'html.parser'
+
+# 各标签对应的 URL 属性（部分标签有多个 URL 来源）
+_URL_ATTRS = {
+    'a': ('href',),
+    'img': ('src', 'srcset'),
+    'script': ('src', 'data-main'),
+    'link': ('href',),
+    'iframe': ('src',),
+    'video': ('src', 'poster'),
+    'audio': ('src',),
+    'track': ('src',),
+    'form': ('action',),
+    'input': ('src',),  # 针对 type="image" 的情况
+    'object': ('data',),
+    'embed': ('src',),
+    # SVG <image> 可能使用 xlink:href 或 href 属性
+    'image': ('xlink:href', 'href'),
+}
+
+# CSS 中的 url(...)，可处理单引号、双引号或不带引号的情况
+_STYLE_URL = re.compile(r'url\((?:\'|"|)([^\'")]+)(?:\'|"|)\)')
+# <meta http-equiv="refresh" content="5;url=redirect_url">
+_REFRESH_URL = re.compile(r'url=([^;]+)', flags=re.IGNORECASE)
+
+# data:image/<子类型>[;参数=值...];base64,<数据>，base64 数据中允许换行
+_DATA_URI = re.compile(
+    rb'data:(image/[a-z0-9.+-]+)(?:;[a-z0-9_.-]+=[^;,\s"\'()<>]*)*;base64,((?:[A-Za-z0-9+/]|\r?\n)+=*)',
+    re.IGNORECASE,
+)
+
+# 文件头 -> libmagic 给出的 mime，用于校验 data URI 声明的类型
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+_MIME_ALIASES = {"image/jpg": "image/jpeg", "image/pjpeg": "image/jpeg"}
+
+# 与 BeautifulSoup 一致，这些标签内的字符串不计入正文
+_NON_TEXT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+# rt/rp 的结束标签可以省略：下一个 rt/rp 开始或 </ruby> 时隐式结束
+_RUBY_ANNOTATION_TAGS = ('rt', 'rp')
+
+# 流式解析每次解码、分词的字节数
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+_unavailable_parsers = set()
+
+
+@dataclass
+class HtmlContent:
+    text: str = ""
+    urls: List[str] = field(default_factory=list)
+
+
+def parser_name() -> str:
+    return os.environ.get('HTML_PARSER', DEFAULT_PARSER)
+
+
+def parse(html: str) -> BeautifulSoup:
+    """按 HTML_PARSER 解析，解析器未安装时回退到 html.parser（只告警一次）"""
+    parser = parser_name()
+    if parser not in _unavailable_parsers:
+        try:
+            return BeautifulSoup(html, parser)
+        except FeatureNotFound:
+            _unavailable_parsers.add(parser)
+            logger.warning(f"HTML parser {parser} is not available, falling back to {FALLBACK_PARSER}")
+    return BeautifulSoup(html, FALLBACK_PARSER)
+
+
+def _add_style_urls(css: str, urls: Dict[str, None]):
+    for m in _STYLE_URL.findall(css):
+        if m:
+            urls[m.strip()] = None
+
+
+def _visit_tag(name: str, attrs: dict, urls: Dict[str, None]):
+    # 1. 基础标签属性
+    for attr in _URL_ATTRS.get(name, ()):
+        value = attrs.get(attr)
+        if not value or not isinstance(value, str):
+            continue
+        if attr == 'srcset':
+            # srcset 可能形如 "img1.jpg 1x, img2.jpg 2x" 分割后提取 URL
+            for part in value.split(','):
+                candidate = part.strip().split(' ')[0].strip()
+                if candidate:
+                    urls[candidate] = None
+        else:
+            urls[value.strip()] = None
+
+    # 2. 元数据：开放图谱 og:image、页面刷新
+    if name == 'meta':
+        content = attrs.get('content')
+        if content and attrs.get('property', '').strip().lower() == 'og:image':
+            urls[content.strip()] = None
+        if attrs.get('http-equiv', '').lower() == 'refresh':
+            m = _REFRESH_URL.search(content or '')
+            if m:
+                urls[m.group(1).strip()] = None
+
+    # 3. 懒加载
+    data_src = attrs.get('data-src')
+    if data_src:
+        urls[data_src.strip()] = None
+
+    # 4. 内联样式（<style> 标签内的 CSS 由调用方处理）
+    style = attrs.get('style')
+    if style:
+        _add_style_urls(style, urls)
+
+
+def read_html(html: str) -> HtmlContent:
+    """一次解析、一次遍历，正文与 soup.get_text(separator=' ', strip=True) 一致"""
+    soup = parse(html)
+    text_types = soup.interesting_string_types
+    if isinstance(text_types, type):
+        text_types = (text_types,)
+
+    texts = []
+    urls: Dict[str, None] = {}
+    for element in soup.descendants:
+        if isinstance(element, NavigableString):
+            # 与 get_text 相同，只取正文字符串（不含注释、脚本和样式）
+            if type(element) in text_types:
+                stripped = element.strip()
+                if stripped:
+                    texts.append(stripped)
+        elif isinstance(element, Tag):
+            _visit_tag(element.name, element.attrs, urls)
+            if element.name == 'style' and element.string:
+                _add_style_urls(element.string, urls)
+
+    return HtmlContent(text=' '.join(texts), urls=list(urls))
+
+
+def stream_threshold() -> int:
+    """达到该字节数的 HTML 使用流式解析，0 表示不使用"""
+    return int(os.environ.get('HTML_STREAM_THRESHOLD', str(8 * 1024 * 1024)))
+
+
+def stream_text_chunk() -> int:
+    """流式解析时每个 TEXT 节点的最大字符数"""
+    return int(os.environ.get('HTML_STREAM_TEXT_CHUNK', str(1024 * 1024)))
+
+
+class _StreamParser(HTMLParser):
+    """增量分词，结果暂存在队列中，由 stream_html 在每块之后取走"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.texts: List[str] = []
+        self.text_size = 0
+        self.urls: List[str] = []
+        self._seen_urls = set()
+        self._open = Counter()
+        # 两个标记之间的文本可能分多次到达（跨块），遇到下一个标记时再合并处理
+        self._pending: List[str] = []
+
+    def _flush_data(self):
+        if not self._pending:
+            return
+        data = ''.join(self._pending)
+        self._pending.clear()
+        if self._open['style']:
+            found: Dict[str, None] = {}
+            _add_style_urls(data, found)
+            self._add_urls(found)
+        if any(self._open.values()):
+            return
+        stripped = data.strip()
+        if stripped:
+            self.texts.append(stripped)
+            self.text_size += len(stripped) + 1
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        # 与 BeautifulSoup 一致：无值属性为空字符串，重复属性取最后一个
+        found: Dict[str, None] = {}
+        _visit_tag(tag, {k: v or '' for k, v in attrs}, found)
+        self._add_urls(found)
+        if tag in _RUBY_ANNOTATION_TAGS:
+            self._close_ruby_annotations()
+        if tag in _NON_TEXT_TAGS:
+            self._open[tag] += 1
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        if tag == 'ruby':
+            self._close_ruby_annotations()
+        elif self._open[tag] > 0:
+            self._open[tag] -= 1
+
+    def _close_ruby_annotations(self):
+        for tag in _RUBY_ANNOTATION_TAGS:
+            self._open[tag] = 0
+
+    def handle_data(self, data):
+        self._pending.append(data)
+
+    def handle_comment(self, data):
+        self._flush_data()
+
+    def handle_decl(self, decl):
+        self._flush_data()
+
+    def handle_pi(self, data):
+        self._flush_data()
+
+    def unknown_decl(self, data):
+        self._flush_data()
+
+    def close(self):
+        super().close()
+        self._flush_data()
+
+    def _add_urls(self, found: Dict[str, None]):
+        for url in found:
+            if url not in self._seen_urls:
+                self._seen_urls.add(url)
+                self.urls.append(url)
+
+    def drain(self, text_chunk: int) -> Iterator[Tuple[str, str]]:
+        """取走已解析的 URL，以及够一块（text_chunk 为 0 时全部）的正文"""
+        for url in self.urls:
+            yield "URL", url
+        self.urls.clear()
+        if self.texts and self.text_size >= text_chunk:
+            yield "TEXT", ' '.join(self.texts)
+            self.texts.clear()
+            self.text_size = 0
+
+
+def stream_html(data: bytes, encoding: str = 'utf-8',
+                chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Tuple[str, str]]:
+    """
+    分块解码并增量解析 HTML，依次产出 ("URL", url)、("TEXT", 正文块)。
+    正文按 HTML_STREAM_TEXT_CHUNK 分块，规则与 read_html 相同；无法解码的字节替换为 U+FFFD。
+    """
+    text_chunk = max(1, stream_text_chunk())
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    parser = _StreamParser()
+    view = memoryview(data)
+    for offset in range(0, len(view), chunk_size):
+        parser.feed(decoder.decode(view[offset:offset + chunk_size]))
+        yield from parser.drain(text_chunk)
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    yield from parser.drain(0)
+
+
+def data_uri_max_size() -> int:
+    """单个 data URI 图片解码后的最大字节数，超过的不解码"""
+    return int(os.environ.get('HTML_DATA_URI_MAX_SIZE', str(16 * 1024 * 1024)))
+
+
+@dataclass
+class DataUriImage:
+    mime: str
+    payload: bytes
+
+    def decode(self) -> Optional[bytes]:
+        """解码 base64 数据，无效或为空时返回 None"""
+        try:
+            return base64.b64decode(self.payload) or None
+        except (binascii.Error, ValueError):
+            logger.warning(f"Invalid base64 data URI ({self.mime})")
+            return None
+
+
+def sniff_image_mime(content: bytes, declared: str) -> str:
+    """文件头与声明的类型一致时返回规范 mime（与 libmagic 相同），否则返回空字符串"""
+    declared = _MIME_ALIASES.get(declared, declared)
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return declared if declared == "image/webp" else ""
+    for signature, mime in _IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return mime if mime == declared else ""
+    return ""
+
+
+def scan_data_uris(data: bytes) -> Iterator[DataUriImage]:
+    """
+    在原始字节上查找 base64 编码的 data:image URI。按编码后数据的 sha256 去重，
+    超过 HTML_DATA_URI_MAX_SIZE 的跳过；图片不在这里解码，由调用方按需调用 decode()。
+    """
+    max_size = data_uri_max_size()
+    seen = set()
+    for m in _DATA_URI.finditer(data):
+        payload = m.group(2)
+        if len(payload) // 4 * 3 > max_size:
+            logger.warning(f"Skipping data URI image of about {len(payload) // 4 * 3} bytes")
+            continue
+        digest = hashlib.sha256(payload).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        yield DataUriImage(mime=m.group(1).decode('ascii').lower(), payload=payload)
@@ -0,0 +1,338 @@
+"""
+LibreOffice 常驻转换进程池
+
+每个 worker 是一个使用独立用户配置目录的 headless soffice，通过本地 socket（UNO）接收
+转换任务，避免每个文档都重新启动 LibreOffice，多个 worker 之间也不会争用同一个配置目录。
+
+- worker 第一次被取出时才启动，完成 LIBREOFFICE_MAX_JOBS 次转换后重启
+- 每次取出时检查进程和 UNO 连接是否存活，不健康的 worker 先重启再使用
+- 正在执行和排队的任务总数超过 池大小 + LIBREOFFICE_QUEUE_SIZE 时直接拒绝（QueueFullError）
+
+python-uno 不可用或找不到 soffice 时 get_pool() 返回 None，调用方退回到每次启动 soffice 的方式。
+uno 在第一次调用 get_pool() 时才导入，导入本模块不会改动 sys.path。
+"""
+import os
+import sys
+import time
+import queue
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from loguru import logger
+
+
+def _import_uno():
+    """
+    优先使用当前解释器中的 uno；Docker 镜像里 python3-uno 装在系统 Python 的 dist-packages，
+    与镜像中的 CPython 3.11 ABI 相同，导入时临时把 LIBREOFFICE_PYTHONPATH 追加到 sys.path 末尾，
+    导入完成后立即移除，进程中之后的 import 不会解析到系统 Python 的包。
+    """
+    try:
+        import uno
+        return uno
+    except ImportError:
+        pass
+    extra = os.environ.get('LIBREOFFICE_PYTHONPATH', '/usr/lib/python3/dist-packages:/usr/lib/libreoffice/program')
+    added = [p for p in extra.split(os.pathsep) if p and os.path.isdir(p) and p not in sys.path]
+    sys.path.extend(added)
+    try:
+        import uno
+        return uno
+    except ImportError:
+        return None
+    finally:
+        for p in added:
+            if p in sys.path:
+                sys.path.remove(p)
+
+
+uno = None
+_uno_loaded = False
+_uno_lock = threading.Lock()
+
+
+def _load_uno() -> bool:
+    """第一次调用时导入 uno，返回是否可用"""
+    global uno, _uno_loaded
+    if not _uno_loaded:
+        with _uno_lock:
+            if not _uno_loaded:
+                uno = _import_uno()
+                _uno_loaded = True
+                if uno is None:
+                    logger.debug("python-uno not available, LibreOffice worker pool disabled")
+    return uno is not None
+
+
+class LibreOfficeError(RuntimeError):
+    pass
+
+
+class QueueFullError(LibreOfficeError):
+    """排队的转换任务已满"""
+
+
+def find_soffice() -> Optional[str]:
+    for cmd in ('soffice', 'libreoffice'):
+        path = shutil.which(cmd)
+        if path:
+            return path
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _property(name: str, value):
+    prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class LibreOfficeWorker:
+    """一个常驻的 headless soffice 进程及其 UNO 连接"""
+
+    def __init__(self, index: int, base_dir: str, soffice: str, start_timeout: float = None,
+                 health_timeout: float = None):
+        if start_timeout is None:
+            start_timeout = float(os.environ.get('LIBREOFFICE_START_TIMEOUT', '30'))
+        if health_timeout is None:
+            health_timeout = float(os.environ.get('LIBREOFFICE_HEALTH_TIMEOUT', '5'))
+        self.index = index
+        self.soffice = soffice
+        self.start_timeout = start_timeout
+        self.health_timeout = health_timeout
+        self.profile_dir = os.path.join(base_dir, f"profile_{index}")
+        self.jobs = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop = None
+
+    @property
+    def started(self) -> bool:
+        return self._process is not None
+
+    def start(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        port = _free_port()
+        self._process = subprocess.Popen([
+            self.soffice, '--headless', '--invisible', '--nologo', '--nodefault',
+            '--norestore', '--nolockcheck',
+            f'-env:UserInstallation={Path(self.profile_dir).as_uri()}',
+            f'--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext',
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.jobs = 0
+
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            try:
+                ctx = resolver.resolve(f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext")
+                self._desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+                break
+            except Exception as e:
+                if self._process.poll() is not None or time.monotonic() >= deadline:
+                    self.stop()
+                    raise LibreOfficeError(f"LibreOffice worker {self.index} failed to start: {e}")
+                time.sleep(0.2)
+        logger.info(f"LibreOffice worker {self.index} started (pid={self._process.pid}, port={port})")
+
+    def _watchdog(self, timeout: float) -> threading.Timer:
+        """超时后杀掉 soffice，阻塞中的 UNO 调用随之失败；调用方结束后 cancel()"""
+        watchdog = threading.Timer(timeout, self.stop)
+        watchdog.daemon = True
+        watchdog.start()
+        return watchdog
+
+    def healthy(self) -> bool:
+        """进程存活且 UNO 调用在 health_timeout 内返回；卡死的 soffice 会被杀掉"""
+        if self._process is None or self._process.poll() is not None:
+            return False
+        desktop = self._desktop
+        watchdog = self._watchdog(self.health_timeout)
+        try:
+            desktop.getFrames()
+            return self._process is not None
+        except Exception:
+            return False
+        finally:
+            watchdog.cancel()
+
+    def convert(self, src_path: str, dst_path: str, filter_name: str, timeout: float):
+        """转换一个文档；超时时杀掉 soffice，阻塞中的 UNO 调用随之失败"""
+        watchdog = self._watchdog(timeout)
+        document = None
+        try:
+            document = self._desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(src_path)), "_blank", 0,
+                (_property("Hidden", True), _property("ReadOnly", True)))
+            if document is None:
+                raise LibreOfficeError(f"LibreOffice could not load {src_path}")
+            document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(dst_path)),
+                                (_property("FilterName", filter_name), _property("Overwrite", True)))
+        except LibreOfficeError:
+            raise
+        except Exception as e:
+            raise LibreOfficeError(f"LibreOffice conversion failed: {e}")
+        finally:
+            watchdog.cancel()
+            self.jobs += 1
+            if document is not None:
+                try:
+                    document.close(True)
+                except Exception:
+                    pass
+
+    def stop(self):
+        process, self._process = self._process, None
+        self._desktop = None
+        if process is None:
+            return
+        try:
+            process.kill()
+            process.wait(timeout=10)
+        except Exception as e:
+            logger.warning(f"Failed to stop LibreOffice worker {self.index}: {e}")
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+class LibreOfficePool:
+    """固定数量的 LibreOffice worker，转换任务按空闲 worker 分配"""
+
+    def __init__(self, size: int, max_jobs: int = None, queue_size: int = None,
+                 worker_factory: Callable[[int], LibreOfficeWorker] = None):
+        if max_jobs is None:
+            max_jobs = int(os.environ.get('LIBREOFFICE_MAX_JOBS', '200'))
+        if queue_size is None:
+            queue_size = int(os.environ.get('LIBREOFFICE_QUEUE_SIZE', '16'))
+        if worker_factory is None:
+            soffice = find_soffice()
+            base_dir = tempfile.mkdtemp(prefix="file_whisper_lo_")
+            worker_factory = lambda index: LibreOfficeWorker(index, base_dir, soffice)
+
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.queue_size = max(0, queue_size)
+        self._workers = [worker_factory(i) for i in range(self.size)]
+        # LIFO：优先复用刚用过的 worker，其余 worker 空闲时不必启动
+        self._idle: "queue.LifoQueue[LibreOfficeWorker]" = queue.LifoQueue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        # 执行中 + 排队中的任务数上限
+        self._slots = threading.BoundedSemaphore(self.size + self.queue_size)
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {"jobs": 0, "failures": 0, "rejected": 0, "restarts": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _prepare(self, worker: LibreOfficeWorker):
+        if not worker.started:
+            worker.start()
+        elif worker.jobs >= self.max_jobs:
+            logger.info(f"Recycling LibreOffice worker {worker.index} after {worker.jobs} jobs")
+            self._count("restarts")
+            worker.restart()
+        elif not worker.healthy():
+            logger.warning(f"LibreOffice worker {worker.index} is unhealthy, restarting")
+            self._count("restarts")
+            worker.restart()
+
+    def convert(self, src_path: str, dst_path: str, filter_name: str, timeout: float = None):
+        if timeout is None:
+            timeout = float(os.environ.get('LIBREOFFICE_CONVERT_TIMEOUT', '30'))
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise QueueFullError(f"LibreOffice conversion queue is full ({self.queue_size} waiting)")
+        try:
+            try:
+                worker = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise LibreOfficeError(f"No LibreOffice worker available after {timeout}s")
+            try:
+                self._prepare(worker)
+                worker.convert(src_path, dst_path, filter_name, timeout)
+                self._count("jobs")
+            except Exception:
+                self._count("failures")
+                # 出错后进程状态不可信，下次取出时重新启动
+                worker.stop()
+                raise
+            finally:
+                self._idle.put(worker)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "started": sum(1 for w in self._workers if w.started),
+        })
+        return stats
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+
+
+_pool: Optional[LibreOfficePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[LibreOfficePool]:
+    """进程内共享的转换池；LIBREOFFICE_POOL_SIZE=0、python-uno 或 soffice 不可用时返回 None"""
+    global _pool
+    if _pool is None:
+        size = int(os.environ.get('LIBREOFFICE_POOL_SIZE', '2'))
+        if size <= 0 or find_soffice() is None or not _load_uno():
+            return None
+        with _pool_lock:
+            if _pool is None:
+                _pool = LibreOfficePool(size)
+                logger.info(f"LibreOffice worker pool created with {size} workers")
+    return _pool
+
+
+def reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+
+def _subprocess_profile_dir() -> str:
+    """每个线程固定一个配置目录，并发的一次性 soffice 不会互相阻塞"""
+    path = os.path.join(tempfile.gettempdir(), f"file_whisper_lo_{os.getpid()}_{threading.get_ident()}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def convert_with_subprocess(src_path: str, output_dir: str, target: str, timeout: float = 30) -> subprocess.CompletedProcess:
+    """不使用常驻池时，每次启动一个 soffice 完成转换"""
+    commands = ['libreoffice', 'soffice']
+    for cmd in commands:
+        try:
+            return subprocess.run([
+                cmd, '--headless', f'-env:UserInstallation={Path(_subprocess_profile_dir()).as_uri()}',
+                '--convert-to', target, '--outdir', output_dir, src_path
+            ], capture_output=True, text=True, timeout=timeout)
+        except FileNotFoundError:
+            if cmd == commands[-1]:  # Last command failed
+                raise
+    raise FileNotFoundError("LibreOffice not found")
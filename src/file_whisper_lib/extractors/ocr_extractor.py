@@ -21,6 +21,8 @@ except ImportError:
     pass
 
 from ..dt import Node, File, Data
+from ..metrics import OCR_TEXT_REGIONS
+from ..tracing import span
 from .utils import encode_binary
 
 # 全局实例计数器，用于在同一进程中分配不同的GPU/CPU
@@ -150,7 +152,10 @@ class OCRExtractor:
             # 使用EasyOCR的readtext方法处理图像文件
             device_type = "GPU" if self.use_gpu else "CPU"
             logger.debug(f"Running OCR text recognition using {device_type} (Instance: {self.instance_id})...")
-            result = self.easy_ocr.readtext(temp_file_path)
+            with span("ocr_readtext", device=device_type, size=len(image_data)):
+                result = self.easy_ocr.readtext(temp_file_path)
+            # 每张图片检测出的文本区域数，即一次调用中识别模型实际处理的批量
+            OCR_TEXT_REGIONS.observe(len(result or []))
             
             if result:
                 text_results = []
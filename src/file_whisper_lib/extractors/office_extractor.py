@@ -0,0 +1,131 @@
+"""
+电子表格和演示文稿处理模块（XLSX、PPTX、ODT、ODS、ODP）
+"""
+import os
+import zipfile
+import traceback
+from io import BytesIO
+from typing import List
+from loguru import logger
+
+from ..dt import Node, File, Data
+from ..tracing import span
+from ..types import Types
+from .utils import encode_binary, decrypt_office_document
+from . import office_reader
+
+OOXML_TYPES = (Types.XLSX, Types.PPTX)
+
+_ODF_KINDS = {
+    Types.ODT: office_reader.ODF_TEXT,
+    Types.ODS: office_reader.ODF_SPREADSHEET,
+    Types.ODP: office_reader.ODF_PRESENTATION,
+}
+
+
+class OfficeExtractor:
+
+    @staticmethod
+    def _read(zf: zipfile.ZipFile, node: Node) -> office_reader.OfficeText:
+        if node.type == Types.XLSX:
+            return office_reader.read_xlsx(zf, node.sheet_max_rows)
+        if node.type == Types.PPTX:
+            return office_reader.read_pptx(zf, node.presentation_max_slides)
+        kind = _ODF_KINDS[node.type]
+        if kind == office_reader.ODF_TEXT:
+            limit = node.word_max_pages
+        elif kind == office_reader.ODF_SPREADSHEET:
+            limit = node.sheet_max_rows
+        else:
+            limit = node.presentation_max_slides
+        return office_reader.read_odf(zf, kind, limit)
+
+    @staticmethod
+    def _record_meta(node: Node, doc: office_reader.OfficeText):
+        node.meta.map_bool["office_truncated"] = doc.truncated
+        if node.type in (Types.XLSX, Types.ODS):
+            node.meta.map_number["sheet_rows_read"] = doc.items_read
+            if doc.item_count:
+                node.meta.map_number["sheet_count"] = doc.item_count
+        elif node.type in (Types.PPTX, Types.ODP):
+            node.meta.map_number["presentation_slides_read"] = doc.items_read
+            if doc.item_count:
+                node.meta.map_number["presentation_slide_count"] = doc.item_count
+
+    @staticmethod
+    def _extract_zip_content(content: bytes, node: Node) -> List[Node]:
+        """文本和图片共用一个 ZipFile，只读取需要的成员"""
+        nodes = []
+
+        with zipfile.ZipFile(BytesIO(content), 'r') as zf:
+            if node.type in _ODF_KINDS and office_reader.is_odf_encrypted(zf):
+                # ODF 使用包内逐成员加密，msoffcrypto 不支持
+                node.meta.map_bool["is_encrypted"] = True
+                logger.warning("Encrypted ODF documents are not supported")
+                return nodes
+
+            with span("office_parse", format=node.type.name):
+                doc = OfficeExtractor._read(zf, node)
+            OfficeExtractor._record_meta(node, doc)
+
+            if doc.text.strip():
+                t_node = Node()
+                t_node.id = 0
+                t_node.content = Data(type="TEXT", content=encode_binary(doc.text))
+                t_node.prev = node
+                t_node.inherit_limits(node)
+                nodes.append(t_node)
+
+            for name in doc.media:
+                try:
+                    media_content = zf.read(name)
+                except Exception as e:
+                    logger.warning(f"Failed to extract media file {name}: {e}")
+                    continue
+                t_node = Node()
+                file_name = os.path.basename(name)
+                t_node.content = File(path=file_name, name=file_name, content=media_content)
+                t_node.prev = node
+                t_node.inherit_limits(node)
+                nodes.append(t_node)
+
+        return nodes
+
+    @staticmethod
+    def extract_office_file(node: Node) -> List[Node]:
+        node.meta.map_bool["is_encrypted"] = False
+        nodes = []
+
+        if isinstance(node.content, File):
+            file = node.content
+        elif isinstance(node.content, Data):
+            logger.error("extract_office_file enter Data type")
+            return nodes
+        else:
+            return nodes
+
+        try:
+            content = file.content
+
+            # 加密的 XLSX/PPTX 与 DOCX 一样是 OLE 容器（EncryptedPackage）而不是 ZIP
+            if not zipfile.is_zipfile(BytesIO(content)):
+                if node.type not in OOXML_TYPES:
+                    logger.warning(f"{node.type.name} file is not a ZIP package")
+                    return nodes
+                node.meta.map_bool["is_encrypted"] = True
+                decrypted = None
+                if node.passwords:
+                    with span("office_decrypt", candidates=len(node.passwords)):
+                        decrypted = decrypt_office_document(content, node.passwords)
+                if decrypted is None:
+                    logger.warning("File appears to be encrypted but no valid password provided")
+                    return nodes
+                content = decrypted
+
+            nodes = OfficeExtractor._extract_zip_content(content, node)
+
+        except Exception as e:
+            logger.error(f"Failed to extract {node.type.name} file: {e}")
+            traceback.print_exc()
+
+        return nodes
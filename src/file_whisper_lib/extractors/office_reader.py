@@ -0,0 +1,466 @@
+"""
+XLSX / PPTX / ODF 流式文本读取
+
+只打开需要的 ZIP 成员并用 iterparse 逐个元素读取，处理完的元素立即释放，达到上限后停止：
+- XLSX：按 workbook.xml 中的顺序读取工作表，总行数不超过 max_rows；共享字符串表
+  （sharedStrings.xml）在读完工作表之后再流式读取一遍，只保留用到的条目
+- PPTX：按 presentation.xml 中 sldIdLst 的顺序读取幻灯片，最多 max_slides 张
+- ODT/ODS/ODP：读取 content.xml，分别按段落、表格行、draw:page 计数
+
+图片只收集已读取部分引用到的成员（工作表的 drawing、幻灯片的 .rels、ODF 的 draw:image）。
+"""
+import posixpath
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Dict, IO, List, Set, Tuple, Union
+from zipfile import ZipFile
+
+from . import ooxml
+from .ooxml import attr, local_name
+from .docx_reader import PARAGRAPHS_PER_PAGE
+
+DEFAULT_WORKBOOK_PART = "xl/workbook.xml"
+DEFAULT_PRESENTATION_PART = "ppt/presentation.xml"
+ODF_CONTENT_PART = "content.xml"
+ODF_MANIFEST_PART = "META-INF/manifest.xml"
+
+_REL_WORKSHEET = "/worksheet"
+_REL_SHARED_STRINGS = "/sharedStrings"
+_REL_DRAWING = "/drawing"
+_REL_IMAGE = "/image"
+
+# 重复单元格（ODF 的 number-columns-repeated、XLSX 中跳过的列）最多展开的数量
+MAX_REPEATED_CELLS = 256
+
+ODF_TEXT = "text"
+ODF_SPREADSHEET = "spreadsheet"
+ODF_PRESENTATION = "presentation"
+
+
+@dataclass
+class OfficeText:
+    text: str
+    # 实际读取的条目数：工作表行数、幻灯片数或段落数
+    items_read: int = 0
+    # 文档中的工作表数或幻灯片数，提前停止且无法得知时为 0
+    item_count: int = 0
+    # 是否因为上限提前停止
+    truncated: bool = False
+    # 已读取部分引用的图片在 ZIP 中的路径，已去重
+    media: List[str] = field(default_factory=list)
+
+
+class _StopReading(Exception):
+    pass
+
+
+def _append_unique(items: List[str], names: Set[str], value: str):
+    if value in names and value not in items:
+        items.append(value)
+
+
+def _rich_text(elem) -> str:
+    """<si>/<is> 中的文本：直接的 <t> 和富文本 <r><t>，跳过注音 <rPh>"""
+    parts = []
+    for child in elem:
+        tag = local_name(child.tag)
+        if tag == "t":
+            parts.append(child.text or "")
+        elif tag == "r":
+            for t in child:
+                if local_name(t.tag) == "t":
+                    parts.append(t.text or "")
+    return "".join(parts)
+
+
+def _column_index(ref: str) -> int:
+    """单元格引用的列号（从 0 开始），如 C7 -> 2"""
+    index = 0
+    for ch in ref:
+        if "A" <= ch <= "Z":
+            index = index * 26 + ord(ch) - ord("A") + 1
+        else:
+            break
+    return index - 1
+
+
+# ---------------------------------------------------------------- XLSX
+
+# 行中的单元格值，int 为待解析的共享字符串序号
+_Cell = Union[int, str]
+
+
+def _cell_value(elem, needed: Set[int]) -> _Cell:
+    cell_type = elem.get("t")
+    if cell_type == "inlineStr":
+        for child in elem:
+            if local_name(child.tag) == "is":
+                return _rich_text(child)
+        return ""
+    value = None
+    for child in elem:
+        if local_name(child.tag) == "v":
+            value = child.text
+            break
+    if value is None:
+        return ""
+    if cell_type == "s":
+        try:
+            index = int(value)
+        except ValueError:
+            return ""
+        needed.add(index)
+        return index
+    if cell_type == "b":
+        return "TRUE" if value.strip() == "1" else "FALSE"
+    return value
+
+
+def _read_sheet_rows(stream: IO[bytes], limit: int, needed: Set[int]) -> Tuple[List[List[_Cell]], bool]:
+    """读取一个工作表的非空行，返回 (行列表, 是否还有未读取的行)"""
+    rows: List[List[_Cell]] = []
+    row: List[_Cell] = []
+    sheet_data = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = local_name(elem.tag)
+        if event == "start":
+            if tag == "sheetData":
+                sheet_data = elem
+            elif tag == "row":
+                row = []
+            continue
+        if tag == "c":
+            ref = elem.get("r")
+            if ref:
+                gap = _column_index(ref) - len(row)
+                row.extend([""] * min(max(gap, 0), MAX_REPEATED_CELLS))
+            row.append(_cell_value(elem, needed))
+        elif tag == "row":
+            while row and row[-1] == "":
+                row.pop()
+            if row:
+                if len(rows) >= limit:
+                    return rows, True
+                rows.append(row)
+            # 已处理的行立即释放
+            if sheet_data is not None:
+                sheet_data.clear()
+    return rows, False
+
+
+def _read_shared_strings(zf: ZipFile, part: str, needed: Set[int]) -> Dict[int, str]:
+    """流式读取共享字符串表，只保留 needed 中的条目，读到最大序号后停止"""
+    strings: Dict[int, str] = {}
+    if not needed:
+        return strings
+    last = max(needed)
+    index = 0
+    root = None
+    with zf.open(part) as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if local_name(elem.tag) != "si":
+                continue
+            if index in needed:
+                strings[index] = _rich_text(elem)
+            index += 1
+            root.clear()
+            if index > last:
+                break
+    return strings
+
+
+def _drawing_images(zf: ZipFile, sheet_part: str) -> List[str]:
+    images = []
+    for drawing in ooxml.targets_of_type(zf, sheet_part, _REL_DRAWING):
+        images.extend(ooxml.targets_of_type(zf, drawing, _REL_IMAGE))
+    return images
+
+
+def read_xlsx(zf: ZipFile, max_rows: int = 1000) -> OfficeText:
+    """读取工作簿中的非空行（所有工作表合计最多 max_rows 行），每个工作表以表名开头，单元格用制表符分隔"""
+    names = set(zf.namelist())
+    workbook = ooxml.main_part(zf, DEFAULT_WORKBOOK_PART)
+    rels = ooxml.relationship_map(zf, workbook)
+
+    sheets = []
+    with zf.open(workbook) as f:
+        for _, elem in ET.iterparse(f):
+            if local_name(elem.tag) == "sheet":
+                rel = rels.get(ooxml.rel_id(elem) or "")
+                if rel is not None and rel.type.endswith(_REL_WORKSHEET) and rel.target in names:
+                    sheets.append((elem.get("name") or "", rel.target))
+
+    needed: Set[int] = set()
+    blocks = []
+    media: List[str] = []
+    rows_read = 0
+    truncated = False
+    for sheet_name, part in sheets:
+        # 额度用完后仍然打开下一个工作表，读到第一个非空行即可确定是否截断
+        with zf.open(part) as f:
+            rows, more = _read_sheet_rows(f, max_rows - rows_read, needed)
+        rows_read += len(rows)
+        truncated = truncated or more
+        if not rows and more:
+            break
+        blocks.append((sheet_name, rows))
+        for image in _drawing_images(zf, part):
+            _append_unique(media, names, image)
+        if more:
+            break
+
+    strings: Dict[int, str] = {}
+    for part in ooxml.targets_of_type(zf, workbook, _REL_SHARED_STRINGS):
+        if part in names:
+            strings = _read_shared_strings(zf, part, needed)
+            break
+
+    lines = []
+    for sheet_name, rows in blocks:
+        if lines:
+            lines.append("")
+        lines.append(sheet_name)
+        for row in rows:
+            lines.append("\t".join(strings.get(cell, "") if isinstance(cell, int) else cell for cell in row))
+
+    return OfficeText(
+        text="\n".join(lines),
+        items_read=rows_read,
+        item_count=len(sheets),
+        truncated=truncated,
+        media=media,
+    )
+
+
+# ---------------------------------------------------------------- PPTX
+
+def _read_slide(stream: IO[bytes]) -> List[str]:
+    """幻灯片中的非空段落（a:p），mc:Fallback 中的旧格式副本跳过"""
+    lines = []
+    skip_depth = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = local_name(elem.tag)
+        if tag == "Fallback":
+            skip_depth += 1 if event == "start" else -1
+            continue
+        if event == "start" or skip_depth or tag != "p":
+            continue
+        parts = []
+        for child in elem:
+            child_tag = local_name(child.tag)
+            if child_tag in ("r", "fld"):
+                for t in child:
+                    if local_name(t.tag) == "t":
+                        parts.append(t.text or "")
+            elif child_tag == "br":
+                parts.append("\n")
+        text = "".join(parts)
+        if text.strip():
+            lines.append(text)
+        elem.clear()
+    return lines
+
+
+def read_pptx(zf: ZipFile, max_slides: int = 50) -> OfficeText:
+    """按演示文稿中的顺序读取最多 max_slides 张幻灯片的文本，幻灯片之间空一行"""
+    names = set(zf.namelist())
+    presentation = ooxml.main_part(zf, DEFAULT_PRESENTATION_PART)
+    rels = ooxml.relationship_map(zf, presentation)
+
+    slides = []
+    with zf.open(presentation) as f:
+        for _, elem in ET.iterparse(f):
+            if local_name(elem.tag) == "sldId":
+                rel = rels.get(ooxml.rel_id(elem) or "")
+                if rel is not None and rel.target in names:
+                    slides.append(rel.target)
+
+    blocks = []
+    media: List[str] = []
+    for part in slides[:max_slides]:
+        with zf.open(part) as f:
+            lines = _read_slide(f)
+        if lines:
+            blocks.append("\n".join(lines))
+        for image in ooxml.targets_of_type(zf, part, _REL_IMAGE):
+            _append_unique(media, names, image)
+
+    return OfficeText(
+        text="\n\n".join(blocks),
+        items_read=min(len(slides), max_slides),
+        item_count=len(slides),
+        truncated=len(slides) > max_slides,
+        media=media,
+    )
+
+
+# ---------------------------------------------------------------- ODF
+
+def is_odf_encrypted(zf: ZipFile) -> bool:
+    """manifest.xml 中 content.xml 带有 encryption-data 时文档已加密"""
+    try:
+        with zf.open(ODF_MANIFEST_PART) as f:
+            for _, elem in ET.iterparse(f):
+                if local_name(elem.tag) == "encryption-data":
+                    return True
+    except (KeyError, ET.ParseError):
+        pass
+    return False
+
+
+def _odf_text(elem) -> str:
+    """段落内的文本，text:s / text:tab / text:line-break 还原为空白"""
+    parts = [elem.text or ""]
+    for child in elem:
+        tag = local_name(child.tag)
+        if tag == "s":
+            count = attr(child, "c")
+            parts.append(" " * (int(count) if count and count.isdigit() else 1))
+        elif tag == "tab":
+            parts.append("\t")
+        elif tag == "line-break":
+            parts.append("\n")
+        else:
+            parts.append(_odf_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _repeat(elem, name: str) -> int:
+    value = attr(elem, name)
+    return int(value) if value and value.isdigit() else 1
+
+
+class _OdfReader:
+    """读取 content.xml；kind 决定 limit 的含义：段落数、表格行数或幻灯片数"""
+
+    def __init__(self, kind: str, limit: int, names: Set[str]):
+        self.kind = kind
+        self.limit = limit
+        self.names = names
+        self.lines: List[str] = []
+        self.paragraphs = 0
+        self.rows = 0
+        self.tables = 0
+        self.slides = 0
+        self.truncated = False
+        self.media: List[str] = []
+        self._cells: List[List[str]] = []
+        self._rows: List[List[str]] = []
+
+    def read(self, stream: IO[bytes]):
+        try:
+            for event, elem in ET.iterparse(stream, events=("start", "end")):
+                self._handle(event, elem)
+        except _StopReading:
+            self.truncated = True
+
+    def _emit(self, text: str, counter: str):
+        """counter 是本类型计入上限的条目，已达上限时停止读取"""
+        if self.kind == counter:
+            if self.items_read >= self.limit:
+                raise _StopReading()
+            if counter == ODF_TEXT:
+                self.paragraphs += 1
+            else:
+                self.rows += 1
+        self.lines.append(text)
+
+    @property
+    def items_read(self) -> int:
+        if self.kind == ODF_TEXT:
+            return self.paragraphs
+        if self.kind == ODF_SPREADSHEET:
+            return self.rows
+        return self.slides
+
+    def _handle(self, event: str, elem):
+        tag = local_name(elem.tag)
+
+        if event == "start":
+            if tag == "table" and not self._rows:
+                self.tables += 1
+                if self.kind == ODF_SPREADSHEET:
+                    if self.lines:
+                        self.lines.append("")
+                    self.lines.append(attr(elem, "name") or "")
+            elif tag == "page":
+                if self.kind == ODF_PRESENTATION:
+                    if self.slides >= self.limit:
+                        raise _StopReading()
+                    if self.lines:
+                        self.lines.append("")
+                self.slides += 1
+            elif tag == "table-row":
+                self._rows.append([])
+            elif tag in ("table-cell", "covered-table-cell"):
+                self._cells.append([])
+            return
+
+        if tag in ("p", "h"):
+            text = _odf_text(elem)
+            elem.clear()
+            if self._cells:
+                self._cells[-1].append(text)
+            elif self.kind == ODF_TEXT:
+                self._emit(text, ODF_TEXT)
+            elif text.strip():
+                self.lines.append(text)
+        elif tag in ("table-cell", "covered-table-cell"):
+            paragraphs = self._cells.pop() if self._cells else []
+            value = " ".join(p.strip() for p in paragraphs if p.strip())
+            if self._rows:
+                repeat = min(_repeat(elem, "number-columns-repeated"), MAX_REPEATED_CELLS)
+                self._rows[-1].extend([value] * repeat)
+        elif tag == "table-row":
+            cells = self._rows.pop() if self._rows else []
+            while cells and cells[-1] == "":
+                cells.pop()
+            repeat = _repeat(elem, "number-rows-repeated")
+            elem.clear()
+            if not cells:
+                return
+            text = "\t".join(cells)
+            if self._cells:
+                # 嵌套在单元格中的表格并入外层单元格
+                self._cells[-1].append(text)
+                return
+            counter = ODF_SPREADSHEET if self.kind == ODF_SPREADSHEET else ODF_TEXT
+            for _ in range(min(repeat, MAX_REPEATED_CELLS)):
+                self._emit(text, counter)
+        elif tag == "image":
+            href = attr(elem, "href") or ""
+            _append_unique(self.media, self.names, posixpath.normpath(href) if href else href)
+        elif tag == "page":
+            elem.clear()
+
+
+def read_odf(zf: ZipFile, kind: str, limit: int) -> OfficeText:
+    """
+    读取 ODF 文档的 content.xml。kind 为 ODF_TEXT 时 limit 是页数（按每页 PARAGRAPHS_PER_PAGE
+    个段落估算），ODF_SPREADSHEET 时是所有表格合计的行数，ODF_PRESENTATION 时是幻灯片数
+    """
+    if kind == ODF_TEXT:
+        limit = limit * PARAGRAPHS_PER_PAGE
+    reader = _OdfReader(kind, limit, set(zf.namelist()))
+    with zf.open(ODF_CONTENT_PART) as f:
+        reader.read(f)
+
+    item_count = 0
+    if not reader.truncated:
+        if kind == ODF_SPREADSHEET:
+            item_count = reader.tables
+        elif kind == ODF_PRESENTATION:
+            item_count = reader.slides
+
+    return OfficeText(
+        text="\n".join(reader.lines),
+        items_read=reader.items_read,
+        item_count=item_count,
+        truncated=reader.truncated,
+        media=reader.media,
+    )
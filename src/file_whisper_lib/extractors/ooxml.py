@@ -0,0 +1,87 @@
+"""
+OOXML 包（DOCX/XLSX/PPTX）公共辅助功能
+
+只读取需要的 ZIP 成员：通过 _rels/.rels 找到主部件，再通过部件自己的 .rels 找到
+工作表、幻灯片、页眉页脚、图片等关联部件。
+"""
+import posixpath
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from zipfile import ZipFile
+
+REL_OFFICE_DOCUMENT = "/officeDocument"
+
+
+@dataclass
+class Relationship:
+    id: str
+    type: str
+    # 部件在 ZIP 中的完整路径
+    target: str
+
+
+def local_name(tag: str) -> str:
+    """去掉命名空间，同时兼容 Transitional 和 Strict 两种命名空间"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def attr(elem, name: str) -> Optional[str]:
+    """按本地名读取属性，忽略命名空间前缀"""
+    for key, value in elem.attrib.items():
+        if local_name(key) == name:
+            return value
+    return None
+
+
+def rel_id(elem) -> Optional[str]:
+    """读取 r:id 属性；sldId 等元素同时带有无命名空间的 id，只认带命名空间的那个"""
+    for key, value in elem.attrib.items():
+        if key.startswith("{") and local_name(key) == "id":
+            return value
+    return None
+
+
+def rels_path_for(part: str) -> str:
+    """部件对应的 .rels 路径，如 word/document.xml -> word/_rels/document.xml.rels"""
+    return posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+
+
+def relationships(zf: ZipFile, part: str) -> List[Relationship]:
+    """读取部件的内部关系（外部链接忽略）；part 为空字符串时读取包级 _rels/.rels"""
+    path = rels_path_for(part) if part else "_rels/.rels"
+    base_dir = posixpath.dirname(part)
+    try:
+        with zf.open(path) as f:
+            root = ET.parse(f).getroot()
+    except (KeyError, ET.ParseError):
+        return []
+    result = []
+    for rel in root:
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target") or ""
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(base_dir, target))
+        result.append(Relationship(id=rel.get("Id") or "", type=rel.get("Type") or "", target=target))
+    return result
+
+
+def relationship_map(zf: ZipFile, part: str) -> Dict[str, Relationship]:
+    return {rel.id: rel for rel in relationships(zf, part)}
+
+
+def targets_of_type(zf: ZipFile, part: str, suffix: str) -> List[str]:
+    """部件关系中 Type 以 suffix 结尾的目标路径"""
+    return [rel.target for rel in relationships(zf, part) if rel.type.endswith(suffix)]
+
+
+def main_part(zf: ZipFile, default: str) -> str:
+    """包的主部件（word/document.xml、xl/workbook.xml、ppt/presentation.xml 等）"""
+    names = set(zf.namelist())
+    for target in targets_of_type(zf, "", REL_OFFICE_DOCUMENT):
+        if target in names:
+            return target
+    return default
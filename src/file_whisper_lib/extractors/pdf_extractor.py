@@ -1,17 +1,282 @@
 """
 PDF文档处理模块
 """
-from io import BytesIO
-from typing import List
+import os
+import hashlib
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Set
 from loguru import logger
 import fitz
 
 from ..dt import Node, File, Data
+from ..tracing import span
 from .utils import encode_binary
 
+# 页数达到该值才拆分到进程池并行处理
+DEFAULT_PARALLEL_MIN_PAGES = 20
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """进程内共享的 PDF 页面处理进程池，首次使用时创建"""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                size = int(os.environ.get('PDF_PROCESS_POOL_SIZE', str(min(4, os.cpu_count() or 1))))
+                # gRPC 服务是多线程的，fork 不安全，使用 spawn 启动工作进程
+                _process_pool = ProcessPoolExecutor(max_workers=max(1, size), mp_context=get_context("spawn"))
+                logger.info(f"PDF process pool started with {size} workers")
+    return _process_pool
+
+
+def _reset_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+@dataclass
+class RasterOptions:
+    """
+    扫描页检测与渲染参数。remaining 为剩余可渲染页数；
+    并行时工作进程拿到 remaining=0 的副本只做检测，预算由主进程按页码顺序统一分配。
+    """
+    dpi: int = 150
+    remaining: int = 10
+    text_threshold: int = 16
+    min_coverage: float = 0.5
+
+    @classmethod
+    def from_environment(cls) -> 'RasterOptions':
+        return cls(
+            dpi=int(os.environ.get('PDF_RASTER_DPI', '150')),
+            remaining=int(os.environ.get('PDF_RASTER_MAX_PAGES', '10')),
+            text_threshold=int(os.environ.get('PDF_SCAN_TEXT_THRESHOLD', '16')),
+            min_coverage=float(os.environ.get('PDF_SCAN_MIN_IMAGE_COVERAGE', '0.5')),
+        )
+
+
+def _is_scanned_page(page, text: str, has_images: bool, options: RasterOptions) -> bool:
+    """几乎没有文字且图片覆盖页面大部分面积的页视为扫描页"""
+    if not has_images or len(text.strip()) >= options.text_threshold:
+        return False
+    page_area = abs(page.rect)
+    if page_area <= 0:
+        return False
+    covered = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return covered / page_area >= options.min_coverage
+
+
+def _process_page(pdf, page_number: int, seen_xrefs: Set[int],
+                  raster: Optional[RasterOptions] = None) -> Dict[str, Any]:
+    """
+    提取单页的文本和图片。images 为 (xref, 图片字节) 列表，
+    同一 xref 只在第一次出现时提取，之后的出现字节为 None，只用于记录页码。
+    扫描页在预算内整页渲染为 PNG（raster），不再逐个提取其中的图片碎片。
+    """
+    page = pdf.load_page(page_number)
+    text = page.get_text()
+    page_images = page.get_images(full=True)
+    result = {"page": page_number, "text": text, "images": [], "scanned": False, "raster": None}
+
+    if raster is not None and _is_scanned_page(page, text, bool(page_images), raster):
+        result["scanned"] = True
+        if raster.remaining > 0:
+            raster.remaining -= 1
+            result["raster"] = page.get_pixmap(dpi=raster.dpi).tobytes("png")
+            return result
+
+    for img in page_images:
+        xref = img[0]
+        if xref in seen_xrefs:
+            result["images"].append((xref, None))
+            continue
+        seen_xrefs.add(xref)
+        base_image = pdf.extract_image(xref)
+        result["images"].append((xref, base_image["image"]))
+    return result
+
+
+def _dedupe_images(page_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    按 xref 和内容哈希合并文档内重复的图片（如每页都有的 logo），
+    返回按首次出现顺序排列的 {"name", "content", "xref", "pages"} 列表。
+    """
+    by_xref: Dict[int, Dict[str, Any]] = {}
+    by_hash: Dict[str, Dict[str, Any]] = {}
+    unique = []
+    for result in page_results:
+        page_number = result["page"] + 1
+        for img_index, (xref, image_bytes) in enumerate(result["images"]):
+            entry = by_xref.get(xref)
+            if entry is None and image_bytes is not None:
+                digest = hashlib.sha256(image_bytes).digest()
+                entry = by_hash.get(digest)
+                if entry is None:
+                    entry = {
+                        "name": f"page_{page_number}_image_{img_index + 1}.png",
+                        "content": image_bytes,
+                        "xref": xref,
+                        "pages": [],
+                    }
+                    by_hash[digest] = entry
+                    unique.append(entry)
+                by_xref[xref] = entry
+            if entry is None:
+                # 并行时 xref 在其他页范围首次出现，字节由该范围提供
+                continue
+            if page_number not in entry["pages"]:
+                entry["pages"].append(page_number)
+    return unique
+
+
+def _apply_rasters(page_results: List[Dict[str, Any]], rasters: Dict[int, bytes]):
+    """
+    把渲染结果放回按页码排序的 page_results，并丢弃这些页的图片碎片，与串行时的结果一致：
+    被丢弃的图片如果在同一页范围的后续页再次出现（当时字节为 None），字节补到第一次出现的位置。
+    """
+    dropped: Dict[int, bytes] = {}
+    for result in page_results:
+        if result["page"] in rasters:
+            result["raster"] = rasters[result["page"]]
+            for xref, image_bytes in result["images"]:
+                if image_bytes is not None:
+                    dropped[xref] = image_bytes
+            result["images"] = []
+        elif dropped:
+            result["images"] = [
+                (xref, dropped.pop(xref) if image_bytes is None and xref in dropped else image_bytes)
+                for xref, image_bytes in result["images"]
+            ]
+
+
+@contextmanager
+def _open_shared(shm_name: str, size: int, password: str) -> Iterator[fitz.Document]:
+    """从共享内存打开文档"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # fitz 直接使用共享内存的视图，不复制文档；关闭共享内存前必须先关闭文档并释放视图
+    view = shm.buf[:size]
+    try:
+        pdf = fitz.open(stream=view, filetype="pdf")
+        try:
+            if password:
+                pdf.authenticate(password)
+            yield pdf
+        finally:
+            pdf.close()
+            del pdf
+    finally:
+        view.release()
+        shm.close()
+
+
+def _extract_page_range(shm_name: str, size: int, password: str, start: int, end: int,
+                        raster: Optional[RasterOptions] = None) -> List[Dict[str, Any]]:
+    """进程池工作函数：从共享内存打开文档并处理 [start, end) 页"""
+    with _open_shared(shm_name, size, password) as pdf:
+        seen_xrefs: Set[int] = set()
+        return [_process_page(pdf, page_number, seen_xrefs, raster) for page_number in range(start, end)]
+
+
+def _render_pages(shm_name: str, size: int, password: str, pages: List[int], dpi: int) -> Dict[int, bytes]:
+    """进程池工作函数：把指定页整页渲染为 PNG"""
+    with _open_shared(shm_name, size, password) as pdf:
+        return {page_number: pdf.load_page(page_number).get_pixmap(dpi=dpi).tobytes("png")
+                for page_number in pages}
+
 
 class PDFExtractor:
-    
+
+    @staticmethod
+    def _resolve_parallelism(node: Node, page_count: int) -> int:
+        """请求未指定时使用环境变量 PDF_PARALLELISM（默认 1，即串行）"""
+        parallelism = node.pdf_parallelism
+        if parallelism <= 0:
+            parallelism = int(os.environ.get('PDF_PARALLELISM', '1'))
+        min_pages = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', str(DEFAULT_PARALLEL_MIN_PAGES)))
+        if parallelism <= 1 or page_count < max(2, min_pages):
+            return 1
+        return min(parallelism, page_count)
+
+    @staticmethod
+    def _record_metadata(node: Node, pdf, max_pages: int, scan_pages: int):
+        """
+        在提取文本和图片之前记录文档信息，失败或只取元数据时调用方也能拿到。
+        前 scan_pages 页逐页记录图片数和字体数（逗号分隔），只读页面资源表，不解码图片、不提取文本；
+        没有字体的页面通常是扫描页。
+        """
+        metadata = pdf.metadata or {}
+        for key in ("format", "producer", "creator", "title", "author"):
+            if metadata.get(key):
+                node.meta.map_string[f"pdf_{key}"] = metadata[key]
+        node.meta.map_number["pdf_processed_pages"] = max_pages
+        node.meta.map_number["pdf_truncated_pages"] = max(0, pdf.page_count - max_pages)
+        if scan_pages <= 0:
+            return
+        image_counts = []
+        font_counts = []
+        for page_number in range(scan_pages):
+            page = pdf[page_number]
+            image_counts.append(str(len(page.get_images())))
+            font_counts.append(str(len(page.get_fonts())))
+        node.meta.map_string["pdf_page_images"] = ",".join(image_counts)
+        node.meta.map_string["pdf_page_fonts"] = ",".join(font_counts)
+
+    @staticmethod
+    def _text_per_page(node: Node) -> bool:
+        """请求未指定时使用环境变量 PDF_TEXT_PER_PAGE（默认 false）"""
+        if node.pdf_text_per_page is not None:
+            return node.pdf_text_per_page
+        return os.environ.get('PDF_TEXT_PER_PAGE', 'false').lower() == 'true'
+
+    @staticmethod
+    def _extract_pages_parallel(content: bytes, password: str, page_count: int,
+                                parallelism: int, raster: RasterOptions) -> List[Dict[str, Any]]:
+        """
+        按页范围拆分到进程池，结果按页码顺序合并。工作进程只检测扫描页，
+        渲染预算按页码顺序分给前 PDF_RASTER_MAX_PAGES 个扫描页后再并行渲染，结果与串行一致。
+        """
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(content)))
+        try:
+            shm.buf[:len(content)] = content
+            chunk = (page_count + parallelism - 1) // parallelism
+            pool = _get_process_pool()
+            futures = [
+                pool.submit(_extract_page_range, shm.name, len(content), password, start,
+                            min(start + chunk, page_count), replace(raster, remaining=0))
+                for start in range(0, page_count, chunk)
+            ]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            results.sort(key=lambda r: r["page"])
+
+            selected = [r["page"] for r in results if r["scanned"]][:max(0, raster.remaining)]
+            if selected:
+                groups = [selected[i::parallelism] for i in range(min(parallelism, len(selected)))]
+                render_futures = [
+                    pool.submit(_render_pages, shm.name, len(content), password, pages, raster.dpi)
+                    for pages in groups
+                ]
+                rasters: Dict[int, bytes] = {}
+                for future in render_futures:
+                    rasters.update(future.result())
+                _apply_rasters(results, rasters)
+            return results
+        finally:
+            shm.close()
+            shm.unlink()
+
     @staticmethod
     def extract_pdf_file(node: Node) -> List[Node]:
         nodes = []
@@ -21,51 +286,113 @@ class PDFExtractor:
         elif isinstance(node.content, Data):
             logger.error("extract_pdf_file enter Data type")
             return nodes
-        
-        all_text = ""
-        pdf = fitz.open(stream=BytesIO(file.content), filetype="pdf")
+
+        correct_password = ""
+        with span("pdf_open"):
+            # 直接使用已有的 bytes，fitz 按需解析页面，不再复制到 BytesIO
+            pdf = fitz.open(stream=file.content, filetype="pdf")
+        node.meta.map_number["pdf_page_count"] = pdf.page_count
         if pdf.needs_pass:
             node.meta.map_bool["is_encrypted"] = True
             password_success = False
             for password in node.passwords:
                 if pdf.authenticate(password):
                     password_success = True
+                    correct_password = password
                     node.meta.map_string["correct_password"] = password
                     break
-    
+
             if not password_success:
+                if node.pdf_metadata_only:
+                    # 分拣场景只需要知道文档已加密；未解密的页面无法读取，不做逐页统计
+                    PDFExtractor._record_metadata(node, pdf, 0, 0)
+                    pdf.close()
+                    return nodes
                 raise ValueError("PDF all passwords are invalid.")
         else:
             node.meta.map_bool["is_encrypted"] = False
-            
+
         # 使用node.pdf_max_pages来限制处理的页数
         max_pages = min(node.pdf_max_pages, len(pdf))
-        for page_number in range(max_pages):
-            page = pdf.load_page(page_number)
-            images = page.get_images(full=True)
-            text = page.get_text()
-            all_text += text
-
-            for img_index, img in enumerate(images):
-                xref = img[0]
-                base_image = pdf.extract_image(xref)
-                image_bytes = base_image["image"]
-                image_filename = f"page_{page_number + 1}_image_{img_index + 1}.png"
+        if node.pdf_metadata_only:
+            PDFExtractor._record_metadata(node, pdf, 0, max_pages)
+            pdf.close()
+            return nodes
+        PDFExtractor._record_metadata(node, pdf, max_pages, max_pages)
+
+        parallelism = PDFExtractor._resolve_parallelism(node, max_pages)
+        node.meta.map_number["pdf_parallelism"] = parallelism
+
+        raster = RasterOptions.from_environment()
+        page_results = None
+        if parallelism > 1:
+            try:
+                with span("pdf_pages_parallel", pages=max_pages, parallelism=parallelism):
+                    page_results = PDFExtractor._extract_pages_parallel(
+                        file.content, correct_password, max_pages, parallelism, raster)
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"Parallel PDF extraction failed, falling back to serial: {e}")
+                _reset_process_pool()
+                node.meta.map_number["pdf_parallelism"] = 1
+
+        if page_results is None:
+            page_results = []
+            seen_xrefs: Set[int] = set()
+            for page_number in range(max_pages):
+                with span("pdf_page", page=page_number + 1):
+                    page_results.append(_process_page(pdf, page_number, seen_xrefs, raster))
+        pdf.close()
+
+        images = _dedupe_images(page_results)
+        node.meta.map_number["pdf_image_occurrences"] = sum(len(r["images"]) for r in page_results)
+        node.meta.map_number["pdf_unique_images"] = len(images)
+        for image in images:
+            t_node = Node()
+            t_node.content = File(
+                path=image["name"],
+                name=image["name"],
+                content=image["content"]
+            )
+            t_node.meta.map_string["pdf_pages"] = ",".join(str(p) for p in image["pages"])
+            t_node.meta.map_number["pdf_occurrence_count"] = len(image["pages"])
+            t_node.meta.map_number["pdf_xref"] = image["xref"]
+            t_node.prev = node
+            t_node.inherit_limits(node)
+            nodes.append(t_node)
+
+        # 扫描页渲染出的整页图片，交给 OCR/二维码提取
+        rasterized = [r for r in page_results if r["raster"] is not None]
+        node.meta.map_number["pdf_scanned_pages"] = sum(1 for r in page_results if r["scanned"])
+        node.meta.map_number["pdf_rasterized_pages"] = len(rasterized)
+        for result in rasterized:
+            image_filename = f"page_{result['page'] + 1}_render.png"
+            t_node = Node()
+            t_node.content = File(
+                path=image_filename,
+                name=image_filename,
+                content=result["raster"]
+            )
+            t_node.meta.map_bool["pdf_rasterized"] = True
+            t_node.meta.map_number["pdf_page"] = result["page"] + 1
+            t_node.meta.map_number["pdf_raster_dpi"] = raster.dpi
+            t_node.prev = node
+            t_node.inherit_limits(node)
+            nodes.append(t_node)
+
+        if PDFExtractor._text_per_page(node):
+            for result in page_results:
                 t_node = Node()
-                t_node.content = File(
-                    path=image_filename,
-                    name=image_filename,
-                    content=image_bytes
-                )
+                t_node.content = Data(type="TEXT", content=encode_binary(result["text"]))
+                t_node.meta.map_number["pdf_page"] = result["page"] + 1
                 t_node.prev = node
                 t_node.inherit_limits(node)
                 nodes.append(t_node)
+        else:
+            t_node = Node()
+            t_node.id = 0
+            t_node.content = Data(type="TEXT", content=encode_binary("".join(r["text"] for r in page_results)))
+            t_node.prev = node
+            t_node.inherit_limits(node)
+            nodes.append(t_node)
 
-        t_node = Node()
-        t_node.id = 0
-        t_node.content = Data(type="TEXT", content=encode_binary(all_text))
-        t_node.prev = node
-        t_node.inherit_limits(node)
-        nodes.append(t_node)
-
-        return nodes
\ No newline at end of file
+        return nodes
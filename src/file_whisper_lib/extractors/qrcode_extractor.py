@@ -9,6 +9,7 @@ from loguru import logger
 import zxingcpp
 
 from ..dt import Node, File, Data
+from ..tracing import span
 from .utils import encode_binary
 
 
@@ -27,7 +28,8 @@ class QRCodeExtractor:
                 if img is None:
                     logger.warning("Failed to decode image for QR code extraction")
                     return nodes
-                barcodes = zxingcpp.read_barcodes(img)
+                with span("zxing_read_barcodes"):
+                    barcodes = zxingcpp.read_barcodes(img)
                 for barcode in barcodes:
                     t_node = Node()
                     t_node.id = 0
@@ -6,7 +6,7 @@ from typing import List
 from loguru import logger
 
 from ..dt import Node, File, Data
-from .utils import encode_binary, decode_binary
+from .utils import encode_binary, decode_node_content
 
 
 class URLExtractor:
@@ -19,10 +19,10 @@ class URLExtractor:
         try:
             if isinstance(node.content, File):
                 logger.debug(f"Node[{node.id}] file {node.content.mime_type}")
-                text = decode_binary(node.content.content)
+                text = decode_node_content(node)
             elif isinstance(node.content, Data):
                 logger.debug(f"Node[{node.id}] data {node.content.type}")
-                text = decode_binary(node.content.content)
+                text = decode_node_content(node)
             
             urls = URLExtractor.extract_urls_from_text(text)
             logger.debug(f"Node[{node.id}] Number of urls: {len(urls)}")
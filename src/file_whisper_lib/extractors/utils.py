@@ -1,11 +1,64 @@
 """
 通用辅助功能模块
 """
+from io import BytesIO
+from typing import List, Optional
+from loguru import logger
+
+from ..encoding import html_declared_charset, resolve_encoding
+from ..types import Types
 
 def encode_binary(text: str) -> bytes:
     """将字符串编码为字节"""
     return text.encode('utf-8')
 
-def decode_binary(data: bytes) -> str:
-    """将字节解码为字符串"""
-    return data.decode('utf-8')
\ No newline at end of file
+def decode_binary(data: bytes, declared: Optional[str] = None) -> str:
+    """
+    将字节解码为字符串。UTF-8 直接解码；否则按声明的字符集（HTML meta、MIME 头）或
+    采样探测选择编码，无法解码的字节替换为 U+FFFD，不抛出异常
+    """
+    if declared is None:
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+    return data.decode(resolve_encoding(data, declared), errors='replace')
+
+
+def node_encoding(node) -> str:
+    """节点内容的编码，结果记录在 meta 的 text_encoding 中，同一节点的多个提取器只判断一次"""
+    encoding = node.meta.map_string.get("text_encoding")
+    if not encoding:
+        data = node.content.content
+        declared = html_declared_charset(data) if node.type == Types.TEXT_HTML else None
+        encoding = resolve_encoding(data, declared)
+        node.meta.map_string["text_encoding"] = encoding
+    return encoding
+
+
+def decode_node_content(node) -> str:
+    """按 node_encoding 解码节点内容"""
+    return node.content.content.decode(node_encoding(node), errors='replace')
+
+def decrypt_office_document(content: bytes, passwords: List[str]) -> Optional[bytes]:
+    """用 msoffcrypto 在内存中解密 Office 文档，依次尝试 passwords，全部失败返回 None"""
+    try:
+        import msoffcrypto
+    except ImportError:
+        logger.error("msoffcrypto-tool not available for password-protected files")
+        return None
+
+    for password in passwords:
+        try:
+            office_file = msoffcrypto.OfficeFile(BytesIO(content))
+            office_file.load_key(password=password)
+            decrypted = BytesIO()
+            office_file.decrypt(decrypted)
+            logger.info(f"Successfully decrypted file with password")
+            return decrypted.getvalue()
+        except Exception as e:
+            logger.debug(f"Failed to decrypt with password: {e}")
+            continue
+
+    logger.error("Failed to decrypt file with any provided password")
+    return None
@@ -6,20 +6,15 @@ import uuid
 import zipfile
 import traceback
 import subprocess
-from typing import List
+from io import BytesIO
+from typing import List, Optional
 from loguru import logger
-import docx
 
 from ..dt import Node, File, Data
+from ..tracing import span
 from ..types import Types
-from .utils import encode_binary
-
-try:
-    import msoffcrypto
-    MSOFFCRYPTO_AVAILABLE = True
-except ImportError:
-    MSOFFCRYPTO_AVAILABLE = False
-    logger.warning("msoffcrypto-tool not available, password-protected files may not be supported")
+from .utils import encode_binary, decrypt_office_document
+from . import doc_parser, docx_reader, libreoffice_pool
 
 try:
     import olefile
@@ -34,26 +29,29 @@ class WordExtractor:
     @staticmethod
     def _convert_doc_to_docx(doc_path: str) -> str:
         """Convert DOC file to DOCX using LibreOffice if available"""
+        output_dir = os.path.dirname(doc_path)
+        docx_filename = os.path.splitext(os.path.basename(doc_path))[0] + '.docx'
+        docx_path = os.path.join(output_dir, docx_filename)
+
+        # 优先使用常驻的 LibreOffice 进程池
+        pool = libreoffice_pool.get_pool()
+        if pool is not None:
+            try:
+                with span("libreoffice_convert", mode="pool"):
+                    pool.convert(doc_path, docx_path, "MS Word 2007 XML")
+                logger.info("Successfully converted DOC to DOCX using LibreOffice worker pool")
+                return docx_path
+            except libreoffice_pool.QueueFullError as e:
+                logger.warning(f"{e}, skipping DOC conversion")
+                return doc_path
+            except libreoffice_pool.LibreOfficeError as e:
+                logger.warning(f"LibreOffice worker pool conversion failed: {e}")
+                return doc_path
+
         try:
-            # Try using LibreOffice to convert DOC to DOCX
-            output_dir = os.path.dirname(doc_path)
-            docx_filename = os.path.splitext(os.path.basename(doc_path))[0] + '.docx'
-            docx_path = os.path.join(output_dir, docx_filename)
-            
-            # Try different LibreOffice command names
-            commands = ['libreoffice', 'soffice']
-            for cmd in commands:
-                try:
-                    result = subprocess.run([
-                        cmd, '--headless', '--convert-to', 'docx',
-                        '--outdir', output_dir, doc_path
-                    ], capture_output=True, text=True, timeout=30)
-                    break
-                except FileNotFoundError:
-                    if cmd == commands[-1]:  # Last command failed
-                        raise
-                    continue
-            
+            with span("libreoffice_convert", mode="subprocess"):
+                result = libreoffice_pool.convert_with_subprocess(doc_path, output_dir, 'docx')
+
             if result.returncode == 0 and os.path.exists(docx_path):
                 logger.info("Successfully converted DOC to DOCX using LibreOffice")
                 return docx_path
@@ -65,130 +63,135 @@ class WordExtractor:
             return doc_path
     
     @staticmethod
-    def _decrypt_file(file_path: str, passwords: List[str]) -> str:
-        """Decrypt password-protected Office file"""
-        if not MSOFFCRYPTO_AVAILABLE:
-            logger.error("msoffcrypto-tool not available for password-protected files")
-            return file_path
-        
-        decrypted_path = file_path + '.decrypted'
-        
-        for password in passwords:
-            try:
-                with open(file_path, 'rb') as f:
-                    office_file = msoffcrypto.OfficeFile(f)
-                    office_file.load_key(password=password)
-                    
-                    with open(decrypted_path, 'wb') as decrypted_f:
-                        office_file.decrypt(decrypted_f)
-                    
-                    logger.info(f"Successfully decrypted file with password")
-                    return decrypted_path
-            except Exception as e:
-                logger.debug(f"Failed to decrypt with password: {e}")
-                continue
-        
-        logger.error("Failed to decrypt file with any provided password")
-        return file_path
-    
-    @staticmethod
-    def _extract_docx_content(docx_path: str, node: Node) -> List[Node]:
-        """Extract content from DOCX file"""
+    def _extract_docx_content(content: bytes, node: Node) -> List[Node]:
+        """Extract content from DOCX bytes, text and media share one ZipFile"""
         nodes = []
-        
+
         try:
-            doc = docx.Document(docx_path)
-            text_content = []
-            
-            # 限制处理的段落数量，根据页数估算
-            # 假设每页约有20个段落
-            max_paragraphs = node.word_max_pages * 20
-            for i, para in enumerate(doc.paragraphs):
-                if i >= max_paragraphs:
-                    break
-                text_content.append(para.text)
-            
-            # Extract text content
-            separator = "\n"
-            joined_text_content = separator.join(text_content)
-            if joined_text_content.strip():
-                t_node = Node()
-                t_node.id = 0
-                t_node.content = Data(type="TEXT", content=encode_binary(joined_text_content))
-                t_node.prev = node
-                t_node.inherit_limits(node)
-                nodes.append(t_node)
-            
-            # Extract media files from DOCX
-            try:
-                with zipfile.ZipFile(docx_path, 'r') as docx_zip:
-                    all_files = docx_zip.namelist()
-                    for file1 in all_files:
-                        if file1.startswith('word/media/') and not file1.__eq__('word/media/'):
+            with zipfile.ZipFile(BytesIO(content), 'r') as docx_zip:
+                # 流式读取正文，达到 word_max_pages 后停止
+                with span("docx_parse"):
+                    doc = docx_reader.read_docx(docx_zip, node.word_max_pages)
+                node.meta.map_number["docx_pages_read"] = doc.pages_read
+                node.meta.map_bool["docx_truncated"] = doc.truncated
+                if doc.page_count:
+                    node.meta.map_number["docx_page_count"] = doc.page_count
+
+                # Extract text content, 页眉页脚放在正文之后
+                separator = "\n"
+                joined_text_content = separator.join([doc.text] + doc.headers_footers)
+                if joined_text_content.strip():
+                    nodes.append(WordExtractor._text_node(node, joined_text_content))
+
+                # Extract media files from DOCX
+                try:
+                    for info in docx_zip.infolist():
+                        if info.filename.startswith('word/media/') and not info.is_dir():
                             t_node = Node()
-                            file_name = os.path.basename(file1)
-                            file_byte = docx_zip.read(file1)
+                            file_name = os.path.basename(info.filename)
                             t_node.content = File(
                                 path=file_name,
                                 name=file_name,
-                                content=file_byte
+                                content=docx_zip.read(info)
                             )
                             t_node.prev = node
                             t_node.inherit_limits(node)
                             nodes.append(t_node)
-            except Exception as e:
-                logger.warning(f"Failed to extract media files: {e}")
-            
+                except Exception as e:
+                    logger.warning(f"Failed to extract media files: {e}")
+
         except Exception as e:
             logger.error(f"Failed to extract DOCX content: {e}")
             traceback.print_exc()
-        
+
         return nodes
-    
+
     @staticmethod
-    def _extract_doc_content(doc_path: str, node: Node) -> List[Node]:
-        """Extract content from DOC file using olefile or other methods"""
-        nodes = []
-        converted_docx_path = None
-        
+    def _text_node(node: Node, text: str) -> Node:
+        t_node = Node()
+        t_node.id = 0
+        t_node.content = Data(type="TEXT", content=encode_binary(text))
+        t_node.prev = node
+        t_node.inherit_limits(node)
+        return t_node
+
+    @staticmethod
+    def _convert_doc_bytes(content: bytes) -> Optional[bytes]:
+        """LibreOffice 只能处理文件，只有需要转换时才写临时文件，返回转换后的 DOCX 内容"""
+        doc_path = '/tmp/' + uuid.uuid4().__str__() + '.doc'
+        docx_path = None
         try:
-            # First try to convert DOC to DOCX
+            with open(doc_path, 'wb') as f:
+                f.write(content)
             docx_path = WordExtractor._convert_doc_to_docx(doc_path)
-            if docx_path != doc_path and os.path.exists(docx_path):
-                converted_docx_path = docx_path
-                return WordExtractor._extract_docx_content(docx_path, node)
+            if docx_path == doc_path or not os.path.exists(docx_path):
+                return None
+            with open(docx_path, 'rb') as f:
+                return f.read()
         finally:
-            # Clean up converted file
-            if converted_docx_path and os.path.exists(converted_docx_path):
-                try:
-                    os.remove(converted_docx_path)
-                except Exception as e:
-                    logger.warning(f"Failed to remove converted DOCX file: {e}")
-        
-        # If conversion failed, try to extract text using olefile
+            for tmp_file in (doc_path, docx_path):
+                if tmp_file and os.path.exists(tmp_file):
+                    try:
+                        os.remove(tmp_file)
+                    except Exception as e:
+                        logger.warning(f"Failed to remove temp file {tmp_file}: {e}")
+
+    @staticmethod
+    def _extract_doc_content(content: bytes, node: Node) -> List[Node]:
+        """
+        Extract content from DOC file.
+        优先用 doc_parser 直接读取 piece table；文档含图片等对象且 LibreOffice 可用时
+        再转换为 DOCX 以便提取图片，解析失败时同样退回到转换。
+        """
+        nodes = []
+
+        doc = None
+        try:
+            with span("doc_parse"):
+                doc = doc_parser.read_doc(content, node.word_max_pages)
+        except doc_parser.DocFormatError as e:
+            logger.info(f"Native DOC parsing not possible, trying conversion: {e}")
+        except Exception as e:
+            logger.warning(f"Native DOC parsing failed, trying conversion: {e}")
+
+        if doc is not None:
+            node.meta.map_number["doc_object_count"] = doc.object_count
+            convert_for_objects = os.environ.get('DOC_CONVERT_FOR_IMAGES', 'true').lower() == 'true'
+            if doc.object_count == 0 or not convert_for_objects or libreoffice_pool.find_soffice() is None:
+                node.meta.map_string["doc_text_method"] = "native"
+                if doc.text.strip():
+                    nodes.append(WordExtractor._text_node(node, doc.text))
+                return nodes
+
+        docx_content = WordExtractor._convert_doc_bytes(content)
+        if docx_content is not None:
+            node.meta.map_string["doc_text_method"] = "libreoffice"
+            return WordExtractor._extract_docx_content(docx_content, node)
+
+        # 转换失败时仍然输出已经解析到的文本
+        if doc is not None:
+            node.meta.map_string["doc_text_method"] = "native"
+            if doc.text.strip():
+                nodes.append(WordExtractor._text_node(node, doc.text))
+            return nodes
+
         if OLEFILE_AVAILABLE:
             try:
-                # This is a basic implementation - olefile can read OLE structure
-                # but text extraction from DOC is complex
-                if olefile.isOleFile(doc_path):
+                if olefile.isOleFile(data=content):
                     logger.info("DOC file detected, but text extraction is limited")
-                    # For now, just create a placeholder indicating the file type
-                    t_node = Node()
-                    t_node.id = 0
-                    t_node.content = Data(type="TEXT", content=encode_binary("[DOC file detected - content extraction requires conversion]"))
-                    t_node.prev = node
-                    t_node.inherit_limits(node)
-                    nodes.append(t_node)
+                    node.meta.map_string["doc_text_method"] = "none"
+                    nodes.append(WordExtractor._text_node(
+                        node, "[DOC file detected - content extraction requires conversion]"))
             except Exception as e:
                 logger.error(f"Failed to process DOC file: {e}")
-        
+
         return nodes
-    
+
     @staticmethod
     def extract_word_file(node: Node) -> List[Node]:
         node.meta.map_bool["is_encrypted"] = False
         nodes = []
-        
+
         if isinstance(node.content, File):
             file = node.content
         elif isinstance(node.content, Data):
@@ -196,65 +199,46 @@ class WordExtractor:
             return nodes
         else:
             return nodes
-        
-        tmp_files = []
-        
+
         try:
-            # Create temporary file
-            file_path = '/tmp/' + uuid.uuid4().__str__()
-            with open(file_path, 'wb') as f:
-                f.write(file.content)
-            tmp_files.append(file_path)
-            
-            current_file_path = file_path
-            
-            # Check if file is encrypted by trying to open it
+            content = file.content
+
+            # Check if file is encrypted
+            # 加密的 DOCX 是 OLE 容器（EncryptedPackage）而不是 ZIP
             is_encrypted = False
             try:
                 if node.type == Types.DOCX:
-                    # Try to open DOCX file
-                    with zipfile.ZipFile(current_file_path, 'r'):
-                        pass  # If this succeeds, file is not encrypted
+                    is_encrypted = not zipfile.is_zipfile(BytesIO(content))
                 elif node.type == Types.DOC:
-                    # For DOC files, try to check if it's encrypted
-                    # This is a simplified check
-                    pass
-            except (zipfile.BadZipFile, zipfile.LargeZipFile):
-                is_encrypted = True
+                    # FIB 中的加密标记
+                    is_encrypted = doc_parser.is_encrypted(content)
             except Exception as e:
+                # 无法判断时按未加密处理，交给后面的解析或 LibreOffice 转换
                 logger.debug(f"File check exception: {e}")
-                is_encrypted = True
-            
+
             # Try to decrypt if passwords are provided and file seems encrypted
-            if is_encrypted and node.passwords:
+            if is_encrypted:
                 node.meta.map_bool["is_encrypted"] = True
-                decrypted_path = WordExtractor._decrypt_file(current_file_path, node.passwords)
-                if decrypted_path != current_file_path:
-                    tmp_files.append(decrypted_path)
-                    current_file_path = decrypted_path
-                    is_encrypted = False
-            
+                if node.passwords:
+                    with span("office_decrypt", candidates=len(node.passwords)):
+                        decrypted = decrypt_office_document(content, node.passwords)
+                    if decrypted is not None:
+                        content = decrypted
+                        is_encrypted = False
+
             # If still encrypted and no passwords work, return empty
             if is_encrypted:
                 logger.warning("File appears to be encrypted but no valid password provided")
                 return nodes
-            
+
             # Extract content based on file type
             if node.type == Types.DOCX:
-                nodes = WordExtractor._extract_docx_content(current_file_path, node)
+                nodes = WordExtractor._extract_docx_content(content, node)
             elif node.type == Types.DOC:
-                nodes = WordExtractor._extract_doc_content(current_file_path, node)
-            
+                nodes = WordExtractor._extract_doc_content(content, node)
+
         except Exception as e:
             logger.error(f"Failed to extract Word file: {e}")
             traceback.print_exc()
-        finally:
-            # Clean up temporary files
-            for tmp_file in tmp_files:
-                if os.path.exists(tmp_file):
-                    try:
-                        os.remove(tmp_file)
-                    except Exception as e:
-                        logger.warning(f"Failed to remove temp file {tmp_file}: {e}")
-        
-        return nodes
\ No newline at end of file
+
+        return nodes
@@ -1,69 +1,76 @@
 import time
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 import traceback
 from .dt import Node
 from .types import Types 
 from .extractor import Extractor
-from .analyzer import Analyzer
+from .metrics import EXTRACTOR_DURATION, EXTRACTOR_ERRORS
+from .tracing import span
+from .registry import ExtractorRegistry, LazyTarget, KIND_ANALYZER, KIND_EXTRACTOR, get_registry
 
 class Flavors:
-    def __init__(self, extractor: Extractor):
+    def __init__(self, extractor: Extractor, registry: ExtractorRegistry = None):
         self.extractor = extractor
-        
-        self.flavor_extractors = {
-            Types.TEXT_PLAIN: [
-                ("url_extractor", self.extractor.extract_urls)
-            ],
-            Types.IMAGE: [
-                ("qrcode_extractor", self.extractor.extract_qrcode),
-                ("ocr_extractor", self.extractor.extract_ocr)
-            ],
-            Types.TEXT_HTML: [
-                ("html_extractor", self.extractor.extract_html)
-            ],
-            Types.COMPRESSED_FILE: [
-                ("compressed_file_extractor", self.extractor.extract_compressed_file) 
-            ],
-            Types.DOC: [
-                ("word_file_extractor", self.extractor.extract_word_file) 
-            ],
-            Types.DOCX: [
-                ("word_file_extractor", self.extractor.extract_word_file) 
-            ],
-            Types.PDF: [
-                ("pdf_extractor", self.extractor.extract_pdf_file) 
-            ],
-            Types.EMAIL: [
-                ("email_extractor", self.extractor.extract_email_file)
-            ]
-        }
+        self.registry = registry or get_registry()
+
+        # 类型 -> [(名称, 可调用对象)]，实现模块在第一次调用时才导入
+        self.flavor_extractors = self._build_table(KIND_EXTRACTOR)
+        self.flavor_analyzers = self._build_table(KIND_ANALYZER)
 
-        self.flavor_analyzers = {
-            Types.COMPRESSED_FILE: [
-                ("compressed_file_analyzer", Analyzer.analyze_compressed_file)
-            ]
-        }
+    def _build_table(self, kind: str) -> Dict[Types, List[Tuple[str, LazyTarget]]]:
+        table = {}
+        targets = {}
+        for node_type, specs in self.registry.table(kind).items():
+            entries = []
+            for spec in specs:
+                # 同一提取器注册多个类型时共用一个 LazyTarget
+                if spec.name not in targets:
+                    targets[spec.name] = LazyTarget(spec, self.extractor)
+                entries.append((spec.name, targets[spec.name]))
+            table[node_type] = entries
+        return table
     
     def extract(self, node: Node) -> List[Node]:
-        nodes = []
-        
+        return list(self.iter_extract(node))
+
+    def iter_extract(self, node: Node) -> Iterator[Node]:
+        """
+        逐个产出子节点。提取器可以返回列表，也可以返回生成器（如压缩文件逐个解压），
+        生成器产出的子节点可以在下一个条目解压之前就交给调用方处理；
+        耗时只统计提取器自身，不包括调用方处理子节点的时间。
+        """
         if not node:
-            return nodes
-            
+            return
+
         extractors = self.flavor_extractors.get(node.type, [])
-        
+
         for name, extractor in extractors:
-            start = time.time()
+            elapsed_ns = 0
             try:
-                extracted = extractor(node)
-                nodes.extend(extracted) 
+                start = time.perf_counter_ns()
+                with span(name, kind="extract"):
+                    extracted = extractor(node)
+                elapsed_ns += time.perf_counter_ns() - start
+                if isinstance(extracted, (list, tuple)):
+                    yield from extracted
+                else:
+                    # 生成器：每产出一个子节点记录一次 span
+                    while True:
+                        start = time.perf_counter_ns()
+                        try:
+                            with span(name, kind="extract_next"):
+                                child = next(extracted)
+                        except StopIteration:
+                            break
+                        finally:
+                            elapsed_ns += time.perf_counter_ns() - start
+                        yield child
             except Exception as e:
                 traceback.print_exc()
                 node.meta.map_string["error_message"] += f"{name}: {str(e)};"
-            duration = int((time.time() - start) * 1_000_000)
-            node.meta.map_number[f"microsecond_{name}"] = duration
-            
-        return nodes
+                EXTRACTOR_ERRORS.inc(extractor=name, node_type=node.type.name)
+            node.meta.map_number[f"microsecond_{name}"] = elapsed_ns // 1000
+            EXTRACTOR_DURATION.observe(elapsed_ns / 1e9, extractor=name, node_type=node.type.name)
     
     def analyze(self, node: Node):
         if not node:
@@ -72,12 +79,15 @@ class Flavors:
         analyzers = self.flavor_analyzers.get(node.type, [])
         
         for name, analyzer in analyzers:
-            start = time.time()
+            start = time.perf_counter_ns()
             try:
-                analyzer(node)
+                with span(name, kind="analyze"):
+                    analyzer(node)
             except Exception as e:
                 traceback.print_exc()
                 node.meta.map_string["error_message"] += f"{name}: {str(e)};"
-            duration = int((time.time() - start) * 1_000_000)
-            node.meta.map_number[f"microsecond_{name}"] = duration
+                EXTRACTOR_ERRORS.inc(extractor=name, node_type=node.type.name)
+            elapsed_ns = time.perf_counter_ns() - start
+            node.meta.map_number[f"microsecond_{name}"] = elapsed_ns // 1000
+            EXTRACTOR_DURATION.observe(elapsed_ns / 1e9, extractor=name, node_type=node.type.name)
             
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""
+Prometheus 文本格式指标
+
+不依赖 prometheus_client，提供 Counter/Gauge/Histogram 三种指标以及一个本地 HTTP
+端点（/metrics）。设置环境变量 METRICS_PORT 后由服务端启动，默认只监听 127.0.0.1。
+"""
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from loguru import logger
+
+# 延迟类指标的默认分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# 字节数分桶：1KB ~ 1GB
+SIZE_BUCKETS = tuple(float(1024 * 4 ** i) for i in range(11))
+# 数量分桶
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """可直接 set，也可以通过 set_function 在渲染时取值"""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]):
+        """function 返回 {标签值元组: 数值}，无标签时键为 ()"""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self._function is not None:
+            try:
+                values.update(self._function())
+            except Exception as e:
+                logger.warning(f"Failed to collect gauge {self.name}: {e}")
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets)) + (math.inf,)
+        # 每组标签: [各桶计数（非累计）..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "file_whisper_request_duration_seconds", "Whispering request latency", ["status"])
+REQUEST_BYTES = REGISTRY.histogram(
+    "file_whisper_request_bytes", "Size of the root file of each request", buckets=SIZE_BUCKETS)
+NODES_PER_REQUEST = REGISTRY.histogram(
+    "file_whisper_nodes_per_request", "Number of nodes in each reply tree", buckets=COUNT_BUCKETS)
+BYTES_PROCESSED = REGISTRY.counter(
+    "file_whisper_bytes_processed_total", "Bytes of node content digested", ["node_type"])
+EXTRACTOR_DURATION = REGISTRY.histogram(
+    "file_whisper_extractor_duration_seconds", "Latency of each extractor/analyzer call",
+    ["extractor", "node_type"])
+EXTRACTOR_ERRORS = REGISTRY.counter(
+    "file_whisper_extractor_errors_total", "Extractor/analyzer calls that raised", ["extractor", "node_type"])
+QUEUE_WAIT = REGISTRY.histogram(
+    "file_whisper_tree_pool_acquire_wait_seconds", "Time spent waiting for a Tree from the pool")
+TREE_POOL_TREES = REGISTRY.gauge(
+    "file_whisper_tree_pool_trees", "Tree instances in the pool by state", ["state"])
+OCR_TEXT_REGIONS = REGISTRY.histogram(
+    "file_whisper_ocr_text_regions", "Text regions recognized in each OCR call", buckets=COUNT_BUCKETS)
+CACHE_REQUESTS = REGISTRY.counter(
+    "file_whisper_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+
+
+def record_cache(cache: str, hit: bool):
+    """记录一次缓存查询，命中率 = hit / (hit + miss)"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def bind_tree_pool(tree_pool):
+    """把 TreePool 的占用情况和获取耗时接入指标"""
+    tree_pool.on_acquire(lambda seconds: QUEUE_WAIT.observe(seconds))
+
+    def collect():
+        stats = tree_pool.stats()
+        return {(state,): stats[state] for state in ("size", "idle", "in_use", "growing")}
+
+    TREE_POOL_TREES.set_function(collect)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.trace(f"metrics {self.address_string()} {format % args}")
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """在后台线程中启动 /metrics 端点"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    httpd = ThreadingHTTPServer((addr, port), handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    logger.info(f"Metrics endpoint listening on http://{addr}:{httpd.server_address[1]}/metrics")
+    return httpd
@@ -0,0 +1,255 @@
+"""
+Tree 实例池
+
+Tree 的创建（尤其是 OCR 模型加载）和预热在后台线程中并发进行，每个实例预热完成后
+立即入池可用；已就绪实例数达到 min_ready 时池进入就绪状态并通知回调（如 gRPC 健康检查）。
+
+池大小在 [min_size, max_size] 之间弹性伸缩：获取实例的等待时间超过 grow_wait 时
+新建实例，空闲超过 idle_ttl 的实例被回收（不低于 min_size）。
+"""
+import os
+import time
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .tree import Tree
+
+
+class TreePool:
+    """Tree实例池，管理多个Tree实例用于并发处理"""
+
+    def __init__(self, pool_size: int = None, min_ready: int = None, init_workers: int = None,
+                 warmup: bool = None, tree_factory: Callable[[], Tree] = Tree,
+                 min_size: int = None, max_size: int = None,
+                 grow_wait: float = None, idle_ttl: float = None):
+        if pool_size is None:
+            pool_size = os.cpu_count() or 1
+        if min_size is None:
+            min_size = pool_size
+        if max_size is None:
+            max_size = max(pool_size, min_size)
+        min_size = max(1, min(min_size, max_size))
+        pool_size = max(min_size, min(pool_size, max_size))
+        if min_ready is None:
+            min_ready = pool_size
+        if init_workers is None:
+            init_workers = min(pool_size, os.cpu_count() or 1)
+        if warmup is None:
+            warmup = os.environ.get('TREE_POOL_WARMUP', 'true').lower() == 'true'
+        if grow_wait is None:
+            grow_wait = float(os.environ.get('TREE_POOL_GROW_WAIT', '0.5'))
+        if idle_ttl is None:
+            idle_ttl = float(os.environ.get('TREE_POOL_IDLE_TTL', '300'))
+
+        self.pool_size = pool_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_ready = max(1, min(min_ready, pool_size))
+        self.warmup = warmup
+        self.tree_factory = tree_factory
+        self.grow_wait = grow_wait
+        self.idle_ttl = idle_ttl
+
+        self._lock = threading.RLock()
+        self._available = threading.Condition(self._lock)
+        # 空闲实例及其归还时间；右端最近归还（LIFO 复用），左端空闲最久（优先回收）
+        self._idle: Deque[Tuple[Tree, float]] = deque()
+        self._size = 0          # 已创建且未回收的实例数（空闲 + 使用中）
+        self._growing = 0       # 正在创建的实例数
+        self._failed = 0
+        self._initial_pending = pool_size
+        self._stats: Dict[str, float] = {
+            "acquire_count": 0,
+            "acquire_timeouts": 0,
+            "acquire_wait_seconds_total": 0.0,
+            "acquire_wait_seconds_max": 0.0,
+            "grown": 0,
+            "evicted": 0,
+        }
+        self._acquire_observers: List[Callable[[float], None]] = []
+
+        self._ready_event = threading.Event()
+        self._done_event = threading.Event()
+        self._closed = threading.Event()
+        self._ready_callbacks: List[Callable[[], None]] = []
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, init_workers), thread_name_prefix="tree-init")
+        with self._lock:
+            self._growing = pool_size
+        for _ in range(pool_size):
+            self._executor.submit(self._create_tree, True)
+
+        if min_size < max_size or min_size < pool_size:
+            self._reaper = threading.Thread(target=self._reap_loop, name="tree-reaper", daemon=True)
+            self._reaper.start()
+
+        logger.info(f"TreePool initializing {pool_size} Tree instances "
+                    f"(min_size={min_size}, max_size={max_size}, init_workers={init_workers}, "
+                    f"min_ready={self.min_ready}, warmup={warmup})")
+
+    def _create_tree(self, initial: bool = False):
+        tree = None
+        try:
+            tree = self.tree_factory()
+            if self.warmup:
+                try:
+                    tree.warmup()
+                except Exception as e:
+                    # 预热失败不影响实例使用，真实请求会再次触发加载
+                    logger.warning(f"Tree warmup failed: {e}")
+                    logger.debug(traceback.format_exc())
+        except Exception as e:
+            logger.error(f"Failed to create Tree instance: {e}")
+            logger.error(traceback.format_exc())
+
+        with self._lock:
+            self._growing -= 1
+            if tree is not None:
+                self._size += 1
+                self._idle.append((tree, time.monotonic()))
+                self._available.notify()
+                if not initial:
+                    self._stats["grown"] += 1
+                    logger.info(f"TreePool grew to {self._size} Tree instances")
+            else:
+                self._failed += 1
+
+            if not self._ready_event.is_set() and self._size >= self.min_ready:
+                logger.info(f"TreePool ready with {self._size}/{self.pool_size} Tree instances")
+                # 回调在锁内执行，保证 wait_ready 返回时回调已经完成
+                for callback in self._ready_callbacks:
+                    self._run_callback(callback)
+                self._ready_event.set()
+
+            if initial:
+                self._initial_pending -= 1
+                if self._initial_pending == 0:
+                    self._done_event.set()
+                    logger.info(f"TreePool initialized with {self._size} Tree instances ({self._failed} failed)")
+
+    def _grow(self) -> bool:
+        """在上限内异步新建一个实例，调用方需持有锁"""
+        if self._closed.is_set() or self._size + self._growing >= self.max_size:
+            return False
+        self._growing += 1
+        self._executor.submit(self._create_tree, False)
+        return True
+
+    def _reap_loop(self):
+        interval = max(0.05, min(self.idle_ttl / 2, 30.0))
+        while not self._closed.wait(interval):
+            self.evict_idle()
+
+    def evict_idle(self) -> int:
+        """回收空闲超过 idle_ttl 的实例，保留至少 min_size 个"""
+        evicted = 0
+        now = time.monotonic()
+        with self._lock:
+            while self._idle and self._size > self.min_size:
+                tree, released_at = self._idle[0]
+                if now - released_at < self.idle_ttl:
+                    break
+                self._idle.popleft()
+                self._size -= 1
+                evicted += 1
+            self._stats["evicted"] += evicted
+            size = self._size
+        if evicted:
+            logger.info(f"TreePool evicted {evicted} idle Tree instances, {size} remaining")
+        return evicted
+
+    @staticmethod
+    def _run_callback(callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"TreePool callback failed: {e}")
+
+    def on_ready(self, callback: Callable[[], None]):
+        """注册就绪回调；如果池已经就绪则立即调用"""
+        with self._lock:
+            if not self._ready_event.is_set():
+                self._ready_callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+    def on_acquire(self, observer: Callable[[float], None]):
+        """注册获取实例耗时（秒）的观察者，用于上报指标"""
+        self._acquire_observers.append(observer)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready_event.is_set()
+
+    @property
+    def created(self) -> int:
+        return self._size
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready_event.wait(timeout)
+
+    def wait_initialized(self, timeout: Optional[float] = None) -> bool:
+        return self._done_event.wait(timeout)
+
+    def acquire(self, timeout: float = None) -> Tree:
+        """获取一个空闲的Tree实例，等待超过 grow_wait 时扩容，超时则抛出异常"""
+        if timeout is None:
+            timeout = float(os.environ.get('TREE_POOL_ACQUIRE_TIMEOUT', '3'))
+
+        start = time.monotonic()
+        deadline = start + timeout
+        grow_at = start + self.grow_wait
+        requested_growth = False
+
+        with self._available:
+            while not self._idle:
+                now = time.monotonic()
+                if now >= deadline:
+                    self._stats["acquire_timeouts"] += 1
+                    raise RuntimeError(f"No available Tree instances in pool (size={self._size}, "
+                                       f"max_size={self.max_size}), timeout after {timeout}s")
+                if not requested_growth and now >= grow_at:
+                    requested_growth = True
+                    self._grow()
+                wake_at = deadline if requested_growth else min(deadline, grow_at)
+                self._available.wait(max(0.0, wake_at - now))
+
+            tree, _ = self._idle.pop()
+            waited = time.monotonic() - start
+            self._stats["acquire_count"] += 1
+            self._stats["acquire_wait_seconds_total"] += waited
+            self._stats["acquire_wait_seconds_max"] = max(self._stats["acquire_wait_seconds_max"], waited)
+
+        for observer in self._acquire_observers:
+            self._run_callback(lambda: observer(waited))
+        return tree
+
+    def release(self, tree: Tree):
+        """归还Tree实例到池中，并清除其状态"""
+        tree.clear_state()
+        with self._available:
+            self._idle.append((tree, time.monotonic()))
+            self._available.notify()
+
+    def stats(self) -> Dict[str, float]:
+        """池占用和获取耗时统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "growing": self._growing,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        return stats
+
+    def close(self):
+        """停止回收线程和扩容，已创建的实例保持可用"""
+        self._closed.set()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,309 @@
+"""
+提取器注册表
+
+每个提取器/分析器声明它处理的 Types、开销等级和依赖的模块，真正的实现模块只在
+第一次被调用时才导入。除内置提取器外，还可以通过 entry points
+（分组 file_whisper.extractors）或 JSON 配置文件注册插件。
+
+相关环境变量:
+- FILE_WHISPERER_EXTRACTORS: 逗号分隔的启用名单，未设置时启用全部
+- FILE_WHISPERER_EXTRACTOR_CONFIG: JSON 配置文件路径
+"""
+import os
+import json
+import importlib
+import importlib.util
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+from .types import Types
+
+ENTRY_POINT_GROUP = "file_whisper.extractors"
+
+# 开销等级，同一类型上的多个提取器按开销从低到高执行
+COST_CHEAP = "cheap"
+COST_MODERATE = "moderate"
+COST_EXPENSIVE = "expensive"
+COST_ORDER = {COST_CHEAP: 0, COST_MODERATE: 1, COST_EXPENSIVE: 2}
+
+KIND_EXTRACTOR = "extractor"
+KIND_ANALYZER = "analyzer"
+
+
+@dataclass
+class ExtractorSpec:
+    """
+    提取器声明
+
+    target 形如 "module:Class.method"，以 "." 开头的模块相对于 file_whisper_lib 包解析。
+    stateful 为 True 时，Class 会在每个 Tree 内实例化一次（例如持有模型的 OCR）。
+    """
+    name: str
+    types: List[Types]
+    target: str
+    cost: str = COST_CHEAP
+    requires: List[str] = field(default_factory=list)
+    stateful: bool = False
+    kind: str = KIND_EXTRACTOR
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExtractorSpec':
+        types = [t if isinstance(t, Types) else Types[t] for t in data["types"]]
+        return cls(
+            name=data["name"],
+            types=types,
+            target=data["target"],
+            cost=data.get("cost", COST_CHEAP),
+            requires=list(data.get("requires", [])),
+            stateful=bool(data.get("stateful", False)),
+            kind=data.get("kind", KIND_EXTRACTOR),
+        )
+
+    def is_available(self) -> bool:
+        """检查依赖模块是否已安装（只查找，不导入）"""
+        for module_name in self.requires:
+            try:
+                if importlib.util.find_spec(module_name) is None:
+                    return False
+            except (ImportError, ValueError):
+                return False
+        return True
+
+
+BUILTIN_SPECS: List[ExtractorSpec] = [
+    ExtractorSpec(
+        name="url_extractor",
+        types=[Types.TEXT_PLAIN],
+        target=".extractors.url_extractor:URLExtractor.extract_urls",
+        cost=COST_CHEAP,
+    ),
+    ExtractorSpec(
+        name="qrcode_extractor",
+        types=[Types.IMAGE],
+        target=".extractors.qrcode_extractor:QRCodeExtractor.extract_qrcode",
+        cost=COST_MODERATE,
+        requires=["cv2", "numpy", "zxingcpp"],
+    ),
+    ExtractorSpec(
+        name="ocr_extractor",
+        types=[Types.IMAGE],
+        target=".extractors.ocr_extractor:OCRExtractor.extract_ocr",
+        cost=COST_EXPENSIVE,
+        requires=["easyocr"],
+        stateful=True,
+    ),
+    ExtractorSpec(
+        name="html_extractor",
+        types=[Types.TEXT_HTML],
+        target=".extractors.html_extractor:HTMLExtractor.extract_html",
+        cost=COST_MODERATE,
+        requires=["bs4"],
+    ),
+    ExtractorSpec(
+        name="compressed_file_extractor",
+        types=[Types.COMPRESSED_FILE],
+        target=".extractors.archive_extractor:ArchiveExtractor.extract_compressed_file",
+        cost=COST_EXPENSIVE,
+        requires=["pybit7z"],
+    ),
+    ExtractorSpec(
+        name="word_file_extractor",
+        types=[Types.DOC, Types.DOCX],
+        target=".extractors.word_extractor:WordExtractor.extract_word_file",
+        cost=COST_EXPENSIVE,
+    ),
+    ExtractorSpec(
+        name="office_file_extractor",
+        types=[Types.XLSX, Types.PPTX, Types.ODT, Types.ODS, Types.ODP],
+        target=".extractors.office_extractor:OfficeExtractor.extract_office_file",
+        cost=COST_MODERATE,
+    ),
+    ExtractorSpec(
+        name="pdf_extractor",
+        types=[Types.PDF],
+        target=".extractors.pdf_extractor:PDFExtractor.extract_pdf_file",
+        cost=COST_EXPENSIVE,
+        requires=["fitz"],
+    ),
+    ExtractorSpec(
+        name="email_extractor",
+        types=[Types.EMAIL],
+        target=".extractors.email_extractor:EmailExtractor.extract_email_file",
+        cost=COST_CHEAP,
+    ),
+    ExtractorSpec(
+        name="compressed_file_analyzer",
+        types=[Types.COMPRESSED_FILE],
+        target=".analyzer:Analyzer.analyze_compressed_file",
+        cost=COST_MODERATE,
+        requires=["pybit7z"],
+        kind=KIND_ANALYZER,
+    ),
+]
+
+
+def import_target(target: str):
+    """导入 target 所在模块，返回 (模块, 属性路径列表)"""
+    module_name, _, attr_path = target.partition(":")
+    module = importlib.import_module(module_name, package=__package__)
+    return module, attr_path.split(".") if attr_path else []
+
+
+def _load_entry_point_specs() -> List[ExtractorSpec]:
+    specs = []
+    try:
+        from importlib.metadata import entry_points
+        eps = entry_points()
+        group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, [])
+    except Exception as e:
+        logger.debug(f"Failed to read extractor entry points: {e}")
+        return specs
+
+    for ep in group:
+        try:
+            loaded = ep.load()
+            if callable(loaded) and not isinstance(loaded, ExtractorSpec):
+                loaded = loaded()
+            items = loaded if isinstance(loaded, (list, tuple)) else [loaded]
+            for item in items:
+                specs.append(item if isinstance(item, ExtractorSpec) else ExtractorSpec.from_dict(item))
+        except Exception as e:
+            logger.error(f"Failed to load extractor entry point {ep.name}: {e}")
+    return specs
+
+
+def _load_config(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to load extractor config {path}: {e}")
+        return {}
+
+
+class ExtractorRegistry:
+    """按名称保存 ExtractorSpec，后注册的同名声明覆盖先注册的"""
+
+    def __init__(self, specs: Optional[List[ExtractorSpec]] = None):
+        self._specs: Dict[str, ExtractorSpec] = {}
+        self._enabled: Optional[set] = None
+        self._available: Dict[str, bool] = {}
+        for spec in specs or []:
+            self.register(spec)
+
+    def register(self, spec: ExtractorSpec):
+        if spec.cost not in COST_ORDER:
+            raise ValueError(f"Unknown cost class '{spec.cost}' for extractor {spec.name}")
+        self._specs[spec.name] = spec
+        self._available.pop(spec.name, None)
+
+    def _is_available(self, spec: ExtractorSpec) -> bool:
+        available = self._available.get(spec.name)
+        if available is None:
+            available = spec.is_available()
+            if not available:
+                logger.warning(f"Extractor {spec.name} disabled, missing dependencies: {spec.requires}")
+            self._available[spec.name] = available
+        return available
+
+    def enable_only(self, names: Optional[List[str]]):
+        self._enabled = set(names) if names is not None else None
+
+    def specs(self, kind: str = KIND_EXTRACTOR) -> List[ExtractorSpec]:
+        result = []
+        for spec in self._specs.values():
+            if spec.kind != kind:
+                continue
+            if self._enabled is not None and spec.name not in self._enabled:
+                continue
+            if not self._is_available(spec):
+                continue
+            result.append(spec)
+        return result
+
+    def table(self, kind: str = KIND_EXTRACTOR) -> Dict[Types, List[ExtractorSpec]]:
+        """生成 Types -> [ExtractorSpec] 映射，同一类型内按开销从低到高排序"""
+        table: Dict[Types, List[ExtractorSpec]] = {}
+        for spec in self.specs(kind):
+            for t in spec.types:
+                table.setdefault(t, []).append(spec)
+        for t in table:
+            table[t].sort(key=lambda s: COST_ORDER[s.cost])
+        return table
+
+    @classmethod
+    def from_environment(cls) -> 'ExtractorRegistry':
+        registry = cls(BUILTIN_SPECS)
+
+        for spec in _load_entry_point_specs():
+            registry.register(spec)
+
+        config_path = os.environ.get("FILE_WHISPERER_EXTRACTOR_CONFIG")
+        enabled = None
+        if config_path:
+            config = _load_config(config_path)
+            for item in config.get("extractors", []):
+                try:
+                    registry.register(ExtractorSpec.from_dict(item))
+                except Exception as e:
+                    logger.error(f"Invalid extractor declaration {item}: {e}")
+            if "enabled" in config:
+                enabled = list(config["enabled"])
+
+        enabled_env = os.environ.get("FILE_WHISPERER_EXTRACTORS")
+        if enabled_env:
+            enabled = [name.strip() for name in enabled_env.split(",") if name.strip()]
+
+        registry.enable_only(enabled)
+        return registry
+
+
+_default_registry: Optional[ExtractorRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry() -> ExtractorRegistry:
+    """进程内共享的注册表，首次调用时根据环境变量构建"""
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = ExtractorRegistry.from_environment()
+    return _default_registry
+
+
+def reset_registry():
+    global _default_registry
+    with _default_registry_lock:
+        _default_registry = None
+
+
+class LazyTarget:
+    """第一次调用时才导入并解析 spec.target 的可调用对象"""
+
+    def __init__(self, spec: ExtractorSpec, owner):
+        self.spec = spec
+        self.owner = owner
+        self._func: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Callable:
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    logger.debug(f"Loading extractor {self.spec.name} ({self.spec.target})")
+                    module, attrs = import_target(self.spec.target)
+                    obj = module
+                    if self.spec.stateful:
+                        cls = getattr(module, attrs[0])
+                        obj = self.owner.instance(cls)
+                        attrs = attrs[1:]
+                    for attr in attrs:
+                        obj = getattr(obj, attr)
+                    self._func = obj
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
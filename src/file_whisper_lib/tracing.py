@@ -0,0 +1,100 @@
+"""
+轻量级请求追踪
+
+每个请求记录一棵 span 树（使用 time.perf_counter_ns 计时）。只有通过 start_trace
+开启追踪的上下文中 span() 才会记录，否则是空操作，库在服务端之外使用时没有额外开销。
+"""
+import json
+import time
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    name: str
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    children: List['Span'] = field(default_factory=list)
+
+    @property
+    def duration_ns(self) -> int:
+        end = self.end_ns or time.perf_counter_ns()
+        return end - self.start_ns
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin_ns: int = None) -> Dict[str, Any]:
+        if origin_ns is None:
+            origin_ns = self.start_ns
+        return {
+            "name": self.name,
+            "start_us": (self.start_ns - origin_ns) // 1000,
+            "duration_us": self.duration_ns // 1000,
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin_ns) for child in self.children],
+        }
+
+    def format(self, indent: int = 0) -> str:
+        """以缩进文本形式输出 span 树，用于日志"""
+        attrs = " ".join(f"{k}={v}" for k, v in self.attributes.items())
+        line = f"{'  ' * indent}{self.name} {self.duration_ns / 1e6:.2f}ms"
+        if attrs:
+            line += f" [{attrs}]"
+        return "\n".join([line] + [child.format(indent + 1) for child in self.children])
+
+
+class _NoopSpan:
+    """追踪未开启时 span() 返回的占位对象"""
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("file_whisper_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Span]:
+    """开启一次追踪，返回根 span"""
+    root = Span(name=name, start_ns=time.perf_counter_ns(), attributes=dict(attributes))
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.end_ns = time.perf_counter_ns()
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """在当前 span 下记录一个子 span；没有开启追踪时不做任何事"""
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP_SPAN
+        return
+
+    child = Span(name=name, start_ns=time.perf_counter_ns(), attributes=dict(attributes))
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        child.end_ns = time.perf_counter_ns()
+        _current_span.reset(token)
+
+
+def to_json(root: Span) -> str:
+    return json.dumps(root.to_dict(), ensure_ascii=False, default=str)
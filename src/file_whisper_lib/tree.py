@@ -2,26 +2,41 @@ import hashlib
 import magic
 import uuid
 import os
-import chardet
 from typing import Optional
 from .dt import Node, Meta, File, Data
+from .encoding import detect_encoding
+from .metrics import BYTES_PROCESSED
+from .tracing import span
 
 from .flavors import Flavors
 from .extractor import Extractor
+from .registry import ExtractorRegistry
 
 from snowflake import SnowflakeGenerator
 snowflakegen = SnowflakeGenerator(42)
 
 class Tree:
-    def __init__(self):
+    def __init__(self, registry: Optional[ExtractorRegistry] = None):
         self.root: Optional[Node] = None
         self.extractor = Extractor()
-        self.flavors = Flavors(self.extractor)
+        self.flavors = Flavors(self.extractor, registry)
     
     def clear_state(self):
         """清除Tree的状态，用于在处理完一个请求后重置"""
         self.root = None
 
+    def warmup(self):
+        """
+        用内置的小文档跑一遍完整流程，提前导入各提取器依赖并加载 OCR 模型。
+        预热文档是一个含文字和图片的 PDF，会依次触发 PDF、二维码和 OCR 提取。
+        """
+        node = Node()
+        node.content = File(path="warmup", name="warmup", content=build_warmup_document())
+        try:
+            self.digest(node)
+        finally:
+            self.clear_state()
+
     def meta_detect_encoding(self, meta: Meta, data: bytes):
         if not isinstance(data, bytes):
             meta.map_string["encoding"] = "NONE"
@@ -34,14 +49,15 @@ class Tree:
                 meta.map_string["encoding_detect_msg"] = "Empty data"
                 return
                 
-            results = chardet.detect(data)
-            if results is None or results.get('encoding') is None:
+            result = detect_encoding(data)
+            meta.map_string["encoding_detector"] = result.method
+            if result.encoding is None:
                 meta.map_string["encoding"] = "NONE"
                 meta.map_string["encoding_detect_msg"] = "Could not detect encoding"
                 return
                 
-            meta.map_string["encoding"] = results['encoding']
-            meta.map_number["encoding_confidence"] = int(results['confidence'] * 100)
+            meta.map_string["encoding"] = result.encoding
+            meta.map_number["encoding_confidence"] = int(result.confidence * 100)
         except Exception as e:
             meta.map_string["encoding"] = "NONE"
             meta.map_string["encoding_detect_msg"] = f"Detection error: {str(e)}"
@@ -58,6 +74,10 @@ class Tree:
         #         meta.map_number[f"encoding_confidence{idx+1}"] = int(tmp['confidence'] * 100)
 
     def digest(self, node: Node):
+        with span("digest") as digest_span:
+            self._digest(node, digest_span)
+
+    def _digest(self, node: Node, digest_span):
         extracted_nodes = []
         
         if self.root is None:
@@ -70,38 +90,45 @@ class Tree:
             # node.id = int(uuid.uuid4().int & (1<<63)-1)
             node.id = next(snowflakegen)
 
-        meta = Meta()
+        # 保留提取器在创建子节点时写入的 meta（如 PDF 图片所在页码）
+        meta = node.meta
 
         if isinstance(node.content, File):
             file = node.content
             file.size = len(file.content)
             # file.mime_type = mimetypes.guess_type(file.name)[0] or ""
-            file.mime_type = get_mime_type(file.content)
+            # 提取器已确认类型（如校验过文件头的 data URI 图片）时不再调用 libmagic
+            if not file.mime_type:
+                with span("libmagic"):
+                    file.mime_type = get_mime_type(file.content)
             # Implement these hash functions as needed
             file.extension = get_extension(file.name)
-            file.md5 = calculate_md5(file.content)
-            file.sha256 = calculate_sha256(file.content)
-            file.sha1 = calculate_sha1(file.content)
+            with span("hash"):
+                file.md5 = calculate_md5(file.content)
+                file.sha256 = calculate_sha256(file.content)
+                file.sha1 = calculate_sha1(file.content)
             node.set_type(file.mime_type, file.extension)
             # File 不探测编码, 费时
             # self.meta_detect_encoding(meta, file.content)
         
         elif isinstance(node.content, Data):
             data = node.content
-            self.meta_detect_encoding(meta, data.content)
+            with span("encoding"):
+                self.meta_detect_encoding(meta, data.content)
             node.set_type(data.type)
 
-        node.meta = meta
+        if node.content is not None:
+            BYTES_PROCESSED.inc(len(node.content.content), node_type=node.type.name)
+            digest_span.set(node_id=node.id, node_type=node.type.name, size=len(node.content.content))
 
         # Implement these functions as needed
         node.meta.map_string["error_message"] = ""
         self.flavors.analyze(node)
-        nodes = self.flavors.extract(node)
-        extracted_nodes.extend(nodes)
-
         node.children = extracted_nodes
 
-        for child_node in extracted_nodes:
+        # 子节点产出一个处理一个，压缩文件不必等全部条目解压完
+        for child_node in self.flavors.iter_extract(node):
+            extracted_nodes.append(child_node)
             self.digest(child_node)
 
 
@@ -127,3 +154,22 @@ def get_extension(filename):
     extension = os.path.splitext(filename)[1]
     extension = extension[1:]
     return extension
+
+def build_warmup_document() -> bytes:
+    """生成预热用的 PDF：第一页是文字，第二页嵌入第一页渲染出的 PNG 图片"""
+    try:
+        import fitz
+    except ImportError:
+        # 未安装 PyMuPDF 的部署只预热文本/HTML 路径
+        return b"<html><body><p>FileWhisperer warmup</p><a href='https://example.com'>link</a></body></html>"
+
+    text_doc = fitz.open()
+    page = text_doc.new_page(width=320, height=120)
+    page.insert_text((20, 60), "FileWhisperer warmup https://example.com", fontsize=14)
+    png = page.get_pixmap(dpi=96).tobytes("png")
+
+    image_page = text_doc.new_page(width=320, height=120)
+    image_page.insert_image(image_page.rect, stream=png)
+    content = text_doc.tobytes()
+    text_doc.close()
+    return content
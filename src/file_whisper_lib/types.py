@@ -10,11 +10,23 @@ class Types(Enum):
     OTHER = 6
     PDF = 7
     EMAIL = 8
+    XLSX = 9
+    PPTX = 10
+    ODT = 11
+    ODS = 12
+    ODP = 13
 
 Extension_Types = {
     'doc': Types.DOC,
     'docx': Types.DOCX,
-    'eml': Types.EMAIL
+    'eml': Types.EMAIL,
+    'xlsx': Types.XLSX,
+    'xlsm': Types.XLSX,
+    'pptx': Types.PPTX,
+    'pptm': Types.PPTX,
+    'odt': Types.ODT,
+    'ods': Types.ODS,
+    'odp': Types.ODP
 }
 
 Types__1 = {
@@ -36,6 +48,13 @@ Types__1 = {
     "application/x-gzip": Types.COMPRESSED_FILE,
     "application/x-bzip2": Types.COMPRESSED_FILE,
     "application/x-xz": Types.COMPRESSED_FILE,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": Types.XLSX,
+    "application/vnd.ms-excel.sheet.macroEnabled.12": Types.XLSX,
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": Types.PPTX,
+    "application/vnd.ms-powerpoint.presentation.macroEnabled.12": Types.PPTX,
+    "application/vnd.oasis.opendocument.text": Types.ODT,
+    "application/vnd.oasis.opendocument.spreadsheet": Types.ODS,
+    "application/vnd.oasis.opendocument.presentation": Types.ODP,
     "image/aces": Types.IMAGE,
     "image/apng": Types.IMAGE,
     "image/avci": Types.IMAGE,
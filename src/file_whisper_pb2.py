@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x66ile_whisper.proto\x12\x07whisper\"\xd8\x01\n\x0eWhisperRequest\x12\x13\n\tfile_path\x18\x01 \x01(\tH\x00\x12\x16\n\x0c\x66ile_content\x18\x02 \x01(\x0cH\x00\x12\x11\n\tpasswords\x18\x03 \x03(\t\x12\x14\n\x07root_id\x18\x04 \x01(\x03H\x01\x88\x01\x01\x12\x1a\n\rpdf_max_pages\x18\x05 \x01(\x05H\x02\x88\x01\x01\x12\x1b\n\x0eword_max_pages\x18\x06 \x01(\x05H\x03\x88\x01\x01\x42\x06\n\x04\x64\x61taB\n\n\x08_root_idB\x10\n\x0e_pdf_max_pagesB\x11\n\x0f_word_max_pages\"+\n\x0cWhisperReply\x12\x1b\n\x04tree\x18\x01 \x03(\x0b\x32\r.whisper.Node\"\xac\x02\n\x04Meta\x12\x30\n\nmap_string\x18\x01 \x03(\x0b\x32\x1c.whisper.Meta.MapStringEntry\x12\x30\n\nmap_number\x18\x02 \x03(\x0b\x32\x1c.whisper.Meta.MapNumberEntry\x12,\n\x08map_bool\x18\x03 \x03(\x0b\x32\x1a.whisper.Meta.MapBoolEntry\x1a\x30\n\x0eMapStringEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x30\n\x0eMapNumberEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\x1a.\n\x0cMapBoolEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x08:\x02\x38\x01\"\x9d\x01\n\x04Node\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x11\n\tparent_id\x18\x02 \x01(\x03\x12\x10\n\x08\x63hildren\x18\x03 \x03(\x03\x12\x1d\n\x04\x66ile\x18\x04 \x01(\x0b\x32\r.whisper.FileH\x00\x12\x1d\n\x04\x64\x61ta\x18\x05 \x01(\x0b\x32\r.whisper.DataH\x00\x12\x1b\n\x04meta\x18\x06 \x01(\x0b\x32\r.whisper.MetaB\t\n\x07\x63ontent\"\xa3\x01\n\x04\x46ile\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0c\n\x04size\x18\x03 \x01(\x03\x12\x11\n\tmime_type\x18\x04 \x01(\t\x12\x11\n\textension\x18\x05 \x01(\t\x12\x0b\n\x03md5\x18\x06 \x01(\t\x12\x0e\n\x06sha256\x18\x07 \x01(\t\x12\x0c\n\x04sha1\x18\x08 \x01(\t\x12\x14\n\x07\x63ontent\x18\t \x01(\x0cH\x00\x88\x01\x01\x42\n\n\x08_content\"%\n\x04\x44\x61ta\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\x0c\x32I\n\x07Whisper\x12>\n\nWhispering\x12\x17.whisper.WhisperRequest\x1a\x15.whisper.WhisperReply\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x66ile_whisper.proto\x12\x07whisper\"\x86\x04\n\x0eWhisperRequest\x12\x13\n\tfile_path\x18\x01 \x01(\tH\x00\x12\x16\n\x0c\x66ile_content\x18\x02 \x01(\x0cH\x00\x12\x11\n\tpasswords\x18\x03 \x03(\t\x12\x14\n\x07root_id\x18\x04 \x01(\x03H\x01\x88\x01\x01\x12\x1a\n\rpdf_max_pages\x18\x05 \x01(\x05H\x02\x88\x01\x01\x12\x1b\n\x0eword_max_pages\x18\x06 \x01(\x05H\x03\x88\x01\x01\x12\x12\n\x05trace\x18\x07 \x01(\x08H\x04\x88\x01\x01\x12\x1c\n\x0fpdf_parallelism\x18\x08 \x01(\x05H\x05\x88\x01\x01\x12\x1e\n\x11pdf_text_per_page\x18\t \x01(\x08H\x06\x88\x01\x01\x12\x1e\n\x11pdf_metadata_only\x18\n \x01(\x08H\x07\x88\x01\x01\x12\x1b\n\x0esheet_max_rows\x18\x0b \x01(\x05H\x08\x88\x01\x01\x12$\n\x17presentation_max_slides\x18\x0c \x01(\x05H\t\x88\x01\x01\x42\x06\n\x04\x64\x61taB\n\n\x08_root_idB\x10\n\x0e_pdf_max_pagesB\x11\n\x0f_word_max_pagesB\x08\n\x06_traceB\x12\n\x10_pdf_parallelismB\x14\n\x12_pdf_text_per_pageB\x14\n\x12_pdf_metadata_onlyB\x11\n\x0f_sheet_max_rowsB\x1a\n\x18_presentation_max_slides\":\n\x0cWhisperReply\x12\x1b\n\x04tree\x18\x01 \x03(\x0b\x32\r.whisper.Node\x12\r\n\x05trace\x18\x02 \x01(\t\"\xac\x02\n\x04Meta\x12\x30\n\nmap_string\x18\x01 \x03(\x0b\x32\x1c.whisper.Meta.MapStringEntry\x12\x30\n\nmap_number\x18\x02 \x03(\x0b\x32\x1c.whisper.Meta.MapNumberEntry\x12,\n\x08map_bool\x18\x03 \x03(\x0b\x32\x1a.whisper.Meta.MapBoolEntry\x1a\x30\n\x0eMapStringEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x30\n\x0eMapNumberEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\x1a.\n\x0cMapBoolEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x08:\x02\x38\x01\"\x9d\x01\n\x04Node\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x11\n\tparent_id\x18\x02 \x01(\x03\x12\x10\n\x08\x63hildren\x18\x03 \x03(\x03\x12\x1d\n\x04\x66ile\x18\x04 \x01(\x0b\x32\r.whisper.FileH\x00\x12\x1d\n\x04\x64\x61ta\x18\x05 \x01(\x0b\x32\r.whisper.DataH\x00\x12\x1b\n\x04meta\x18\x06 \x01(\x0b\x32\r.whisper.MetaB\t\n\x07\x63ontent\"\xa3\x01\n\x04\x46ile\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0c\n\x04size\x18\x03 \x01(\x03\x12\x11\n\tmime_type\x18\x04 \x01(\t\x12\x11\n\textension\x18\x05 \x01(\t\x12\x0b\n\x03md5\x18\x06 \x01(\t\x12\x0e\n\x06sha256\x18\x07 \x01(\t\x12\x0c\n\x04sha1\x18\x08 \x01(\t\x12\x14\n\x07\x63ontent\x18\t \x01(\x0cH\x00\x88\x01\x01\x42\n\n\x08_content\"%\n\x04\x44\x61ta\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\x0c\x32I\n\x07Whisper\x12>\n\nWhispering\x12\x17.whisper.WhisperRequest\x1a\x15.whisper.WhisperReply\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -38,23 +38,23 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_META_MAPBOOLENTRY']._loaded_options = None
   _globals['_META_MAPBOOLENTRY']._serialized_options = b'8\001'
   _globals['_WHISPERREQUEST']._serialized_start=32
-  _globals['_WHISPERREQUEST']._serialized_end=248
-  _globals['_WHISPERREPLY']._serialized_start=250
-  _globals['_WHISPERREPLY']._serialized_end=293
-  _globals['_META']._serialized_start=296
-  _globals['_META']._serialized_end=596
-  _globals['_META_MAPSTRINGENTRY']._serialized_start=450
-  _globals['_META_MAPSTRINGENTRY']._serialized_end=498
-  _globals['_META_MAPNUMBERENTRY']._serialized_start=500
-  _globals['_META_MAPNUMBERENTRY']._serialized_end=548
-  _globals['_META_MAPBOOLENTRY']._serialized_start=550
-  _globals['_META_MAPBOOLENTRY']._serialized_end=596
-  _globals['_NODE']._serialized_start=599
-  _globals['_NODE']._serialized_end=756
-  _globals['_FILE']._serialized_start=759
-  _globals['_FILE']._serialized_end=922
-  _globals['_DATA']._serialized_start=924
-  _globals['_DATA']._serialized_end=961
-  _globals['_WHISPER']._serialized_start=963
-  _globals['_WHISPER']._serialized_end=1036
+  _globals['_WHISPERREQUEST']._serialized_end=550
+  _globals['_WHISPERREPLY']._serialized_start=552
+  _globals['_WHISPERREPLY']._serialized_end=610
+  _globals['_META']._serialized_start=613
+  _globals['_META']._serialized_end=913
+  _globals['_META_MAPSTRINGENTRY']._serialized_start=767
+  _globals['_META_MAPSTRINGENTRY']._serialized_end=815
+  _globals['_META_MAPNUMBERENTRY']._serialized_start=817
+  _globals['_META_MAPNUMBERENTRY']._serialized_end=865
+  _globals['_META_MAPBOOLENTRY']._serialized_start=867
+  _globals['_META_MAPBOOLENTRY']._serialized_end=913
+  _globals['_NODE']._serialized_start=916
+  _globals['_NODE']._serialized_end=1073
+  _globals['_FILE']._serialized_start=1076
+  _globals['_FILE']._serialized_end=1239
+  _globals['_DATA']._serialized_start=1241
+  _globals['_DATA']._serialized_end=1278
+  _globals['_WHISPER']._serialized_start=1280
+  _globals['_WHISPER']._serialized_end=1353
 # @@protoc_insertion_point(module_scope)
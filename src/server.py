@@ -4,12 +4,11 @@ import grpc
 from concurrent import futures
 import os
 import mmap
+import time
 from typing import List, Optional
 import logging
 from pathlib import Path
 import shutil
-import threading
-import queue
 
 # os.environ['PADDLEOCR_LOG_LEVEL'] = '3'
 # logging.getLogger("paddle").setLevel(logging.ERROR)
@@ -20,6 +19,19 @@ from file_whisper_pb2 import WhisperRequest, WhisperReply, Node, File, Data, Met
 from file_whisper_pb2_grpc import WhisperServicer, add_WhisperServicer_to_server
 from file_whisper_lib.dt import Node as DataNode, File as DataFile, Data as DataData
 from file_whisper_lib.tree import Tree
+from file_whisper_lib.pool import TreePool
+from file_whisper_lib.tracing import Span, span, start_trace, to_json
+from file_whisper_lib.metrics import (
+    REQUEST_BYTES, REQUEST_DURATION, NODES_PER_REQUEST, bind_tree_pool, start_http_server,
+)
+
+try:
+    from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+    HEALTH_CHECKING_AVAILABLE = True
+except ImportError:
+    HEALTH_CHECKING_AVAILABLE = False
+
+WHISPER_SERVICE_NAME = "whisper.Whisper"
 
 server = None
 
@@ -55,40 +67,6 @@ def calculate_worker_count(env_var: str, default_value: str, cpu_count: int) ->
         logger.warning(f"Invalid {env_var} value: {value_str}, using default")
         return max(1, int(float(default_value)) if float(default_value) >= 1 else int(cpu_count * float(default_value)))
 
-class TreePool:
-    """Tree实例池，管理多个Tree实例用于并发处理"""
-    
-    def __init__(self, pool_size: int = None):
-        if pool_size is None:
-            pool_size = os.cpu_count() or 1
-        
-        self.pool_size = pool_size
-        self.pool = queue.Queue()
-        self._lock = threading.Lock()
-        
-        # 初始化Tree实例池
-        for _ in range(pool_size):
-            tree = Tree()
-            self.pool.put(tree)
-        
-        from loguru import logger
-        logger.info(f"TreePool initialized with {pool_size} Tree instances")
-    
-    def acquire(self, timeout: float = None) -> Tree:
-        """获取一个空闲的Tree实例，超时则抛出异常"""
-        if timeout is None:
-            timeout = float(os.environ.get('TREE_POOL_ACQUIRE_TIMEOUT', '3'))
-        
-        try:
-            return self.pool.get(block=True, timeout=timeout)
-        except queue.Empty:
-            raise RuntimeError(f"No available Tree instances in pool (pool_size={self.pool_size}), timeout after {timeout}s")
-    
-    def release(self, tree: Tree):
-        """归还Tree实例到池中，并清除其状态"""
-        tree.clear_state()
-        self.pool.put(tree)
-
 class GreeterServiceImpl(WhisperServicer):
     def __init__(self, tree_pool: TreePool):
         # 使用Tree实例池而不是单个Tree实例
@@ -122,10 +100,17 @@ class GreeterServiceImpl(WhisperServicer):
             logger.error(f"Failed to backup request file: {e}")
     
     def Whispering(self, request: WhisperRequest, context) -> WhisperReply:
+        with start_trace("Whispering") as trace_root:
+            return self._whispering(request, context, trace_root)
+
+    def _whispering(self, request: WhisperRequest, context, trace_root: Span) -> WhisperReply:
         tree = None
+        start = time.perf_counter()
+        status = "error"
         try:
             # 从池中获取一个空闲的Tree实例
-            tree = self.tree_pool.acquire()
+            with span("tree_pool_acquire"):
+                tree = self.tree_pool.acquire()
             node = DataNode()
             node.content = DataFile()
 
@@ -149,12 +134,31 @@ class GreeterServiceImpl(WhisperServicer):
             else:
                 node.word_max_pages = 10  # 默认值为10页
 
+            # PDF页面并行度，不传时由服务端环境变量 PDF_PARALLELISM 决定
+            if request.HasField('pdf_parallelism'):
+                node.pdf_parallelism = request.pdf_parallelism
+
+            # PDF是否按页输出文本，不传时由服务端环境变量 PDF_TEXT_PER_PAGE 决定
+            if request.HasField('pdf_text_per_page'):
+                node.pdf_text_per_page = request.pdf_text_per_page
+
+            # PDF只取元数据，默认false
+            node.pdf_metadata_only = request.pdf_metadata_only
+
+            # 电子表格最大行数和演示文稿最大幻灯片数，不传时使用默认值（1000行、50张）
+            if request.HasField('sheet_max_rows'):
+                node.sheet_max_rows = request.sheet_max_rows
+            if request.HasField('presentation_max_slides'):
+                node.presentation_max_slides = request.presentation_max_slides
+
             if request.HasField('file_path'):
                 file_path = request.file_path
-                with open(file_path, 'rb') as f:
+                with span("read_file"), open(file_path, 'rb') as f:
                     mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
                     file_content = mm.read()
                     mm.close()
+                # 分卷压缩包的其余分卷由压缩文件提取器直接从磁盘读取
+                node.source_path = file_path
             elif request.HasField('file_content'):
                 file_content = request.file_content
                 file_path = "memory_file"
@@ -163,6 +167,7 @@ class GreeterServiceImpl(WhisperServicer):
                 logging.error(error_msg)
                 context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
                 context.set_details(error_msg)
+                status = "invalid_argument"
                 return WhisperReply()
 
             # Debug备份功能：如果设置了FILE_WHISPERER_DEBUG_BACKUP_DIR环境变量，则保存文件
@@ -174,9 +179,15 @@ class GreeterServiceImpl(WhisperServicer):
             file.path = file_path
             file.name = os.path.basename(file_path)
             file.content = file_content
+            REQUEST_BYTES.observe(len(file_content))
             tree.digest(node)
             reply = WhisperReply()
-            make_whisper_reply(reply, tree)
+            with span("make_reply"):
+                make_whisper_reply(reply, tree)
+            NODES_PER_REQUEST.observe(len(reply.tree))
+            if request.trace:
+                reply.trace = to_json(trace_root)
+            status = "ok"
             return reply
 
         except Exception as e:
@@ -186,9 +197,35 @@ class GreeterServiceImpl(WhisperServicer):
             context.set_details(error_msg)
             return WhisperReply()
         finally:
+            elapsed = time.perf_counter() - start
+            log_slow_request(trace_root, tree, elapsed, status)
             # 确保Tree实例被归还到池中
             if tree is not None:
                 self.tree_pool.release(tree)
+            REQUEST_DURATION.observe(elapsed, status=status)
+
+def log_slow_request(trace_root: Span, tree: Optional[Tree], elapsed: float, status: str):
+    """
+    请求耗时超过 SLOW_REQUEST_THRESHOLD_MS 时输出完整 span 树和各节点的类型/大小
+    """
+    threshold_ms = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '10000'))
+    if threshold_ms <= 0 or elapsed * 1000 < threshold_ms:
+        return
+
+    from loguru import logger
+
+    lines = [f"Slow request: {elapsed * 1000:.0f}ms (threshold {threshold_ms:.0f}ms, status {status})",
+             trace_root.format()]
+    if tree is not None and tree.root is not None:
+        lines.append("Nodes:")
+        pending = [(tree.root, 0)]
+        while pending:
+            curr, depth = pending.pop()
+            size = len(curr.content.content) if curr.content is not None else 0
+            name = curr.content.name if isinstance(curr.content, DataFile) else curr.content.type if curr.content else ""
+            lines.append(f"{'  ' * depth}{curr.id} {curr.type.name} {size}B {name}")
+            pending.extend((child, depth + 1) for child in reversed(curr.children))
+    logger.warning("\n".join(lines))
 
 def make_whisper_reply(reply: WhisperReply, tree: Tree):
     bfs(reply, tree.root)
@@ -248,6 +285,29 @@ def bfs_process_whisper_reply_node(reply: WhisperReply, root: DataNode):
     for key, value in root.meta.map_bool.items():
         node_meta.map_bool[key] = value
 
+def add_health_servicer(server, tree_pool: TreePool):
+    """
+    注册 gRPC 健康检查服务，TreePool 预热到就绪实例数之前报告 NOT_SERVING
+    """
+    from loguru import logger
+
+    if not HEALTH_CHECKING_AVAILABLE:
+        logger.warning("grpcio-health-checking not available, health checking service disabled")
+        return None
+
+    health_servicer = health.HealthServicer()
+    for service in ("", WHISPER_SERVICE_NAME):
+        health_servicer.set(service, health_pb2.HealthCheckResponse.NOT_SERVING)
+
+    def mark_serving():
+        for service in ("", WHISPER_SERVICE_NAME):
+            health_servicer.set(service, health_pb2.HealthCheckResponse.SERVING)
+        logger.info("Health status set to SERVING")
+
+    health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+    tree_pool.on_ready(mark_serving)
+    return health_servicer
+
 def signal_handler(signum, frame):
     if server:
         logging.info(f"Received signal {signum}. Shutting down...")
@@ -285,7 +345,21 @@ def run_server(port: int):
     logger.info(f"ThreadPoolExecutor 线程数设置为: {max_workers} (环境变量 GRPC_MAX_WORKERS)")
     logger.info(f"TreePool 实例数设置为: {tree_pool_size} (环境变量 TREE_POOL_SIZE)")
     
-    tree_pool = TreePool(pool_size=tree_pool_size)
+    # 就绪所需的最少实例数，小于池大小时可以在池未填满前开始服务
+    tree_pool_min_ready = min(tree_pool_size, calculate_worker_count('TREE_POOL_MIN_READY', str(tree_pool_size), cpu_count))
+    tree_pool_init_workers = calculate_worker_count('TREE_POOL_INIT_WORKERS', str(tree_pool_size), cpu_count)
+    logger.info(f"TreePool 就绪实例数: {tree_pool_min_ready} (环境变量 TREE_POOL_MIN_READY), "
+                f"并发初始化线程数: {tree_pool_init_workers} (环境变量 TREE_POOL_INIT_WORKERS)")
+    
+    # 弹性伸缩范围，默认都等于 TREE_POOL_SIZE（固定大小）
+    tree_pool_min_size = calculate_worker_count('TREE_POOL_MIN_SIZE', str(tree_pool_size), cpu_count)
+    tree_pool_max_size = calculate_worker_count('TREE_POOL_MAX_SIZE', str(tree_pool_size), cpu_count)
+    logger.info(f"TreePool 弹性范围: [{tree_pool_min_size}, {tree_pool_max_size}] "
+                f"(环境变量 TREE_POOL_MIN_SIZE / TREE_POOL_MAX_SIZE)")
+    
+    tree_pool = TreePool(pool_size=tree_pool_size, min_ready=tree_pool_min_ready,
+                         init_workers=tree_pool_init_workers,
+                         min_size=tree_pool_min_size, max_size=tree_pool_max_size)
     
     server = grpc.server(
         futures.ThreadPoolExecutor(max_workers=max_workers),
@@ -295,7 +369,13 @@ def run_server(port: int):
         ]
     )
     
+    bind_tree_pool(tree_pool)
+    metrics_port = int(os.environ.get('METRICS_PORT', '0'))
+    if metrics_port > 0:
+        start_http_server(metrics_port, os.environ.get('METRICS_ADDR', '127.0.0.1'))
+    
     add_WhisperServicer_to_server(GreeterServiceImpl(tree_pool), server)
+    add_health_servicer(server, tree_pool)
     server.add_insecure_port(server_address)
     server.start()
     
@@ -1,9 +1,53 @@
 """
 Archive Extractor 单元测试
 """
+import io
+import hashlib
 import unittest
 import os
-from src.file_whisper_lib.extractors.archive_extractor import ArchiveExtractor
+import tempfile
+import zipfile
+import zlib
+from unittest.mock import patch
+import pybit7z
+from src.file_whisper_lib.dt import Node, File
+from src.file_whisper_lib.extractors import archive_session
+from src.file_whisper_lib.extractors import archive_extractor
+from src.file_whisper_lib.extractors.archive_extractor import ArchiveExtractor, ArchiveLimits
+
+
+def build_zip(entries: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def build_solid_7z(entries: dict, password: str = "") -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src")
+        for name, data in entries.items():
+            path = os.path.join(src, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        out = os.path.join(tmp, "solid.7z")
+        compressor = pybit7z.BitFileCompressor(archive_session.get_library(), pybit7z.FormatSevenZip)
+        compressor.set_solid_mode(True)
+        if password:
+            # 同时加密文件头，打开归档即需要密码
+            compressor.set_password(password, True)
+        compressor.compress_directory_contents(src, out)
+        with open(out, 'rb') as f:
+            return f.read()
+
+
+def make_node(data: bytes, passwords=None) -> Node:
+    node = Node()
+    node.content = File(name="archive", content=data, sha256=hashlib.sha256(data).hexdigest())
+    node.passwords = passwords or []
+    return node
 
 
 class TestArchiveExtractor(unittest.TestCase):
@@ -111,5 +155,154 @@ class TestArchiveExtractor(unittest.TestCase):
             self.assertIsInstance(value, bytes, "文件内容必须是字节类型")
 
 
+
+class TestStreamingExtraction(unittest.TestCase):
+
+    def extract(self, data: bytes, limits: ArchiveLimits = None):
+        node = make_node(data)
+        with patch.object(ArchiveLimits, 'from_environment', return_value=limits or ArchiveLimits()):
+            nodes = list(ArchiveExtractor.extract_compressed_file(node))
+        return node, {n.content.name: n.content.content for n in nodes}
+
+    def test_entries_yielded_one_at_a_time(self):
+        """前一个子节点被处理之前不会解压下一个条目"""
+        node = make_node(build_zip({"a.txt": b"a", "b.txt": b"b"}))
+        with patch.object(pybit7z.BitArchiveReader, 'extract_to', autospec=True,
+                          side_effect=lambda reader, *args: b"x") as extract_to:
+            entries = ArchiveExtractor.extract_compressed_file(node)
+            next(entries)
+            self.assertEqual(extract_to.call_count, 1)
+            self.assertEqual(len(list(entries)), 1)
+            self.assertEqual(extract_to.call_count, 2)
+
+    def test_high_ratio_entry_skipped_before_decompression(self):
+        node, files = self.extract(build_zip({"zeros.bin": b"\0" * (4 * 1024 * 1024), "a.txt": b"hello"}))
+        self.assertEqual(files, {"a.txt": b"hello"})
+        self.assertEqual(node.meta.map_number["archive_entries_skipped"], 1)
+
+    def test_exclude_patterns(self):
+        limits = ArchiveLimits(exclude=["__macosx/*", "*.exe"])
+        node, files = self.extract(build_zip({"__MACOSX/._a.txt": b"x", "tool.EXE": b"x", "a.txt": b"a"}), limits)
+        self.assertEqual(list(files), ["a.txt"])
+
+    def test_total_size_limit(self):
+        limits = ArchiveLimits(max_total_size=10)
+        node, files = self.extract(build_zip({"a.txt": b"12345", "b.txt": b"12345", "c.txt": b"12345"}), limits)
+        self.assertEqual(list(files), ["a.txt", "b.txt"])
+        self.assertTrue(node.meta.map_bool["archive_truncated"])
+        self.assertEqual(node.meta.map_number["archive_bytes_extracted"], 10)
+
+    def test_solid_archive(self):
+        data = build_solid_7z({"a.txt": b"hello", "sub/b.txt": b"world", "c.txt": b"skip me"})
+        node, files = self.extract(data, ArchiveLimits(exclude=["c.txt"]))
+        self.assertEqual(files, {"a.txt": b"hello", "sub/b.txt": b"world"})
+        self.assertEqual(node.meta.map_number["archive_entries_extracted"], 2)
+
+
+class TestEntryMeta(unittest.TestCase):
+
+    def setUp(self):
+        archive_extractor._entry_cache.clear()
+
+    def extract(self, data: bytes):
+        node = make_node(data)
+        return node, {n.content.name: n for n in ArchiveExtractor.extract_compressed_file(node)}
+
+    def test_child_meta(self):
+        data = build_zip({"dir/a.txt": b"hello"})
+        _, children = self.extract(data)
+        meta = children["dir/a.txt"].meta
+        self.assertEqual(meta.map_string["archive_path"], "dir/a.txt")
+        self.assertEqual(meta.map_string["archive_method"], "Deflate")
+        self.assertEqual(meta.map_number["archive_size"], 5)
+        self.assertEqual(meta.map_number["archive_crc"], zlib.crc32(b"hello"))
+        self.assertIn("archive_mtime", meta.map_number)
+        # zip 不记录创建时间
+        self.assertNotIn("archive_ctime", meta.map_number)
+        self.assertFalse(meta.map_bool["archive_encrypted"])
+        self.assertFalse(meta.map_bool["archive_cached"])
+
+    def test_cache_disabled_by_default(self):
+        data = build_zip({"a.txt": b"hello"})
+        self.extract(data)
+        node, children = self.extract(data)
+        self.assertFalse(children["a.txt"].meta.map_bool["archive_cached"])
+        self.assertNotIn("archive_entries_cached", node.meta.map_number)
+
+    def test_cached_entries_not_decompressed(self):
+        with patch.dict(os.environ, {"ARCHIVE_ENTRY_CACHE_BYTES": str(1024 * 1024)}):
+            self.extract(build_zip({"a.txt": b"hello", "b.txt": b"world"}))
+            # 另一个归档中 CRC 和大小相同的条目直接取缓存
+            data = build_solid_7z({"copy.txt": b"hello", "new.txt": b"other", "b2.txt": b"world"})
+            calls = []
+            original = pybit7z.BitArchiveReader.extract_to
+
+            def extract_to(reader, *args):
+                calls.append(args)
+                return original(reader, *args)
+
+            with patch.object(pybit7z.BitArchiveReader, 'extract_to', extract_to):
+                node, children = self.extract(data)
+        self.assertEqual({name: n.content.content for name, n in children.items()},
+                         {"copy.txt": b"hello", "new.txt": b"other", "b2.txt": b"world"})
+        self.assertTrue(children["copy.txt"].meta.map_bool["archive_cached"])
+        self.assertTrue(children["b2.txt"].meta.map_bool["archive_cached"])
+        self.assertFalse(children["new.txt"].meta.map_bool["archive_cached"])
+        self.assertEqual(node.meta.map_number["archive_entries_cached"], 2)
+        self.assertEqual(calls, [(children["new.txt"].meta.map_number["archive_index"],)])
+
+
+
+class TestPasswordCheck(unittest.TestCase):
+
+    def setUp(self):
+        archive_extractor._password_cache.clear()
+        with open(os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'test_with_pwd_abcd.zip'), 'rb') as f:
+            self.data = f.read()
+
+    def extract(self, node: Node):
+        return {n.content.name: n.content.content for n in ArchiveExtractor.extract_compressed_file(node)}
+
+    def test_only_smallest_entry_tested_then_extracted_once(self):
+        node = make_node(self.data, [f"wrong{i}" for i in range(10)] + ["abcd"])
+        tested = []
+        original = pybit7z.BitArchiveReader.test_item
+
+        def test_item(reader, index):
+            tested.append(index)
+            return original(reader, index)
+
+        with patch.object(pybit7z.BitArchiveReader, 'test_item', test_item), \
+                patch.object(pybit7z.BitArchiveReader, 'test') as test_all:
+            files = self.extract(node)
+        self.assertEqual(sorted(files), ["1.json", "qrcode_wikipedia.jpg"])
+        self.assertEqual(node.meta.map_string["correct_password"], "abcd")
+        # 只测试最小的条目（1.json），从不测试整个归档
+        self.assertEqual(set(tested), {0})
+        test_all.assert_not_called()
+
+    def test_cached_password_checked_first(self):
+        passwords = ["wrong1", "wrong2", "abcd"]
+        self.extract(make_node(self.data, passwords))
+        with patch.object(archive_extractor, '_check_password', wraps=archive_extractor._check_password) as check:
+            files = self.extract(make_node(self.data, passwords))
+        self.assertEqual(len(files), 2)
+        self.assertEqual([call.args[1] for call in check.call_args_list], ["abcd"])
+
+    def test_cached_password_not_used_unless_offered(self):
+        self.extract(make_node(self.data, ["abcd"]))
+        node = make_node(self.data, ["wrong"])
+        with self.assertRaises(RuntimeError):
+            self.extract(node)
+        self.assertNotIn("correct_password", node.meta.map_string)
+
+    def test_header_encrypted_archive(self):
+        data = build_solid_7z({"a.txt": b"hello", "b.txt": b"world"}, password="secret")
+        node = make_node(data, ["nope", "secret"])
+        files = self.extract(node)
+        self.assertEqual(files, {"a.txt": b"hello", "b.txt": b"world"})
+        self.assertEqual(node.meta.map_string["correct_password"], "secret")
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+压缩文件会话单元测试
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pybit7z
+from src.file_whisper_lib.analyzer import Analyzer
+from src.file_whisper_lib.dt import Node, File
+from src.file_whisper_lib.extractors import archive_session
+from src.file_whisper_lib.extractors.archive_extractor import ArchiveExtractor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures')
+
+
+def make_node(name: str, passwords=None) -> Node:
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        content = f.read()
+    node = Node()
+    node.content = File(name=name, content=content)
+    node.passwords = passwords or []
+    return node
+
+
+class TestArchiveSession(unittest.TestCase):
+
+    def test_library_loaded_once(self):
+        self.assertIs(archive_session.get_library(), archive_session.get_library())
+
+    def test_analyze_and_extract_open_archive_once(self):
+        node = make_node('png_images.zip')
+        with patch.object(archive_session.pybit7z, 'BitArchiveReader',
+                          wraps=pybit7z.BitArchiveReader) as reader:
+            Analyzer.analyze_compressed_file(node)
+            session = archive_session.session_for(node)
+            nodes = list(ArchiveExtractor.extract_compressed_file(node))
+        self.assertEqual(reader.call_count, 1)
+        self.assertEqual(node.meta.map_number["files_count"], 7)
+        self.assertEqual(len(nodes), 7)
+        # 提取完成后会话关闭，临时文件删除
+        self.assertFalse(os.path.exists(session.path))
+        self.assertIsNot(archive_session.session_for(node), session)
+        archive_session.release(node)
+
+    def test_password_switch_on_open_session(self):
+        node = make_node('test_with_pwd_abcd.zip', passwords=["wrong", "abcd"])
+        Analyzer.analyze_compressed_file(node)
+        self.assertTrue(node.meta.map_bool["is_encrypted"])
+        nodes = list(ArchiveExtractor.extract_compressed_file(node))
+        self.assertEqual(node.meta.map_string["correct_password"], "abcd")
+        self.assertEqual(sorted(n.content.name for n in nodes), ["1.json", "qrcode_wikipedia.jpg"])
+
+
+
+class TestMultiVolume(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def build_volumes(self, password: str = "") -> str:
+        """在临时目录中生成 x.7z.001 ... 分卷，返回第一个分卷的路径"""
+        src = os.path.join(self.tmp.name, "src")
+        os.makedirs(src)
+        with open(os.path.join(src, "a.txt"), 'wb') as f:
+            f.write(b"hello")
+        with open(os.path.join(src, "big.bin"), 'wb') as f:
+            f.write(os.urandom(50000))
+        compressor = pybit7z.BitFileCompressor(archive_session.get_library(), pybit7z.FormatSevenZip)
+        compressor.set_volume_size(20000)
+        if password:
+            compressor.set_password(password, True)
+        compressor.compress_directory_contents(src, os.path.join(self.tmp.name, "x.7z"))
+        return os.path.join(self.tmp.name, "x.7z.001")
+
+    def make_volume_node(self, path: str, source_path=None, passwords=None) -> Node:
+        with open(path, 'rb') as f:
+            content = f.read()
+        node = Node()
+        node.content = File(path=path, name=os.path.basename(path), content=content)
+        node.source_path = source_path
+        node.passwords = passwords or []
+        return node
+
+    def test_volumes_read_from_disk(self):
+        path = self.build_volumes()
+        node = self.make_volume_node(path, source_path=path)
+        Analyzer.analyze_compressed_file(node)
+        self.assertTrue(node.meta.map_bool["is_multi_volume"])
+        self.assertGreater(node.meta.map_number["volumes_count"], 1)
+        session = archive_session.session_for(node)
+        nodes = {n.content.name: n.content.content for n in ArchiveExtractor.extract_compressed_file(node)}
+        self.assertEqual(sorted(nodes), ["a.txt", "big.bin"])
+        self.assertEqual(nodes["a.txt"], b"hello")
+        self.assertEqual(len(nodes["big.bin"]), 50000)
+        # 原文件不会被当作临时文件删除
+        self.assertEqual(session.path, path)
+        self.assertTrue(os.path.exists(path))
+
+    def test_header_encrypted_volumes(self):
+        path = self.build_volumes(password="secret")
+        node = self.make_volume_node(path, source_path=path, passwords=["nope", "secret"])
+        nodes = {n.content.name: n.content.content for n in ArchiveExtractor.extract_compressed_file(node)}
+        self.assertEqual(nodes["a.txt"], b"hello")
+        self.assertEqual(node.meta.map_string["correct_password"], "secret")
+
+    def test_changed_source_file_not_used(self):
+        node = make_node('png_images.zip')
+        node.source_path = os.path.join(FIXTURES, 'test.zip')
+        session = archive_session.session_for(node)
+        self.assertNotEqual(session.ensure_file(), node.source_path)
+        archive_session.release(node)
+
+    def test_content_request_without_volumes(self):
+        path = self.build_volumes()
+        node = self.make_volume_node(path)
+        with self.assertRaises(Exception):
+            list(ArchiveExtractor.extract_compressed_file(node))
+
+
+if __name__ == '__main__':
+    unittest.main()
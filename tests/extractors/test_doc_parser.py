@@ -0,0 +1,94 @@
+"""
+DOC 原生解析单元测试
+"""
+import io
+import os
+import unittest
+from unittest.mock import patch
+import msoffcrypto
+from src.file_whisper_lib.extractors import doc_parser
+from src.file_whisper_lib.extractors.doc_parser import DocFormatError, read_doc, _clean, _truncate
+from src.file_whisper_lib.extractors.word_extractor import WordExtractor
+from src.file_whisper_lib.dt import Node, File
+from src.file_whisper_lib.types import Types
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'doc_pwd_123456.doc')
+RTF_FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'rtf_saved_as.doc')
+
+
+def decrypted_fixture() -> bytes:
+    with open(FIXTURE, 'rb') as f:
+        office_file = msoffcrypto.OfficeFile(f)
+        office_file.load_key(password='123456')
+        out = io.BytesIO()
+        office_file.decrypt(out)
+    return out.getvalue()
+
+
+class TestDocParser(unittest.TestCase):
+
+    def test_read_decrypted_doc(self):
+        doc = read_doc(decrypted_fixture())
+        self.assertEqual(doc.text.strip(), "132132312")
+        self.assertEqual(doc.object_count, 0)
+
+    def test_encrypted_doc_detected(self):
+        with open(FIXTURE, 'rb') as f:
+            data = f.read()
+        self.assertTrue(doc_parser.is_encrypted(data))
+        self.assertFalse(doc_parser.is_encrypted(decrypted_fixture()))
+        with self.assertRaises(DocFormatError):
+            read_doc(data)
+
+    def test_not_ole(self):
+        with self.assertRaises(DocFormatError):
+            read_doc(b"plain text" * 200)
+
+    def test_clean_fields_and_tables(self):
+        """域代码只保留显示结果，单元格标记转为制表符"""
+        raw = 'See \x13 HYPERLINK "http://x" \x14link\x15 here\rA\x07B\x07\x07\r\x01pic\x0cnext'
+        self.assertEqual(_clean(raw), 'See link here\nA\tB\t\t\npic\nnext')
+
+    def test_nested_fields(self):
+        raw = '\x13 IF \x13 PAGE \x141\x15 = 1 \x14yes\x15'
+        self.assertEqual(_clean(raw), 'yes')
+
+    def test_truncate_by_page_breaks(self):
+        text = 'p1\rp1\x0cp2\r\x0cp3\r'
+        self.assertEqual(_truncate(text, 2), 'p1\rp1\x0cp2\r')
+
+    def test_truncate_by_paragraph_estimate(self):
+        text = 'line\r' * 100
+        self.assertEqual(_truncate(text, 2).count('\r'), 2 * doc_parser.PARAGRAPHS_PER_PAGE)
+
+    def test_word_extractor_encrypted_doc(self):
+        """加密 DOC 解密后直接解析，不需要 LibreOffice"""
+        with open(FIXTURE, 'rb') as f:
+            content = f.read()
+        node = Node()
+        node.type = Types.DOC
+        node.passwords = ['wrong', '123456']
+        node.content = File(name='doc_pwd_123456.doc', content=content)
+        nodes = WordExtractor.extract_word_file(node)
+        self.assertTrue(node.meta.map_bool["is_encrypted"])
+        self.assertEqual(node.meta.map_string["doc_text_method"], "native")
+        self.assertEqual(nodes[0].content.content.decode('utf-8').strip(), "132132312")
+
+    def test_word_extractor_rtf_saved_as_doc(self):
+        """另存为 .doc 的 RTF 不是 OLE 容器，不应判为加密，而是交给 LibreOffice 转换"""
+        with open(RTF_FIXTURE, 'rb') as f:
+            content = f.read()
+        self.assertFalse(doc_parser.is_encrypted(content))
+
+        node = Node()
+        node.type = Types.DOC
+        node.content = File(name='rtf_saved_as.doc', content=content)
+        with patch.object(WordExtractor, '_convert_doc_bytes', return_value=None) as convert:
+            WordExtractor.extract_word_file(node)
+        convert.assert_called_once_with(content)
+        self.assertFalse(node.meta.map_bool["is_encrypted"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+DOCX 提取单元测试
+"""
+import os
+import unittest
+from unittest.mock import patch
+from src.file_whisper_lib.extractors.word_extractor import WordExtractor
+from src.file_whisper_lib.dt import Node, File, Data
+from src.file_whisper_lib.types import Types
+
+
+def make_node(name: str, passwords=()) -> Node:
+    path = os.path.join(os.path.dirname(__file__), '..', 'fixtures', name)
+    with open(path, 'rb') as f:
+        content = f.read()
+    node = Node()
+    node.type = Types.DOCX
+    node.passwords = list(passwords)
+    node.content = File(name=name, content=content)
+    return node
+
+
+class TestDocxExtractor(unittest.TestCase):
+
+    def test_docx_text_and_media_without_temp_files(self):
+        """DOCX 完全在内存中处理，不写临时文件"""
+        node = make_node('sample1.docx')
+        with patch('src.file_whisper_lib.extractors.word_extractor.open', create=True,
+                   side_effect=AssertionError("unexpected file access")):
+            nodes = WordExtractor.extract_word_file(node)
+        texts = [n for n in nodes if isinstance(n.content, Data)]
+        media = [n for n in nodes if isinstance(n.content, File)]
+        self.assertEqual(len(texts), 1)
+        self.assertEqual(len(media), 4)
+        self.assertFalse(node.meta.map_bool["is_encrypted"])
+
+    def test_encrypted_docx_decrypted_in_memory(self):
+        node = make_node('docx_pwd_123456.docx', passwords=['wrong', '123456'])
+        with patch('src.file_whisper_lib.extractors.word_extractor.open', create=True,
+                   side_effect=AssertionError("unexpected file access")):
+            nodes = WordExtractor.extract_word_file(node)
+        self.assertTrue(node.meta.map_bool["is_encrypted"])
+        self.assertTrue(any(isinstance(n.content, Data) for n in nodes))
+
+    def test_encrypted_docx_without_password(self):
+        node = make_node('docx_pwd_123456.docx')
+        self.assertEqual(WordExtractor.extract_word_file(node), [])
+        self.assertTrue(node.meta.map_bool["is_encrypted"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+DOCX 流式读取单元测试
+"""
+import io
+import os
+import unittest
+import zipfile
+from src.file_whisper_lib.extractors import docx_reader
+from src.file_whisper_lib.extractors.docx_reader import read_docx
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def build_docx(body: str, header: str = None) -> zipfile.ZipFile:
+    """用最小的部件集合生成 DOCX"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr('_rels/.rels',
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                    'relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+        zf.writestr('word/document.xml', f'<w:document {W} {R}><w:body>{body}</w:body></w:document>')
+        if header is not None:
+            zf.writestr('word/_rels/document.xml.rels',
+                        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                        'relationships/header" Target="header1.xml"/></Relationships>')
+            zf.writestr('word/header1.xml', f'<w:hdr {W}>{header}</w:hdr>')
+    return zipfile.ZipFile(io.BytesIO(buffer.getvalue()))
+
+
+def para(text: str, extra: str = "") -> str:
+    return f'<w:p><w:r>{extra}<w:t>{text}</w:t></w:r></w:p>'
+
+
+PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+class TestDocxReader(unittest.TestCase):
+
+    def test_sample_docx(self):
+        path = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'sample1.docx')
+        with zipfile.ZipFile(path) as zf:
+            doc = read_docx(zf, 10)
+        self.assertIn("Demonstration of DOCX support in calibre", doc.text)
+        self.assertEqual(doc.page_count, 3)
+
+    def test_stops_at_explicit_page_breaks(self):
+        body = para("page one") + PAGE_BREAK + para("page two") + PAGE_BREAK + para("page three")
+        doc = read_docx(build_docx(body), max_pages=2)
+        self.assertIn("page two", doc.text)
+        self.assertNotIn("page three", doc.text)
+        self.assertTrue(doc.truncated)
+        self.assertEqual(doc.pages_read, 2)
+
+    def test_rendered_break_after_explicit_break_counts_once(self):
+        body = (para("one") + PAGE_BREAK + para("two", "<w:lastRenderedPageBreak/>")
+                + para("three", "<w:lastRenderedPageBreak/>"))
+        doc = read_docx(build_docx(body), max_pages=3)
+        self.assertIn("three", doc.text)
+        self.assertEqual(doc.pages_read, 3)
+        self.assertFalse(doc.truncated)
+
+    def test_paragraph_estimate_without_markers(self):
+        body = "".join(para(f"line {i}") for i in range(100))
+        doc = read_docx(build_docx(body), max_pages=1)
+        self.assertEqual(len(doc.text.split("\n")), docx_reader.PARAGRAPHS_PER_PAGE)
+
+    def test_tables_and_tabs(self):
+        cell = '<w:tc><w:p><w:r><w:t>{}</w:t></w:r></w:p></w:tc>'
+        table = ('<w:tbl><w:tr>' + cell.format("a") + cell.format("b") + '</w:tr>'
+                 '<w:tr>' + cell.format("c") + cell.format("d") + '</w:tr></w:tbl>')
+        tabbed = ('<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+                  '<w:r><w:t>x</w:t><w:tab/><w:t>y</w:t></w:r></w:p>')
+        doc = read_docx(build_docx(para("before") + table + tabbed))
+        self.assertEqual(doc.text.split("\n"), ["before", "a\tb", "c\td", "x\ty"])
+
+    def test_headers_footers(self):
+        doc = read_docx(build_docx(para("body"), header=para("Confidential")))
+        self.assertEqual(doc.text, "body")
+        self.assertEqual(doc.headers_footers, ["Confidential"])
+
+
+if __name__ == '__main__':
+    unittest.main()
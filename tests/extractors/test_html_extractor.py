@@ -0,0 +1,236 @@
+"""
+HTML 提取器单元测试
+"""
+import os
+import base64
+import types
+import unittest
+from unittest.mock import patch
+from bs4 import BeautifulSoup
+from src.file_whisper_lib.dt import Node, File, Data
+from src.file_whisper_lib.extractors import html_reader, utils
+from src.file_whisper_lib.extractors.html_extractor import HTMLExtractor
+from src.file_whisper_lib import tree as tree_module
+from src.file_whisper_lib.tree import Tree
+from src.file_whisper_lib.types import Types
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures')
+
+PNG = base64.b64encode(b"\x89PNG\r\n\x1a\nfake").decode()
+
+HTML = f"""
+<html><head>
+<meta property="og:image" content="http://example.com/og.png">
+<meta http-equiv="refresh" content="5;url=http://example.com/next">
+<style>.bg {{ background: url('http://example.com/bg.png'); }}</style>
+<script src="http://example.com/app.js">var hidden = 1;</script>
+</head><body>
+<!-- comment -->
+<p>Hello <b>World</b></p>
+<a href=" http://example.com/a ">link</a>
+<img src="data:image/png;base64,{PNG}" srcset="small.jpg 1x, large.jpg 2x">
+<div data-src="http://example.com/lazy.jpg" style="background-image:url(http://example.com/inline.png)">Lazy</div>
+<svg><image xlink:href="http://example.com/svg.png"></image></svg>
+</body></html>
+"""
+
+
+class TestHtmlReader(unittest.TestCase):
+
+    def read(self, parser: str):
+        with patch.dict(os.environ, {'HTML_PARSER': parser}):
+            return html_reader.read_html(HTML)
+
+    def test_single_pass_matches_separate_extraction(self):
+        for parser in ('html.parser', 'lxml'):
+            with self.subTest(parser=parser):
+                content = self.read(parser)
+                self.assertEqual(content.text, BeautifulSoup(HTML, parser).get_text(separator=' ', strip=True))
+                self.assertEqual(content.text, "Hello World link Lazy")
+                self.assertEqual(set(content.urls), {
+                    "http://example.com/og.png", "http://example.com/next", "http://example.com/bg.png",
+                    "http://example.com/app.js", "http://example.com/a", "small.jpg", "large.jpg",
+                    "http://example.com/lazy.jpg", "http://example.com/inline.png", "http://example.com/svg.png",
+                    f"data:image/png;base64,{PNG}",
+                })
+
+    def test_fixture_text_matches_get_text(self):
+        for name in ('img.html', 'sample.html'):
+            with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+                html = f.read()
+            with self.subTest(name=name):
+                self.assertEqual(html_reader.read_html(html).text,
+                                 BeautifulSoup(html, html_reader.parser_name()).get_text(separator=' ', strip=True))
+
+    def test_missing_parser_falls_back(self):
+        with patch.dict(os.environ, {'HTML_PARSER': 'no-such-parser'}):
+            content = html_reader.read_html("<p>hi</p>")
+        self.assertEqual(content.text, "hi")
+
+
+
+class TestDataUris(unittest.TestCase):
+
+    def scan(self, html: str):
+        return list(html_reader.scan_data_uris(html.encode('utf-8')))
+
+    def test_found_outside_img_tags(self):
+        jpeg = base64.b64encode(b"\xff\xd8\xffjpeg").decode()
+        gif = base64.b64encode(b"GIF89agif").decode()
+        svg = base64.b64encode(b"<svg/>").decode()
+        html = (f'<div style="background:url(\'data:image/jpeg;base64,{jpeg}\')"></div>'
+                f'<picture><source srcset="data:image/gif;base64,{gif} 2x"></picture>'
+                f'<svg><image href="data:image/svg+xml;charset=utf-8;base64,{svg}"/></svg>')
+        images = self.scan(html)
+        self.assertEqual([image.mime for image in images], ["image/jpeg", "image/gif", "image/svg+xml"])
+        self.assertEqual([image.decode() for image in images], [b"\xff\xd8\xffjpeg", b"GIF89agif", b"<svg/>"])
+
+    def test_wrapped_base64(self):
+        wrapped = "\r\n".join(PNG[i:i + 8] for i in range(0, len(PNG), 8))
+        images = self.scan(f'<img src="data:image/png;base64,{wrapped}">')
+        self.assertEqual(images[0].decode(), b"\x89PNG\r\n\x1a\nfake")
+
+    def test_duplicates_and_oversized_skipped(self):
+        big = base64.b64encode(b"x" * 300).decode()
+        html = f'<img src="data:image/png;base64,{PNG}"><img src="data:image/png;base64,{PNG}">' \
+               f'<img src="data:image/png;base64,{big}">'
+        with patch.dict(os.environ, {'HTML_DATA_URI_MAX_SIZE': '100'}):
+            images = self.scan(html)
+        self.assertEqual(len(images), 1)
+
+    def test_decoded_lazily(self):
+        with patch.object(html_reader.base64, 'b64decode') as b64decode:
+            images = self.scan(f'<img src="data:image/png;base64,{PNG}">')
+        b64decode.assert_not_called()
+        self.assertEqual(len(images), 1)
+
+    def test_invalid_base64_skipped(self):
+        images = self.scan('<img src="data:image/png;base64,A">')
+        self.assertIsNone(images[0].decode())
+
+    def test_sniff_image_mime(self):
+        png = b"\x89PNG\r\n\x1a\nfake"
+        self.assertEqual(html_reader.sniff_image_mime(png, "image/png"), "image/png")
+        self.assertEqual(html_reader.sniff_image_mime(b"\xff\xd8\xffjpeg", "image/jpg"), "image/jpeg")
+        # 声明与内容不一致时交给 libmagic
+        self.assertEqual(html_reader.sniff_image_mime(png, "image/jpeg"), "")
+        self.assertEqual(html_reader.sniff_image_mime(b"MZ\x90\x00", "image/png"), "")
+
+
+class TestStreamHtml(unittest.TestCase):
+
+    def stream(self, data: bytes, chunk_size: int = 7, text_chunk: int = 10 ** 9):
+        with patch.dict(os.environ, {'HTML_STREAM_TEXT_CHUNK': str(text_chunk)}):
+            return list(html_reader.stream_html(data, chunk_size=chunk_size))
+
+    def test_matches_dom_extraction(self):
+        # 块很小，文本、属性和多字节字符都会被切开
+        html = HTML.replace("Hello", "你好 Hello")
+        events = self.stream(html.encode('utf-8'))
+        expected = html_reader.read_html(html)
+        self.assertEqual(' '.join(c for kind, c in events if kind == "TEXT"), expected.text)
+        self.assertEqual([c for kind, c in events if kind == "URL"], expected.urls)
+
+    def test_unclosed_ruby_annotations(self):
+        # rt/rp 的结束标签省略时，后面的正文不能被当作注音丢掉
+        html = ('<p><ruby>漢<rp>(<rt>kan<rp>)</ruby>字 after text</p>'
+                '<ruby>字<rt>ji</ruby><p>more</p><ruby>a<rt>b</rt></ruby> end')
+        events = self.stream(html.encode('utf-8'))
+        text = ' '.join(c for kind, c in events if kind == "TEXT")
+        for parser in ('html.parser', 'lxml'):
+            with self.subTest(parser=parser), patch.dict(os.environ, {'HTML_PARSER': parser}):
+                self.assertEqual(text, html_reader.read_html(html).text)
+        self.assertIn("after text", text)
+        self.assertNotIn("kan", text)
+
+    def test_text_split_into_chunks(self):
+        html = "".join(f"<p>line {i}</p>" for i in range(100)).encode()
+        texts = [c for kind, c in self.stream(html, chunk_size=64, text_chunk=100) if kind == "TEXT"]
+        self.assertGreater(len(texts), 1)
+        self.assertTrue(all(len(t) < 200 for t in texts))
+        self.assertEqual(' '.join(texts), ' '.join(f"line {i}" for i in range(100)))
+
+    def test_invalid_bytes_replaced(self):
+        events = self.stream(b"<p>ok \xff</p>")
+        self.assertEqual(events, [("TEXT", "ok \ufffd")])
+
+
+class TestHTMLExtractor(unittest.TestCase):
+
+    def test_extract_html_parses_once(self):
+        node = Node()
+        node.content = File(name="a.html", content=HTML.encode('utf-8'))
+        node.word_max_pages = 3
+        with patch.object(html_reader, 'BeautifulSoup', wraps=BeautifulSoup) as soup:
+            nodes = HTMLExtractor.extract_html(node)
+        self.assertEqual(soup.call_count, 1)
+        kinds = [n.content.type if hasattr(n.content, 'type') else "FILE" for n in nodes]
+        self.assertEqual(kinds.count("TEXT"), 1)
+        self.assertEqual(kinds.count("URL"), 11)
+        self.assertEqual(kinds.count("FILE"), 1)
+        self.assertTrue(all(n.word_max_pages == 3 and n.prev is node for n in nodes))
+        image = nodes[-1]
+        self.assertEqual(image.content.content, b"\x89PNG\r\n\x1a\nfake")
+        self.assertEqual(image.content.mime_type, "image/png")
+        self.assertEqual(image.meta.map_string["data_uri_mime"], "image/png")
+
+    def test_declared_charset(self):
+        html = '<html><head><meta charset="gb2312"></head><body><a href="http://例子.cn/">中文链接</a></body></html>'
+        node = Node()
+        node.content = File(name="a.html", content=html.encode('gbk'))
+        node.type = Types.TEXT_HTML
+        nodes = HTMLExtractor.extract_html(node)
+        self.assertEqual(nodes[0].content.content.decode('utf-8'), "中文链接")
+        self.assertEqual(nodes[1].content.content.decode('utf-8'), "http://例子.cn/")
+        self.assertEqual(node.meta.map_string["text_encoding"], "gb18030")
+        # 同一节点的下一个提取器直接使用记录的编码
+        with patch.object(utils, 'resolve_encoding') as resolve:
+            self.assertEqual(utils.decode_node_content(node), html)
+        resolve.assert_not_called()
+
+    def test_libmagic_skipped_for_verified_images(self):
+        with patch.dict(os.environ, {'FILE_WHISPERER_EXTRACTORS': 'html_extractor'}):
+            tree = Tree()
+        node = Node()
+        node.content = File(name="a.html", content=HTML.encode('utf-8'))
+        with patch.object(tree_module, 'get_mime_type', wraps=tree_module.get_mime_type) as get_mime_type:
+            tree.digest(node)
+        # 只有根节点需要 libmagic
+        get_mime_type.assert_called_once()
+        image = [n for n in node.children if isinstance(n.content, File)][0]
+        self.assertEqual(image.type, Types.IMAGE)
+
+    def test_large_document_streamed(self):
+        node = Node()
+        node.content = File(name="a.html", content=HTML.encode('utf-8'))
+        with patch.dict(os.environ, {'HTML_STREAM_THRESHOLD': '100'}), \
+                patch.object(html_reader, 'BeautifulSoup') as soup:
+            result = HTMLExtractor.extract_html(node)
+            self.assertIsInstance(result, types.GeneratorType)
+            nodes = list(result)
+        soup.assert_not_called()
+        self.assertTrue(node.meta.map_bool["html_streamed"])
+        self.assertEqual(len(nodes), 13)
+        texts = [n.content.content for n in nodes if isinstance(n.content, Data) and n.content.type == "TEXT"]
+        self.assertEqual(texts, [b"Hello World link Lazy"])
+
+    def test_stream_error_recorded(self):
+        """流式解析中途出错时保留已产出的子节点，并记入 error_message"""
+        def broken_stream(data, encoding='utf-8'):
+            yield "URL", "http://example.com/a"
+            raise UnicodeError("broken chunk")
+
+        with patch.dict(os.environ, {'FILE_WHISPERER_EXTRACTORS': 'html_extractor',
+                                     'HTML_STREAM_THRESHOLD': '100'}):
+            tree = Tree()
+            node = Node()
+            node.content = File(name="a.html", content=HTML.encode('utf-8'))
+            with patch.object(html_reader, 'stream_html', broken_stream):
+                tree.digest(node)
+        self.assertTrue(node.meta.map_bool["html_streamed"])
+        self.assertEqual([n.content.content for n in node.children], [b"http://example.com/a"])
+        self.assertIn("broken chunk", node.meta.map_string["error_message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+LibreOffice 转换进程池单元测试
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.file_whisper_lib.extractors import libreoffice_pool
+from src.file_whisper_lib.extractors.libreoffice_pool import (
+    LibreOfficePool, LibreOfficeError, QueueFullError)
+
+
+class FakeWorker:
+    """模拟 soffice worker，可以阻塞转换或模拟进程失效"""
+
+    def __init__(self, index: int, gate: threading.Event = None):
+        self.index = index
+        self.gate = gate
+        self.jobs = 0
+        self.started = False
+        self.alive = True
+        self.starts = 0
+        self.fail_next = False
+
+    def start(self):
+        self.started = True
+        self.alive = True
+        self.jobs = 0
+        self.starts += 1
+
+    def healthy(self):
+        return self.alive
+
+    def convert(self, src_path, dst_path, filter_name, timeout):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.jobs += 1
+        if self.fail_next:
+            self.fail_next = False
+            raise LibreOfficeError("conversion failed")
+        with open(dst_path, "w") as f:
+            f.write(f"{filter_name}:{src_path}")
+
+    def stop(self):
+        self.started = False
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+class TestLibreOfficePool(unittest.TestCase):
+
+    def setUp(self):
+        self.workers = []
+        self.dst = f"/tmp/test_lo_pool_{os.getpid()}.docx"
+
+    def tearDown(self):
+        if os.path.exists(self.dst):
+            os.remove(self.dst)
+
+    def make_pool(self, size=1, max_jobs=100, queue_size=0, gate=None):
+        def factory(index):
+            worker = FakeWorker(index, gate)
+            self.workers.append(worker)
+            return worker
+        return LibreOfficePool(size, max_jobs=max_jobs, queue_size=queue_size, worker_factory=factory)
+
+    def test_workers_start_lazily_and_are_reused(self):
+        pool = self.make_pool(size=2)
+        self.assertEqual(pool.stats()["started"], 0)
+        for _ in range(3):
+            pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        with open(self.dst) as f:
+            self.assertEqual(f.read(), "MS Word 2007 XML:a.doc")
+        self.assertEqual(sum(w.starts for w in self.workers), 1)
+        self.assertEqual(pool.stats()["jobs"], 3)
+
+    def test_worker_recycled_after_max_jobs(self):
+        pool = self.make_pool(max_jobs=2)
+        for _ in range(5):
+            pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        self.assertEqual(self.workers[0].starts, 3)
+        self.assertEqual(pool.stats()["restarts"], 2)
+
+    def test_unhealthy_worker_restarted(self):
+        pool = self.make_pool()
+        pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        self.workers[0].alive = False
+        pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        self.assertEqual(self.workers[0].starts, 2)
+
+    def test_failed_worker_restarted_on_next_job(self):
+        pool = self.make_pool()
+        pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        self.workers[0].fail_next = True
+        with self.assertRaises(LibreOfficeError):
+            pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        self.assertFalse(self.workers[0].started)
+        pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        self.assertEqual(self.workers[0].starts, 2)
+        self.assertEqual(pool.stats()["failures"], 1)
+
+    def test_queue_bounded(self):
+        """worker 全忙且排队已满时立即拒绝"""
+        gate = threading.Event()
+        pool = self.make_pool(size=1, queue_size=1, gate=gate)
+        threads = [threading.Thread(target=pool.convert, args=("a.doc", self.dst, "MS Word 2007 XML"))
+                   for _ in range(2)]
+        for t in threads:
+            t.start()
+        try:
+            # 等两个任务都占用名额（一个执行中、一个排队）
+            for _ in range(100):
+                if pool._slots._value == 0:
+                    break
+                threading.Event().wait(0.01)
+            with self.assertRaises(QueueFullError):
+                pool.convert("a.doc", self.dst, "MS Word 2007 XML")
+        finally:
+            gate.set()
+            for t in threads:
+                t.join(5)
+        self.assertEqual(pool.stats()["rejected"], 1)
+        self.assertEqual(pool.stats()["jobs"], 2)
+
+    def test_uno_import_keeps_sys_path(self):
+        """uno 从 LIBREOFFICE_PYTHONPATH 导入后，搜索路径立即从 sys.path 移除"""
+        with tempfile.TemporaryDirectory() as extra:
+            with open(os.path.join(extra, "uno.py"), "w") as f:
+                f.write("MARKER = 1\n")
+            path_before = list(sys.path)
+            saved = sys.modules.pop("uno", None)
+            try:
+                with patch.dict(os.environ, {'LIBREOFFICE_PYTHONPATH': extra}):
+                    module = libreoffice_pool._import_uno()
+                self.assertEqual(module.MARKER, 1)
+                self.assertEqual(sys.path, path_before)
+            finally:
+                sys.modules.pop("uno", None)
+                if saved is not None:
+                    sys.modules["uno"] = saved
+
+    def test_healthy_times_out_on_wedged_soffice(self):
+        """UNO 调用卡住时由 watchdog 杀掉进程，健康检查返回 False 而不是一直阻塞"""
+        killed = threading.Event()
+
+        class WedgedProcess:
+            def poll(self):
+                return None
+
+            def kill(self):
+                killed.set()
+
+            def wait(self, timeout=None):
+                return 0
+
+        class WedgedDesktop:
+            def getFrames(self):
+                # 进程被杀掉后连接断开，阻塞中的调用随之失败
+                killed.wait(5)
+                raise RuntimeError("connection lost")
+
+        worker = libreoffice_pool.LibreOfficeWorker(0, tempfile.gettempdir(), "soffice",
+                                                    start_timeout=1, health_timeout=0.1)
+        worker._process = WedgedProcess()
+        worker._desktop = WedgedDesktop()
+        started = time.monotonic()
+        self.assertFalse(worker.healthy())
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertFalse(worker.started)
+
+    def test_get_pool_disabled(self):
+        libreoffice_pool.reset_pool()
+        with patch.dict(os.environ, {'LIBREOFFICE_POOL_SIZE': '0'}):
+            self.assertIsNone(libreoffice_pool.get_pool())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import os
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+from src.file_whisper_lib import metrics
 from src.file_whisper_lib.extractors.ocr_extractor import OCRExtractor
 
 
@@ -101,6 +102,24 @@ class TestOCRExtractor(unittest.TestCase):
         # 验证初始化方法被调用
         mock_init.assert_called_once()
 
+    @patch('src.file_whisper_lib.extractors.ocr_extractor.OCRExtractor._initialize_easy_ocr')
+    def test_text_regions_metric(self, mock_init):
+        """每次识别记录检测出的文本区域数"""
+        mock_init.return_value = True
+        self.ocr_extractor.easy_ocr = MagicMock()
+        self.ocr_extractor.easy_ocr.readtext.return_value = [
+            [[[0, 0], [10, 0], [10, 10], [0, 10]], 'a', 0.9],
+            [[[0, 20], [10, 20], [10, 30], [0, 30]], 'b', 0.9],
+        ]
+        histogram = metrics.OCR_TEXT_REGIONS
+        count_before = histogram.count()
+        sum_before = histogram._values[()][-2] if histogram.count() else 0
+
+        self.ocr_extractor._recognize_text_from_image(self.english_image_data)
+
+        self.assertEqual(histogram.count(), count_before + 1)
+        self.assertEqual(histogram._values[()][-2], sum_before + 2)
+
     @patch('src.file_whisper_lib.extractors.ocr_extractor.OCRExtractor._initialize_easy_ocr')
     def test_recognize_text_when_ocr_returns_none(self, mock_init):
         """测试OCR识别返回None时的处理"""
@@ -0,0 +1,240 @@
+"""
+XLSX / PPTX / ODF 流式读取单元测试
+"""
+import io
+import unittest
+import zipfile
+from unittest.mock import patch
+from src.file_whisper_lib.dt import Node, File, Data
+from src.file_whisper_lib.types import Types
+from src.file_whisper_lib.extractors import office_reader
+from src.file_whisper_lib.extractors.office_extractor import OfficeExtractor
+from src.file_whisper_lib.extractors.utils import decode_binary
+
+PKG_RELS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DOC_RELS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+SML = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+PML = ('xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+       'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"')
+R = f'xmlns:r="{DOC_RELS}"'
+PNG = b"\x89PNG\r\n\x1a\nfake"
+
+
+def rels(*items) -> str:
+    body = "".join(f'<Relationship Id="{rid}" Type="{DOC_RELS}/{kind}" Target="{target}"/>'
+                   for rid, kind, target in items)
+    return f'<Relationships xmlns="{PKG_RELS}">{body}</Relationships>'
+
+
+def build_zip(parts: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def build_xlsx(sheets, shared, images=False) -> bytes:
+    """sheets 为 [(表名, sheetData 内容)]"""
+    parts = {
+        '_rels/.rels': rels(("rId1", "officeDocument", "xl/workbook.xml")),
+        'xl/workbook.xml': f'<workbook {SML} {R}><sheets>' + "".join(
+            f'<sheet name="{name}" sheetId="{i + 1}" r:id="rId{i + 1}"/>' for i, (name, _) in enumerate(sheets))
+            + '</sheets></workbook>',
+        'xl/_rels/workbook.xml.rels': rels(
+            *[(f"rId{i + 1}", "worksheet", f"worksheets/sheet{i + 1}.xml") for i in range(len(sheets))],
+            ("rIdS", "sharedStrings", "sharedStrings.xml")),
+        'xl/sharedStrings.xml': f'<sst {SML}>' + "".join(shared) + '</sst>',
+    }
+    for i, (_, data) in enumerate(sheets):
+        parts[f'xl/worksheets/sheet{i + 1}.xml'] = f'<worksheet {SML}><sheetData>{data}</sheetData></worksheet>'
+    if images:
+        parts['xl/worksheets/_rels/sheet1.xml.rels'] = rels(("rId1", "drawing", "../drawings/drawing1.xml"))
+        parts['xl/drawings/drawing1.xml'] = '<xdr:wsDr xmlns:xdr="urn:x"/>'
+        parts['xl/drawings/_rels/drawing1.xml.rels'] = rels(("rId1", "image", "../media/image1.png"))
+        parts['xl/media/image1.png'] = PNG
+        parts['xl/media/unused.png'] = PNG
+    return build_zip(parts)
+
+
+def build_pptx(slides) -> bytes:
+    parts = {
+        '_rels/.rels': rels(("rId1", "officeDocument", "ppt/presentation.xml")),
+        # sldIdLst 顺序与文件名顺序相反
+        'ppt/presentation.xml': f'<p:presentation {PML} {R}><p:sldIdLst>' + "".join(
+            f'<p:sldId id="{256 + i}" r:id="rId{i + 1}"/>' for i in reversed(range(len(slides))))
+            + '</p:sldIdLst></p:presentation>',
+        'ppt/_rels/presentation.xml.rels': rels(
+            *[(f"rId{i + 1}", "slide", f"slides/slide{i + 1}.xml") for i in range(len(slides))]),
+    }
+    for i, text in enumerate(slides):
+        parts[f'ppt/slides/slide{i + 1}.xml'] = (
+            f'<p:sld {PML}><p:cSld><p:spTree><p:sp><p:txBody>'
+            f'<a:p><a:r><a:t>{text}</a:t></a:r></a:p><a:p/></p:txBody></p:sp></p:spTree></p:cSld></p:sld>')
+        parts[f'ppt/slides/_rels/slide{i + 1}.xml.rels'] = rels(("rId1", "image", f"../media/image{i + 1}.png"))
+        parts[f'ppt/media/image{i + 1}.png'] = PNG
+    return build_zip(parts)
+
+
+ODF_NS = ('xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+          'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+          'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+          'xmlns:draw="urn:oasis:names:tc:opendocument:xmlns:drawing:1.0" '
+          'xmlns:xlink="http://www.w3.org/1999/xlink"')
+
+
+def build_odf(body: str, mimetype: str, encrypted: bool = False) -> bytes:
+    entry = ('<manifest:file-entry manifest:full-path="content.xml">'
+             + ('<manifest:encryption-data/>' if encrypted else '') + '</manifest:file-entry>')
+    return build_zip({
+        'mimetype': mimetype,
+        'META-INF/manifest.xml': ('<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:'
+                                  f'manifest:1.0">{entry}</manifest:manifest>'),
+        'content.xml': f'<office:document-content {ODF_NS}><office:body>{body}</office:body></office:document-content>',
+        'Pictures/a.png': PNG,
+        'Pictures/b.png': PNG,
+    })
+
+
+def open_zip(data: bytes) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(data))
+
+
+def make_node(data: bytes, node_type: Types) -> Node:
+    node = Node()
+    node.content = File(name="test", content=data)
+    node.type = node_type
+    return node
+
+
+def texts(nodes):
+    return [decode_binary(n.content.content) for n in nodes if isinstance(n.content, Data)]
+
+
+def files(nodes):
+    return [n.content.name for n in nodes if isinstance(n.content, File)]
+
+
+class TestXlsxReader(unittest.TestCase):
+
+    def test_shared_strings_and_cell_types(self):
+        rows = ('<row r="1"><c r="A1" t="s"><v>1</v></c><c r="C1"><v>42</v></c></row>'
+                '<row r="2"><c r="A2" t="b"><v>1</v></c><c r="B2" t="inlineStr"><is><t>inline</t></is></c></row>')
+        shared = ['<si><t>unused</t></si>', '<si><r><t>rich </t></r><r><t>text</t></r><rPh><t>x</t></rPh></si>']
+        doc = office_reader.read_xlsx(open_zip(build_xlsx([("Data", rows)], shared)), 100)
+        self.assertEqual(doc.text, "Data\nrich text\t\t42\nTRUE\tinline")
+        self.assertEqual(doc.items_read, 2)
+        self.assertFalse(doc.truncated)
+
+    def test_row_limit_spans_sheets(self):
+        row = '<row><c t="s"><v>0</v></c></row>'
+        sheets = [("One", row * 2), ("Two", row * 2), ("Three", row)]
+        doc = office_reader.read_xlsx(open_zip(build_xlsx(sheets, ['<si><t>v</t></si>'])), 3)
+        self.assertEqual(doc.text, "One\nv\nv\n\nTwo\nv")
+        self.assertEqual(doc.items_read, 3)
+        self.assertEqual(doc.item_count, 3)
+        self.assertTrue(doc.truncated)
+
+    def test_exact_limit_not_truncated(self):
+        doc = office_reader.read_xlsx(open_zip(build_xlsx([("S", '<row><c><v>1</v></c></row>')], [])), 1)
+        self.assertFalse(doc.truncated)
+
+    def test_shared_strings_read_only_up_to_needed_index(self):
+        """共享字符串表读到用到的最大序号后停止，后面损坏的部分不会被解析"""
+        data = build_xlsx([("S", '<row><c t="s"><v>0</v></c></row>')], ['<si><t>first</t></si>'])
+        parts = {}
+        with open_zip(data) as zf:
+            for name in zf.namelist():
+                parts[name] = zf.read(name)
+        parts['xl/sharedStrings.xml'] = parts['xl/sharedStrings.xml'].replace(b'</sst>', b'<si><broken')
+        doc = office_reader.read_xlsx(open_zip(build_zip(parts)), 10)
+        self.assertEqual(doc.text, "S\nfirst")
+
+
+class TestOfficeExtractor(unittest.TestCase):
+
+    def test_xlsx_media_from_read_sheets(self):
+        data = build_xlsx([("S", '<row><c><v>1</v></c></row>')], [], images=True)
+        node = make_node(data, Types.XLSX)
+        nodes = OfficeExtractor.extract_office_file(node)
+        self.assertEqual(texts(nodes), ["S\n1"])
+        self.assertEqual(files(nodes), ["image1.png"])
+        self.assertEqual(node.meta.map_number["sheet_rows_read"], 1)
+        self.assertEqual(node.meta.map_number["sheet_count"], 1)
+
+    def test_pptx_slide_order_and_limit(self):
+        node = make_node(build_pptx(["first", "second", "third"]), Types.PPTX)
+        node.presentation_max_slides = 2
+        nodes = OfficeExtractor.extract_office_file(node)
+        # sldIdLst 中的顺序是 slide3, slide2, slide1
+        self.assertEqual(texts(nodes), ["third\n\nsecond"])
+        self.assertEqual(files(nodes), ["image3.png", "image2.png"])
+        self.assertTrue(node.meta.map_bool["office_truncated"])
+        self.assertEqual(node.meta.map_number["presentation_slides_read"], 2)
+        self.assertEqual(node.meta.map_number["presentation_slide_count"], 3)
+
+    def test_odt_text(self):
+        body = ('<office:text><text:h>Title</text:h><text:p>a<text:s text:c="2"/>b<text:tab/>c'
+                '<draw:frame><draw:image xlink:href="Pictures/a.png"/></draw:frame></text:p>'
+                '<table:table><table:table-row><table:table-cell><text:p>x</text:p></table:table-cell>'
+                '<table:table-cell table:number-columns-repeated="2"/>'
+                '<table:table-cell><text:p>y</text:p></table:table-cell></table:table-row></table:table>'
+                '</office:text>')
+        nodes = OfficeExtractor.extract_office_file(
+            make_node(build_odf(body, "application/vnd.oasis.opendocument.text"), Types.ODT))
+        self.assertEqual(texts(nodes), ["Title\na  b\tc\nx\t\t\ty"])
+        self.assertEqual(files(nodes), ["a.png"])
+
+    def test_ods_repeated_rows_and_limit(self):
+        body = ('<office:spreadsheet><table:table table:name="Sheet1">'
+                '<table:table-row table:number-rows-repeated="3"><table:table-cell><text:p>r</text:p>'
+                '</table:table-cell><table:table-cell table:number-columns-repeated="16384"/></table:table-row>'
+                '<table:table-row table:number-rows-repeated="1048570"><table:table-cell/></table:table-row>'
+                '</table:table><table:table table:name="Sheet2"><table:table-row><table:table-cell>'
+                '<text:p>later</text:p></table:table-cell></table:table-row></table:table></office:spreadsheet>')
+        data = build_odf(body, "application/vnd.oasis.opendocument.spreadsheet")
+        doc = office_reader.read_odf(open_zip(data), office_reader.ODF_SPREADSHEET, 10)
+        self.assertEqual(doc.text, "Sheet1\nr\nr\nr\n\nSheet2\nlater")
+        self.assertEqual(doc.item_count, 2)
+        doc = office_reader.read_odf(open_zip(data), office_reader.ODF_SPREADSHEET, 2)
+        self.assertEqual(doc.text, "Sheet1\nr\nr")
+        self.assertTrue(doc.truncated)
+
+    def test_odp_slide_limit(self):
+        page = ('<draw:page><draw:frame><draw:text-box><text:p>slide {0}</text:p></draw:text-box></draw:frame>'
+                '<draw:frame><draw:image xlink:href="Pictures/{1}.png"/></draw:frame></draw:page>')
+        body = '<office:presentation>' + page.format(1, "a") + page.format(2, "b") + '</office:presentation>'
+        node = make_node(build_odf(body, "application/vnd.oasis.opendocument.presentation"), Types.ODP)
+        node.presentation_max_slides = 1
+        nodes = OfficeExtractor.extract_office_file(node)
+        self.assertEqual(texts(nodes), ["slide 1"])
+        self.assertEqual(files(nodes), ["a.png"])
+        self.assertTrue(node.meta.map_bool["office_truncated"])
+
+    def test_encrypted_odf(self):
+        data = build_odf('<office:text/>', "application/vnd.oasis.opendocument.text", encrypted=True)
+        node = make_node(data, Types.ODT)
+        self.assertEqual(OfficeExtractor.extract_office_file(node), [])
+        self.assertTrue(node.meta.map_bool["is_encrypted"])
+
+    def test_encrypted_ooxml_is_decrypted(self):
+        data = build_xlsx([("S", '<row><c><v>7</v></c></row>')], [])
+        node = make_node(b"\xd0\xcf\x11\xe0 not a zip", Types.XLSX)
+        node.passwords = ["secret"]
+        with patch("src.file_whisper_lib.extractors.office_extractor.decrypt_office_document",
+                   return_value=data) as decrypt:
+            nodes = OfficeExtractor.extract_office_file(node)
+        decrypt.assert_called_once()
+        self.assertTrue(node.meta.map_bool["is_encrypted"])
+        self.assertEqual(texts(nodes), ["S\n7"])
+
+    def test_type_mapping(self):
+        node = Node()
+        node.set_type("application/zip", "xlsx")
+        self.assertEqual(node.type, Types.XLSX)
+        node.set_type("application/vnd.oasis.opendocument.presentation", "")
+        self.assertEqual(node.type, Types.ODP)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+"""
+PDF Extractor 单元测试
+"""
+import os
+import unittest
+from unittest.mock import patch
+import fitz
+from multiprocessing import shared_memory
+from src.file_whisper_lib.extractors import pdf_extractor
+from src.file_whisper_lib.extractors.pdf_extractor import PDFExtractor
+from src.file_whisper_lib.dt import Node, File, Data
+
+
+def build_pdf(pages: int, image_pages=()) -> bytes:
+    """生成测试用 PDF，每页一行文字，image_pages 中的页嵌入一张图片"""
+    doc = fitz.open()
+    stamp = fitz.open()
+    stamp_page = stamp.new_page(width=60, height=20)
+    stamp_page.insert_text((5, 15), "LOGO", fontsize=10)
+    png = stamp_page.get_pixmap(dpi=72).tobytes("png")
+    for i in range(pages):
+        page = doc.new_page(width=300, height=200)
+        page.insert_text((20, 40), f"page {i + 1} text https://example.com/p{i + 1}", fontsize=10)
+        if i in image_pages:
+            page.insert_image(fitz.Rect(20, 60, 80, 80), stream=png)
+    content = doc.tobytes()
+    doc.close()
+    stamp.close()
+    return content
+
+
+def build_scanned_pdf(pages: int, strips: int = 4) -> bytes:
+    """生成扫描件样式的 PDF：每页没有文字，由多条横向图片拼满整页"""
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=200, height=200)
+        height = page.rect.height / strips
+        for j in range(strips):
+            pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 8), False)
+            pix.set_rect(pix.irect, ((i * 37 + j * 53) % 256, 128, 255 - j * 20))
+            page.insert_image(fitz.Rect(0, j * height, page.rect.width, (j + 1) * height),
+                              stream=pix.tobytes("png"), keep_proportion=False)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def make_node(content: bytes, max_pages: int = 10) -> Node:
+    node = Node()
+    node.content = File(name="test.pdf", content=content)
+    node.pdf_max_pages = max_pages
+    return node
+
+
+def text_of(nodes) -> str:
+    return "".join(n.content.content.decode("utf-8") for n in nodes if isinstance(n.content, Data))
+
+
+class TestPDFExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.test_fixtures_dir = os.path.join(os.path.dirname(__file__), '..', 'fixtures')
+
+    def test_extract_sample_pdf(self):
+        """测试样例 PDF 的文本提取"""
+        with open(os.path.join(self.test_fixtures_dir, 'sample.pdf'), 'rb') as f:
+            node = make_node(f.read())
+        nodes = PDFExtractor.extract_pdf_file(node)
+        self.assertIn("sample", text_of(nodes).lower())
+        self.assertFalse(node.meta.map_bool["is_encrypted"])
+
+    def test_page_range_opens_shared_memory_without_copy(self):
+        """工作函数直接用共享内存视图打开文档，结束后共享内存可以正常关闭"""
+        content = build_pdf(3)
+        shm = shared_memory.SharedMemory(create=True, size=len(content))
+        try:
+            shm.buf[:len(content)] = content
+            with patch.object(pdf_extractor.fitz, 'open', wraps=fitz.open) as fitz_open:
+                results = pdf_extractor._extract_page_range(shm.name, len(content), "", 1, 3)
+            self.assertIsInstance(fitz_open.call_args.kwargs["stream"], memoryview)
+            self.assertEqual([r["page"] for r in results], [1, 2])
+            self.assertIn("page 3 text", results[1]["text"])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_max_pages_limit(self):
+        """只处理 pdf_max_pages 页"""
+        nodes = PDFExtractor.extract_pdf_file(make_node(build_pdf(5), max_pages=2))
+        text = text_of(nodes)
+        self.assertIn("page 2 text", text)
+        self.assertNotIn("page 3 text", text)
+
+    def test_parallel_matches_serial(self):
+        """并行提取的结果与串行一致，并按页码顺序合并"""
+        content = build_pdf(8, image_pages=(1, 6))
+        serial_node = make_node(content)
+        serial_node.pdf_parallelism = 1
+        serial = PDFExtractor.extract_pdf_file(serial_node)
+
+        parallel_node = make_node(content)
+        parallel_node.pdf_parallelism = 3
+        with patch.dict(os.environ, {'PDF_PARALLEL_MIN_PAGES': '2'}):
+            parallel = PDFExtractor.extract_pdf_file(parallel_node)
+
+        self.assertEqual(parallel_node.meta.map_number["pdf_parallelism"], 3)
+        self.assertEqual(text_of(serial), text_of(parallel))
+        self.assertEqual([n.content.name for n in serial if isinstance(n.content, File)],
+                         [n.content.name for n in parallel if isinstance(n.content, File)])
+        text = text_of(parallel)
+        self.assertLess(text.index("page 2 text"), text.index("page 7 text"))
+
+    def test_repeated_images_are_deduplicated(self):
+        """每页重复的图片只输出一次，meta 中记录出现的页码"""
+        for parallelism in (1, 2):
+            node = make_node(build_pdf(4, image_pages=(0, 1, 3)))
+            node.pdf_parallelism = parallelism
+            with patch.dict(os.environ, {'PDF_PARALLEL_MIN_PAGES': '2'}):
+                nodes = PDFExtractor.extract_pdf_file(node)
+            images = [n for n in nodes if isinstance(n.content, File)]
+            self.assertEqual(len(images), 1)
+            self.assertEqual(images[0].content.name, "page_1_image_1.png")
+            self.assertEqual(images[0].meta.map_string["pdf_pages"], "1,2,4")
+            self.assertEqual(images[0].meta.map_number["pdf_occurrence_count"], 3)
+            self.assertNotIn("pdf_page_count", images[0].meta.map_number)
+            self.assertEqual(node.meta.map_number["pdf_image_occurrences"], 3)
+            self.assertEqual(node.meta.map_number["pdf_unique_images"], 1)
+
+    def test_text_per_page(self):
+        """按页输出 TEXT 节点，meta 中记录页码"""
+        node = make_node(build_pdf(3))
+        node.pdf_text_per_page = True
+        texts = [n for n in PDFExtractor.extract_pdf_file(node) if isinstance(n.content, Data)]
+        self.assertEqual([n.meta.map_number["pdf_page"] for n in texts], [1, 2, 3])
+        self.assertIn("page 2 text", texts[1].content.content.decode("utf-8"))
+        self.assertNotIn("page 1 text", texts[1].content.content.decode("utf-8"))
+
+    def test_text_per_page_default_from_environment(self):
+        with patch.dict(os.environ, {'PDF_TEXT_PER_PAGE': 'true'}):
+            nodes = PDFExtractor.extract_pdf_file(make_node(build_pdf(2)))
+        self.assertEqual(len([n for n in nodes if isinstance(n.content, Data)]), 2)
+
+        nodes = PDFExtractor.extract_pdf_file(make_node(build_pdf(2)))
+        self.assertEqual(len([n for n in nodes if isinstance(n.content, Data)]), 1)
+
+    def test_scanned_pages_are_rasterized(self):
+        """扫描页整页渲染为一张图片，不输出图片碎片"""
+        node = make_node(build_scanned_pdf(2))
+        with patch.dict(os.environ, {'PDF_RASTER_DPI': '72'}):
+            nodes = PDFExtractor.extract_pdf_file(node)
+        images = [n for n in nodes if isinstance(n.content, File)]
+        self.assertEqual([n.content.name for n in images], ["page_1_render.png", "page_2_render.png"])
+        self.assertTrue(images[0].meta.map_bool["pdf_rasterized"])
+        self.assertEqual(images[1].meta.map_number["pdf_page"], 2)
+        self.assertEqual(node.meta.map_number["pdf_scanned_pages"], 2)
+        pix = fitz.Pixmap(images[0].content.content)
+        self.assertEqual((pix.width, pix.height), (200, 200))
+
+    def test_raster_budget(self):
+        """超出渲染预算的扫描页按原方式输出嵌入图片"""
+        for parallelism in (1, 2):
+            node = make_node(build_scanned_pdf(3, strips=2))
+            node.pdf_parallelism = parallelism
+            env = {'PDF_RASTER_MAX_PAGES': '1', 'PDF_RASTER_DPI': '72', 'PDF_PARALLEL_MIN_PAGES': '2'}
+            with patch.dict(os.environ, env):
+                nodes = PDFExtractor.extract_pdf_file(node)
+            names = [n.content.name for n in nodes if isinstance(n.content, File)]
+            self.assertEqual(node.meta.map_number["pdf_scanned_pages"], 3)
+            self.assertEqual(node.meta.map_number["pdf_rasterized_pages"], 1)
+            self.assertEqual(len([name for name in names if name.endswith("_render.png")]), 1)
+            self.assertEqual(node.meta.map_number["pdf_unique_images"], 4)
+
+    def test_raster_budget_is_global_in_parallel(self):
+        """扫描页都在同一个页范围时，并行渲染的页与串行相同"""
+        doc = fitz.open(stream=build_pdf(4))
+        scanned = fitz.open(stream=build_scanned_pdf(4, strips=2))
+        doc.insert_pdf(scanned)
+        content = doc.tobytes()
+        doc.close()
+        scanned.close()
+
+        env = {'PDF_RASTER_MAX_PAGES': '3', 'PDF_RASTER_DPI': '72', 'PDF_PARALLEL_MIN_PAGES': '2'}
+        names = {}
+        for parallelism in (1, 2):
+            node = make_node(content)
+            node.pdf_parallelism = parallelism
+            with patch.dict(os.environ, env):
+                nodes = PDFExtractor.extract_pdf_file(node)
+            self.assertEqual(node.meta.map_number["pdf_parallelism"], parallelism)
+            self.assertEqual(node.meta.map_number["pdf_rasterized_pages"], 3)
+            names[parallelism] = [n.content.name for n in nodes if isinstance(n.content, File)]
+        self.assertEqual(names[1], names[2])
+        self.assertEqual([name for name in names[2] if name.endswith("_render.png")],
+                         ["page_5_render.png", "page_6_render.png", "page_7_render.png"])
+
+    def test_apply_rasters_keeps_images_of_later_pages(self):
+        """渲染页丢弃的图片在同一范围后续页再次出现时，字节补到该页"""
+        results = [
+            {"page": 0, "images": [(7, b"img")], "raster": None},
+            {"page": 1, "images": [(7, None), (8, b"other")], "raster": None},
+        ]
+        pdf_extractor._apply_rasters(results, {0: b"png"})
+        self.assertEqual(results[0]["raster"], b"png")
+        self.assertEqual(results[0]["images"], [])
+        self.assertEqual(results[1]["images"], [(7, b"img"), (8, b"other")])
+
+    def test_text_pages_are_not_rasterized(self):
+        node = make_node(build_pdf(2, image_pages=(0,)))
+        PDFExtractor.extract_pdf_file(node)
+        self.assertEqual(node.meta.map_number["pdf_scanned_pages"], 0)
+
+    def test_metadata_recorded_up_front(self):
+        node = make_node(build_pdf(5), max_pages=2)
+        PDFExtractor.extract_pdf_file(node)
+        self.assertEqual(node.meta.map_number["pdf_page_count"], 5)
+        self.assertEqual(node.meta.map_number["pdf_processed_pages"], 2)
+        self.assertEqual(node.meta.map_number["pdf_truncated_pages"], 3)
+        self.assertIn("PDF", node.meta.map_string["pdf_format"])
+
+    def test_metadata_only(self):
+        """只取元数据时不输出任何子节点"""
+        node = make_node(build_pdf(3, image_pages=(0,)))
+        node.pdf_metadata_only = True
+        self.assertEqual(PDFExtractor.extract_pdf_file(node), [])
+        self.assertEqual(node.meta.map_number["pdf_page_count"], 3)
+        self.assertEqual(node.meta.map_number["pdf_processed_pages"], 0)
+        self.assertFalse(node.meta.map_bool["is_encrypted"])
+        # 逐页统计仍受 pdf_max_pages 限制
+        self.assertEqual(node.meta.map_string["pdf_page_images"], "1,0,0")
+        self.assertEqual(len(node.meta.map_string["pdf_page_fonts"].split(",")), 3)
+
+    def test_page_summary_limited_to_max_pages(self):
+        node = make_node(build_pdf(5, image_pages=(1,)), max_pages=2)
+        node.pdf_metadata_only = True
+        PDFExtractor.extract_pdf_file(node)
+        self.assertEqual(node.meta.map_string["pdf_page_images"], "0,1")
+
+    def test_metadata_only_encrypted_without_password(self):
+        doc = fitz.open(stream=build_pdf(2))
+        content = doc.tobytes(encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner", user_pw="user")
+        doc.close()
+
+        node = make_node(content)
+        with self.assertRaises(ValueError):
+            PDFExtractor.extract_pdf_file(node)
+
+        node = make_node(content)
+        node.pdf_metadata_only = True
+        self.assertEqual(PDFExtractor.extract_pdf_file(node), [])
+        self.assertTrue(node.meta.map_bool["is_encrypted"])
+        self.assertEqual(node.meta.map_number["pdf_page_count"], 2)
+        self.assertEqual(node.meta.map_number["pdf_processed_pages"], 0)
+        self.assertEqual(node.meta.map_number["pdf_truncated_pages"], 2)
+        self.assertNotIn("pdf_page_images", node.meta.map_string)
+
+        node = make_node(content)
+        node.passwords = ["wrong", "user"]
+        self.assertIn("page 1 text", text_of(PDFExtractor.extract_pdf_file(node)))
+        self.assertEqual(node.meta.map_string["correct_password"], "user")
+
+    def test_small_documents_stay_serial(self):
+        """页数低于阈值时不使用进程池"""
+        node = make_node(build_pdf(3))
+        node.pdf_parallelism = 4
+        PDFExtractor.extract_pdf_file(node)
+        self.assertEqual(node.meta.map_number["pdf_parallelism"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+编码探测单元测试
+"""
+import os
+import codecs
+import unittest
+from unittest.mock import MagicMock, patch
+from src.file_whisper_lib.encoding import detect_encoding, is_valid_utf8, sample_windows
+from src.file_whisper_lib.dt import Meta
+from src.file_whisper_lib import encoding
+
+
+class TestDetectEncoding(unittest.TestCase):
+
+    def test_ascii_fast_path(self):
+        """纯 ASCII 数据不调用统计探测器"""
+        with patch.object(encoding, 'get_detector') as mock_get:
+            result = detect_encoding(b"https://example.com/a?b=c")
+        mock_get.assert_not_called()
+        self.assertEqual(result.encoding, 'ascii')
+        self.assertEqual(result.confidence, 1.0)
+
+    def test_utf8_fast_path(self):
+        """合法的 UTF-8 数据直接判定为 utf-8"""
+        data = "第二部分 AI赋能网络安全思想与实践".encode('utf-8') * 1000
+        with patch.object(encoding, 'get_detector') as mock_get:
+            result = detect_encoding(data)
+        mock_get.assert_not_called()
+        self.assertEqual(result.encoding, 'utf-8')
+        self.assertEqual(int(result.confidence * 100), 99)
+
+    def test_utf8_split_multibyte_across_chunks(self):
+        """多字节字符跨越校验分块边界时仍判定为合法 UTF-8"""
+        data = b"a" + "中".encode('utf-8') * (encoding._UTF8_CHUNK_SIZE // 3 + 10)
+        self.assertTrue(is_valid_utf8(data))
+        self.assertFalse(is_valid_utf8(data + b"\xff"))
+
+    def test_non_utf8_uses_detector(self):
+        """非 UTF-8 数据交给探测器处理"""
+        data = "这是一段用于测试的中文文本，编码为GBK。".encode('gbk') * 20
+        result = detect_encoding(data)
+        self.assertIsNotNone(result.encoding)
+        self.assertEqual(result.method, 'chardet')
+        self.assertEqual(data.decode(result.encoding), data.decode('gbk'))
+
+    def test_large_input_is_sampled(self):
+        """大数据只把采样窗口交给探测器"""
+        data = "中文".encode('gbk') * 200_000
+        seen = []
+
+        def fake_detector(sample):
+            seen.append(len(sample))
+            return 'GB2312', 0.99
+
+        with patch.object(encoding, 'get_detector', return_value=('fake', fake_detector)):
+            result = detect_encoding(data)
+        self.assertEqual(result.method, 'fake:sampled')
+        self.assertLess(seen[0], len(data))
+
+    def test_sample_windows_small_input_unchanged(self):
+        """小数据不做采样"""
+        data = b"x" * 100
+        self.assertIs(sample_windows(data, 64), data)
+        self.assertEqual(len(sample_windows(b"x" * 1000, 64)), 64 * 3 + 2)
+
+    def test_unknown_detector_falls_back_to_chardet(self):
+        """未知的探测器名称回退到 chardet"""
+        encoding._detector_cache.clear()
+        with patch.dict(os.environ, {'ENCODING_DETECTOR': 'no_such_detector'}):
+            name, _ = encoding.get_detector()
+        encoding._detector_cache.clear()
+        self.assertEqual(name, 'chardet')
+
+
+class TestResolveEncoding(unittest.TestCase):
+
+    TEXT = "第二部分 AI赋能网络安全思想与实践，繁體中文測試。" * 20
+
+    def test_utf8_preferred_over_wrong_declaration(self):
+        self.assertEqual(encoding.resolve_encoding(self.TEXT.encode('utf-8'), 'gbk'), 'utf-8')
+
+    def test_declared_charset_used_without_detector(self):
+        data = self.TEXT.encode('gbk')
+        with patch.object(encoding, 'get_detector') as mock_get:
+            self.assertEqual(encoding.resolve_encoding(data, 'GB2312'), 'gb18030')
+        mock_get.assert_not_called()
+
+    def test_undeclared_detected_on_sample(self):
+        data = self.TEXT.encode('gbk') * 100
+        detect = MagicMock(wraps=encoding._detect_with_chardet)
+        encoding._detector_cache.clear()
+        with patch.dict(os.environ, {'ENCODING_SAMPLE_SIZE': '4096'}), \
+                patch.dict(encoding.DETECTORS, {'chardet': detect}):
+            result = encoding.resolve_encoding(data)
+        encoding._detector_cache.clear()
+        self.assertEqual(data.decode(result), self.TEXT * 100)
+        self.assertLess(len(detect.call_args.args[0]), len(data))
+
+    def test_unknown_declaration_ignored(self):
+        self.assertIsNone(encoding.normalize_encoding('x-no-such-charset'))
+        self.assertEqual(encoding.normalize_encoding('latin1'), 'cp1252')
+
+    def test_bom(self):
+        self.assertEqual(encoding.resolve_encoding(codecs.BOM_UTF16_LE + "hi".encode('utf-16-le')), 'utf-16')
+
+    def test_html_declared_charset(self):
+        self.assertEqual(encoding.html_declared_charset(b'<meta charset="GBK">'), 'GBK')
+        self.assertEqual(encoding.html_declared_charset(
+            b'<meta http-equiv="Content-Type" content="text/html; charset=big5">'), 'big5')
+        self.assertIsNone(encoding.html_declared_charset(b' ' * 5000 + b'<meta charset="gbk">'))
+
+    def test_html_charset_only_from_declarations(self):
+        """其他 meta 内容中的 charset= 不算声明"""
+        html = (b'<meta name="description" content="set charset=xyz for legacy pages">'
+                b'<meta http-equiv="refresh" content="0; charset=abc">'
+                b'<meta http-equiv=Content-Type content=\'text/html; charset=gbk\'>')
+        self.assertEqual(encoding.html_declared_charset(html), 'gbk')
+        self.assertIsNone(encoding.html_declared_charset(
+            b'<meta name="description" content="charset=xyz">'))
+        self.assertEqual(encoding.html_declared_charset(b"<meta charset='utf-8' name=x>"), 'utf-8')
+
+    def test_wrong_declaration_that_decodes_is_kept(self):
+        """
+        声明错误但字节在声明的编码下可以解码时，与浏览器一致按声明解码，不调用探测器；
+        在声明的编码下无法解码时才使用探测结果
+        """
+        data = self.TEXT.encode('gbk')
+        detect = MagicMock(return_value=('GB2312', 0.99))
+        encoding._detector_cache.clear()
+        with patch.dict(encoding.DETECTORS, {'chardet': detect}):
+            self.assertEqual(encoding.resolve_encoding(data, 'koi8-r'), 'koi8-r')
+            detect.assert_not_called()
+            self.assertEqual(encoding.resolve_encoding(data, 'ascii'), 'gb18030')
+            # 第一次调用是 get_detector 的可用性探测
+            self.assertEqual(detect.call_args.args[0], encoding.sample_windows(data))
+        encoding._detector_cache.clear()
+
+
+class TestTreeMetaDetectEncoding(unittest.TestCase):
+
+    def test_confidence_written_as_percentage(self):
+        """encoding_confidence 仍以百分比整数写入 meta"""
+        from src.file_whisper_lib.tree import Tree
+        meta = Meta()
+        Tree.meta_detect_encoding(None, meta, "你好".encode('utf-8'))
+        self.assertEqual(meta.map_string["encoding"], 'utf-8')
+        self.assertEqual(meta.map_number["encoding_confidence"], 99)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+指标模块单元测试
+"""
+import unittest
+import urllib.request
+from src.file_whisper_lib.metrics import MetricsRegistry, start_http_server, bind_tree_pool, TREE_POOL_TREES
+from src.file_whisper_lib.dt import Node, File
+from src.file_whisper_lib.flavors import Flavors
+from src.file_whisper_lib.extractor import Extractor
+from src.file_whisper_lib.registry import ExtractorRegistry, ExtractorSpec
+from src.file_whisper_lib.types import Types
+from src.file_whisper_lib import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counter_and_labels(self):
+        """计数器按标签分别累加，标签值需要转义"""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_total", "test counter", ["kind"])
+        counter.inc(kind='a"b')
+        counter.inc(2, kind="c")
+        text = registry.render()
+        self.assertIn("# TYPE test_total counter", text)
+        self.assertIn('test_total{kind="a\\"b"} 1', text)
+        self.assertIn('test_total{kind="c"} 2', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """直方图的分桶计数是累计的，并包含 +Inf、_sum、_count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+        text = registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_sum 5.55', text)
+        self.assertIn('latency_seconds_count 3', text)
+
+    def test_wrong_labels_rejected(self):
+        """标签名不匹配时抛出异常"""
+        registry = MetricsRegistry()
+        counter = registry.counter("labelled_total", "labelled", ["a"])
+        with self.assertRaises(ValueError):
+            counter.inc(b="x")
+
+    def test_http_endpoint(self):
+        """本地 HTTP 端点返回文本格式指标"""
+        registry = MetricsRegistry()
+        registry.gauge("up", "always one").set(1)
+        httpd = start_http_server(0, registry=registry)
+        try:
+            port = httpd.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+                body = resp.read().decode("utf-8")
+                self.assertTrue(resp.headers["Content-Type"].startswith("text/plain"))
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+        self.assertIn("up 1", body)
+
+    def test_tree_pool_gauge(self):
+        """TreePool 占用通过回调在渲染时采集"""
+        class FakePool:
+            def on_acquire(self, observer):
+                self.observer = observer
+
+            def stats(self):
+                return {"size": 3, "idle": 1, "in_use": 2, "growing": 0}
+
+        bind_tree_pool(FakePool())
+        text = TREE_POOL_TREES.render()
+        self.assertIn('file_whisper_tree_pool_trees{state="in_use"} 2', text)
+
+    def test_extractor_latency_recorded_by_node_type(self):
+        """Flavors 按提取器和节点类型记录耗时"""
+        registry = ExtractorRegistry([
+            ExtractorSpec(name="metrics_probe", types=[Types.OTHER], target="builtins:list"),
+        ])
+        flavors = Flavors(Extractor(), registry)
+        node = Node()
+        node.content = File(content=b"x")
+        node.meta.map_string["error_message"] = ""
+        before = metrics.EXTRACTOR_DURATION.count(extractor="metrics_probe", node_type="OTHER")
+        flavors.extract(node)
+        after = metrics.EXTRACTOR_DURATION.count(extractor="metrics_probe", node_type="OTHER")
+        self.assertEqual(after, before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+提取器注册表单元测试
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+from unittest.mock import patch
+from src.file_whisper_lib.registry import ExtractorRegistry, ExtractorSpec, LazyTarget, BUILTIN_SPECS
+from src.file_whisper_lib.extractor import Extractor
+from src.file_whisper_lib.flavors import Flavors
+from src.file_whisper_lib.types import Types
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+
+class TestExtractorRegistry(unittest.TestCase):
+
+    def test_import_does_not_load_heavy_modules(self):
+        """导入库并创建 Tree 时不加载重量级依赖"""
+        code = (
+            "import sys; sys.path.insert(0, %r)\n"
+            "from file_whisper_lib.tree import Tree\n"
+            "Tree()\n"
+            "heavy = ['easyocr', 'torch', 'cv2', 'fitz', 'docx', 'bs4', 'pybit7z']\n"
+            "print(','.join(m for m in heavy if m in sys.modules))\n"
+        ) % SRC_DIR
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_builtin_table_orders_by_cost(self):
+        """同一类型上的提取器按开销从低到高排列"""
+        table = ExtractorRegistry(BUILTIN_SPECS).table()
+        names = [spec.name for spec in table[Types.IMAGE]]
+        self.assertEqual(names, ["qrcode_extractor", "ocr_extractor"])
+        self.assertEqual([s.name for s in table[Types.DOC]], ["word_file_extractor"])
+
+    def test_enabled_names_from_environment(self):
+        """FILE_WHISPERER_EXTRACTORS 只启用列出的提取器"""
+        with patch.dict(os.environ, {'FILE_WHISPERER_EXTRACTORS': 'url_extractor,html_extractor'}):
+            registry = ExtractorRegistry.from_environment()
+        table = registry.table()
+        self.assertEqual(set(table.keys()), {Types.TEXT_PLAIN, Types.TEXT_HTML})
+
+    def test_missing_dependency_disables_extractor(self):
+        """依赖未安装的提取器不进入类型表"""
+        registry = ExtractorRegistry([
+            ExtractorSpec(name="ghost", types=[Types.OTHER], target="no_such_module:f",
+                          requires=["no_such_module_xyz"]),
+        ])
+        self.assertEqual(registry.table(), {})
+
+    def test_config_file_registers_plugin(self):
+        """配置文件中声明的插件提取器可被加载和调用"""
+        config = {
+            "extractors": [{
+                "name": "other_echo",
+                "types": ["OTHER"],
+                "target": "json:dumps",
+                "cost": "cheap",
+            }]
+        }
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(config, f)
+        try:
+            with patch.dict(os.environ, {'FILE_WHISPERER_EXTRACTOR_CONFIG': f.name}):
+                registry = ExtractorRegistry.from_environment()
+        finally:
+            os.remove(f.name)
+
+        flavors = Flavors(Extractor(), registry)
+        name, target = flavors.flavor_extractors[Types.OTHER][0]
+        self.assertEqual(name, "other_echo")
+        self.assertEqual(target([1]), "[1]")
+
+    def test_stateful_target_instantiated_once_per_extractor(self):
+        """有状态提取器在同一个 Extractor 内只实例化一次"""
+        spec = ExtractorSpec(name="counter", types=[Types.OTHER],
+                             target="collections:Counter.most_common", stateful=True)
+        extractor = Extractor()
+        first = LazyTarget(spec, extractor)
+        second = LazyTarget(spec, extractor)
+        self.assertIs(first.resolve().__self__, second.resolve().__self__)
+
+
+if __name__ == '__main__':
+    unittest.main()
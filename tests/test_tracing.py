@@ -0,0 +1,59 @@
+"""
+请求追踪单元测试
+"""
+import json
+import unittest
+from src.file_whisper_lib.tracing import span, start_trace, current_span, to_json
+from src.file_whisper_lib.registry import ExtractorRegistry, BUILTIN_SPECS
+from src.file_whisper_lib.tree import Tree
+from src.file_whisper_lib.dt import Node, File
+
+
+class TestTracing(unittest.TestCase):
+
+    def test_span_is_noop_without_trace(self):
+        """未开启追踪时 span 不记录任何内容"""
+        with span("outside") as s:
+            s.set(a=1)
+        self.assertIsNone(current_span())
+
+    def test_nested_spans_build_tree(self):
+        """嵌套 span 构成树，异常类型记录在属性中"""
+        with start_trace("root") as root:
+            with span("a", x=1):
+                with span("b"):
+                    pass
+            with self.assertRaises(ValueError):
+                with span("c"):
+                    raise ValueError("boom")
+        self.assertEqual([c.name for c in root.children], ["a", "c"])
+        self.assertEqual(root.children[0].children[0].name, "b")
+        self.assertEqual(root.children[1].attributes["error"], "ValueError")
+        self.assertGreaterEqual(root.duration_ns, root.children[0].duration_ns)
+
+        data = json.loads(to_json(root))
+        self.assertEqual(data["children"][0]["attributes"], {"x": 1})
+        self.assertIn("b", root.format())
+
+    def test_digest_records_extractor_spans(self):
+        """Tree.digest 为每个节点和提取器记录 span"""
+        registry = ExtractorRegistry(BUILTIN_SPECS)
+        registry.enable_only(["url_extractor"])
+        tree = Tree(registry)
+        node = Node()
+        node.content = File(name="a.txt", content=b"see https://example.com/x for details")
+        with start_trace("request") as root:
+            tree.digest(node)
+
+        digest_span = root.children[0]
+        self.assertEqual(digest_span.name, "digest")
+        self.assertEqual(digest_span.attributes["node_type"], "TEXT_PLAIN")
+        names = [c.name for c in digest_span.children]
+        self.assertIn("libmagic", names)
+        self.assertIn("url_extractor", names)
+        # URL 子节点的 digest 嵌套在父节点的 digest 下
+        self.assertEqual(names[-1], "digest")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+TreePool 单元测试
+"""
+import threading
+import time
+import unittest
+from src.file_whisper_lib.pool import TreePool
+from src.file_whisper_lib.registry import ExtractorRegistry, BUILTIN_SPECS
+from src.file_whisper_lib.tree import Tree, build_warmup_document
+from src.file_whisper_lib.dt import Node, File
+from src.file_whisper_lib.types import Types
+
+
+class FakeTree:
+    """模拟 Tree，创建和预热时可以阻塞以观察并发行为"""
+
+    def __init__(self, gate: threading.Event = None, delay: float = 0.0):
+        self.gate = gate
+        self.delay = delay
+        self.warmed = False
+        self.cleared = 0
+
+    def warmup(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        self.warmed = True
+
+    def clear_state(self):
+        self.cleared += 1
+
+
+class TestTreePool(unittest.TestCase):
+
+    def test_trees_created_concurrently(self):
+        """实例并发创建，总耗时不随池大小线性增长"""
+        start = time.monotonic()
+        pool = TreePool(pool_size=4, init_workers=4, warmup=True,
+                        tree_factory=lambda: FakeTree(delay=0.3))
+        self.assertTrue(pool.wait_initialized(5))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(pool.created, 4)
+        self.assertTrue(pool.acquire(timeout=1).warmed)
+
+    def test_ready_only_after_warmup(self):
+        """预热完成前不进入就绪状态，就绪回调只触发一次"""
+        gate = threading.Event()
+        calls = []
+        pool = TreePool(pool_size=2, init_workers=2, warmup=True,
+                        tree_factory=lambda: FakeTree(gate=gate))
+        pool.on_ready(lambda: calls.append(1))
+        self.assertFalse(pool.wait_ready(0.2))
+        self.assertEqual(calls, [])
+        gate.set()
+        self.assertTrue(pool.wait_ready(5))
+        pool.wait_initialized(5)
+        self.assertEqual(calls, [1])
+
+    def test_partial_pool_serves(self):
+        """min_ready 小于池大小时，部分实例就绪即可获取"""
+        gates = [threading.Event(), threading.Event()]
+        counter = iter(range(2))
+        pool = TreePool(pool_size=2, min_ready=1, init_workers=2, warmup=True,
+                        tree_factory=lambda: FakeTree(gate=gates[next(counter)]))
+        gates[0].set()
+        self.assertTrue(pool.wait_ready(5))
+        tree = pool.acquire(timeout=1)
+        self.assertTrue(tree.warmed)
+        with self.assertRaises(RuntimeError):
+            pool.acquire(timeout=0.1)
+        gates[1].set()
+        self.assertIsNotNone(pool.acquire(timeout=5))
+        pool.release(tree)
+        self.assertEqual(tree.cleared, 1)
+
+    def test_failed_factory_does_not_block_initialization(self):
+        """实例创建失败时初始化仍能结束"""
+        def factory():
+            raise RuntimeError("boom")
+        pool = TreePool(pool_size=2, init_workers=2, warmup=False, tree_factory=factory)
+        self.assertTrue(pool.wait_initialized(5))
+        self.assertFalse(pool.ready)
+
+
+class TestElasticTreePool(unittest.TestCase):
+
+    def test_grows_when_wait_exceeds_threshold(self):
+        """等待超过 grow_wait 时扩容，不超过 max_size"""
+        pool = TreePool(pool_size=1, min_size=1, max_size=2, warmup=False, grow_wait=0.05,
+                        idle_ttl=60, tree_factory=FakeTree)
+        pool.wait_initialized(5)
+        first = pool.acquire(timeout=1)
+        second = pool.acquire(timeout=2)
+        self.assertIsNot(first, second)
+        stats = pool.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["in_use"], 2)
+        self.assertEqual(stats["grown"], 1)
+
+        with self.assertRaises(RuntimeError):
+            pool.acquire(timeout=0.2)
+        self.assertEqual(pool.stats()["size"], 2)
+        self.assertEqual(pool.stats()["acquire_timeouts"], 1)
+        pool.close()
+
+    def test_evicts_idle_trees_down_to_min_size(self):
+        """空闲超过 idle_ttl 的实例被回收，保留 min_size 个"""
+        pool = TreePool(pool_size=3, min_size=1, max_size=3, warmup=False,
+                        idle_ttl=0.1, tree_factory=FakeTree)
+        pool.wait_initialized(5)
+        deadline = time.monotonic() + 5
+        while pool.stats()["size"] > 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stats = pool.stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["evicted"], 2)
+        self.assertIsNotNone(pool.acquire(timeout=1))
+        pool.close()
+
+    def test_acquire_latency_observed(self):
+        """获取耗时上报给观察者并计入统计"""
+        pool = TreePool(pool_size=1, warmup=False, tree_factory=FakeTree)
+        pool.wait_initialized(5)
+        observed = []
+        pool.on_acquire(observed.append)
+        pool.release(pool.acquire(timeout=1))
+        self.assertEqual(len(observed), 1)
+        stats = pool.stats()
+        self.assertEqual(stats["acquire_count"], 1)
+        self.assertGreaterEqual(stats["acquire_wait_seconds_max"], observed[0])
+        self.assertEqual(stats["idle"], 1)
+
+
+class TestTreeWarmup(unittest.TestCase):
+
+    def test_warmup_document_runs_pdf_path(self):
+        """预热文档按 PDF 处理并产出图片和文本子节点"""
+        registry = ExtractorRegistry(BUILTIN_SPECS)
+        registry.enable_only(["pdf_extractor"])
+        tree = Tree(registry)
+        node = Node()
+        node.content = File(name="warmup", content=build_warmup_document())
+        tree.digest(node)
+        self.assertEqual(node.type, Types.PDF)
+        child_types = sorted(child.type.name for child in node.children)
+        self.assertEqual(child_types, ["IMAGE", "TEXT_PLAIN"])
+
+        tree.warmup()
+        self.assertIsNone(tree.root)
+
+
+if __name__ == '__main__':
+    unittest.main()